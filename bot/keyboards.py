@@ -27,6 +27,44 @@ def get_task_list_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+def get_task_page_keyboard(filter_type: str, prev_cursor: int = None, next_cursor: int = None) -> InlineKeyboardMarkup:
+    """Клавиатура страницы списка задач"""
+    builder = InlineKeyboardBuilder()
+    
+    navigation = 0
+    if prev_cursor is not None:
+        builder.button(text="⬅️ Назад", callback_data=f"taskspage_{filter_type}_prev_{prev_cursor}")
+        navigation += 1
+    if next_cursor is not None:
+        builder.button(text="Вперед ➡️", callback_data=f"taskspage_{filter_type}_next_{next_cursor}")
+        navigation += 1
+    
+    builder.button(text="🔄 Все задачи", callback_data="tasks_all")
+    builder.button(text="⏳ В ожидании", callback_data="tasks_pending")
+    builder.button(text="✅ Завершенные", callback_data="tasks_completed")
+    builder.button(text="🔥 Просроченные", callback_data="tasks_overdue")
+    builder.button(text="🔙 Назад", callback_data="main_menu")
+    builder.adjust(*([navigation] if navigation else []), 2, 2, 1)
+    return builder.as_markup()
+
+
+def get_search_page_keyboard(offset: int, page_size: int, has_next: bool) -> InlineKeyboardMarkup:
+    """Клавиатура страницы результатов поиска"""
+    builder = InlineKeyboardBuilder()
+    
+    navigation = 0
+    if offset > 0:
+        builder.button(text="⬅️ Назад", callback_data=f"searchpage_{max(offset - page_size, 0)}")
+        navigation += 1
+    if has_next:
+        builder.button(text="Вперед ➡️", callback_data=f"searchpage_{offset + page_size}")
+        navigation += 1
+    
+    builder.button(text="🔙 Главное меню", callback_data="main_menu")
+    builder.adjust(*([navigation] if navigation else []), 1)
+    return builder.as_markup()
+
+
 def get_task_actions_keyboard(task_id: int) -> InlineKeyboardMarkup:
     """Клавиатура действий с задачей"""
     builder = InlineKeyboardBuilder()
@@ -59,6 +97,19 @@ def get_reminder_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+def get_recurrence_keyboard() -> InlineKeyboardMarkup:
+    """Клавиатура выбора повторения задачи"""
+    builder = InlineKeyboardBuilder()
+    builder.button(text="📅 Каждый день", callback_data="recurrence_daily")
+    builder.button(text="💼 По будням", callback_data="recurrence_weekdays")
+    builder.button(text="🗓 Каждую неделю", callback_data="recurrence_weekly")
+    builder.button(text="📆 Каждый месяц", callback_data="recurrence_monthly")
+    builder.button(text="➡️ Не повторять", callback_data="recurrence_none")
+    builder.button(text="❌ Отмена", callback_data="task_cancel")
+    builder.adjust(2, 2, 1, 1)
+    return builder.as_markup()
+
+
 def get_yes_no_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура Да/Нет"""
     builder = InlineKeyboardBuilder()
@@ -1,22 +1,37 @@
 import asyncio
 import logging
+import time
 import pytz
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import RedisStorage, DefaultKeyBuilder
 from aiogram.filters import CommandStart
 from aiogram.types import Message
 from datetime import datetime, timedelta
+from functools import partial
 
-from config.settings import BOT_TOKEN, TIMEZONE
+from config.settings import (
+    BOT_TOKEN, TIMEZONE, BOT_MODE, FSM_STORAGE, FSM_KEY_PREFIX, FSM_STATE_TTL, TASK_CACHE_BACKEND
+)
+from db.cache import task_cache, LRUCacheBackend, RedisCacheBackend
 from db.database import db
-from db.repositories import TaskRepository, ReminderRepository, UserRepository
+from db.repositories import TaskRepository, ReminderRepository, JobStateRepository
 from services.reminder_service import reminder_service
+from services.message_dispatcher import message_dispatcher
 from services.google_calendar import google_calendar
+from services.calendar_sync import calendar_sync
+from services.calendar_mirror import calendar_mirror
+from services import task_recurrence
 
 from handlers.commands import router as commands_router
 from handlers.tasks import router as tasks_router
 from handlers.cancel import router as cancel_router
+from handlers.search import router as search_router
+from handlers.transfer import router as transfer_router
+from bot.webhook import run_webhook
 
 # Настройка логирования
 logging.basicConfig(
@@ -26,107 +41,164 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Позиция сканирования просроченных задач в job_state
+OVERDUE_SCAN_STATE = 'overdue_scan'
+
 
 async def check_reminders(bot: Bot):
     """
-    Периодическая проверка напоминаний
+    Доставка напоминаний
     
-    Запускается каждые 30 секунд для проверки
-    напоминаний, которые настало время отправить
+    Спит ровно до ближайшего напоминания в очереди и просыпается
+    раньше, если добавлено более раннее напоминание. Сообщения
+    отправляются через очередь message_dispatcher.
     """
     while True:
         try:
-            await asyncio.sleep(30)  # Проверка каждые 30 секунд
+            # Ждем и атомарно забираем наступившие напоминания
+            due_reminders = await reminder_service.wait_for_due_reminders()
+            sending = []
             
-            # Получаем напоминания, которые настало время отправить
-            due_reminders = await reminder_service.get_due_reminders()
+            # Не отправленное до половины аренды напоминание возвращается в очередь,
+            # а не отправляется после того, как его забрал другой обработчик
+            deadline = time.monotonic() + reminder_service.lease_seconds / 2
             
             for reminder_data in due_reminders:
                 user_id = reminder_data.get('user_id')
                 reminder_id = reminder_data.get('reminder_id')
                 task_id = reminder_data.get('task_id')
                 
+                # Напоминание уже отправлено воркером, не успевшим подтвердить его
+                reminder = await ReminderRepository.get_by_id(reminder_id)
+                if reminder and reminder.is_sent:
+                    await reminder_service.ack_reminder(reminder_id)
+                    continue
+                
+                # Напоминание повторяющейся задачи уже перенесено на следующее повторение
+                if reminder and reminder.reminder_time.timestamp() > time.time() + 1:
+                    await reminder_service.ack_reminder(reminder_id)
+                    await reminder_service.add_reminder(reminder_id, user_id, task_id, reminder.reminder_time)
+                    continue
+                
                 # Получаем задачу для напоминания
                 task = await TaskRepository.get_by_id(task_id, user_id)
                 
-                if task:
-                    # Отправляем напоминание
-                    try:
-                        await bot.send_message(
-                            chat_id=user_id,
-                            text=(
-                                f"🔔 <b>Напоминание о задаче!</b>\n\n"
-                                f"📌 <b>{task.title}</b>\n"
-                                f"📝 {task.description if task.description else 'Без описания'}\n\n"
-                                f"📅 Дедлайн: {format_datetime(task.due_date)}\n"
-                                f"🎯 Приоритет: {get_priority_emoji(task.priority)} {task.priority}"
-                            ),
-                            parse_mode="HTML"
-                        )
-                        
-                        # Отмечаем напоминание как отправленное
-                        await ReminderRepository.mark_as_sent(reminder_id)
-                        
-                        # Удаляем из очереди Redis
-                        await reminder_service.remove_reminder(reminder_id)
-                        
-                        logger.info(f"Напоминание #{reminder_id} отправлено пользователю {user_id}")
-                    
-                    except Exception as e:
-                        logger.error(f"Ошибка отправки напоминания: {e}")
+                if not task:
+                    await reminder_service.ack_reminder(reminder_id)
+                else:
+                    # Ставим напоминание в очередь отправки
+                    sending.append(await message_dispatcher.send(
+                        chat_id=user_id,
+                        text=(
+                            f"🔔 <b>Напоминание о задаче!</b>\n\n"
+                            f"📌 <b>{task.title}</b>\n"
+                            f"📝 {task.description if task.description else 'Без описания'}\n\n"
+                            f"📅 Дедлайн: {format_datetime(task.due_date)}\n"
+                            f"🎯 Приоритет: {get_priority_emoji(task.priority)} {task.priority}"
+                        ),
+                        parse_mode="HTML",
+                        on_sent=partial(on_reminder_sent, reminder_id, user_id, task, reminder),
+                        # Возвращаем в очередь для повторной попытки
+                        on_failed=partial(reminder_service.requeue_reminder, reminder_data),
+                        ttl=deadline - time.monotonic(),
+                    ))
+            
+            # Ждем отправки пачки, чтобы не держать аренду дольше необходимого
+            await asyncio.gather(*sending)
         
         except Exception as e:
             logger.error(f"Ошибка в check_reminders: {e}")
+            await asyncio.sleep(1)
+
+
+async def on_reminder_sent(reminder_id: int, user_id: int, task=None, reminder=None):
+    """
+    Отметка напоминания как отправленного
+    
+    Напоминание повторяющейся задачи вместо этого переносится
+    на следующее повторение и снова ставится в очередь
+    """
+    next_time = None
+    if task and reminder and task.recurrence:
+        next_time = await task_recurrence.reschedule_reminder(task, reminder)
+    
+    if next_time is None:
+        await ReminderRepository.mark_as_sent(reminder_id)
+    await reminder_service.ack_reminder(reminder_id)
+    
+    if next_time is not None:
+        await reminder_service.add_reminder(reminder_id, user_id, task.id, next_time)
+    
+    logger.info(f"Напоминание #{reminder_id} отправлено пользователю {user_id}")
 
 
 async def check_overdue_tasks(bot: Bot):
     """
     Периодическая проверка просроченных задач
     
-    Запускается каждые 5 минут
+    Запускается каждые 5 минут. Одним запросом выбирает задачи всех
+    пользователей, дедлайн которых наступил с прошлого сканирования.
+    Позиция (due_date, id) сохраняется после каждой пачки, поэтому
+    о каждой задаче сообщается один раз, в том числе после перезапуска.
+    Правила повторяющихся задач разворачиваются в повторения окна
+    на лету; о нескольких пропущенных повторениях сообщается одно.
     """
     while True:
         try:
             await asyncio.sleep(300)  # Проверка каждые 5 минут
             
-            # Получаем всех пользователей
-            users = await UserRepository.get_all()
+            tz = pytz.timezone(TIMEZONE)
+            now = datetime.now(tz)
             
-            for user in users:
-                # Получаем просроченные задачи пользователя
-                overdue_tasks = await TaskRepository.get_overdue(user.telegram_id)
-                
+            # Напоминаем только о задачах, просроченных не больше чем на 1 час
+            since, after_id = (now - timedelta(hours=1)).isoformat(), 0
+            
+            watermark = await JobStateRepository.get(OVERDUE_SCAN_STATE)
+            if watermark:
+                saved_since, saved_id = watermark.rsplit('|', 1)
+                if saved_since >= since:
+                    since, after_id = saved_since, int(saved_id)
+            
+            window_start = datetime.fromisoformat(since)
+            
+            async for overdue_tasks in TaskRepository.get_newly_overdue(since, now.isoformat(), after_id):
                 for task in overdue_tasks:
-                    # Проверяем не было ли уже напоминания
-                    if task.due_date:
-                        tz = pytz.timezone(TIMEZONE)
-                        time_since_due = datetime.now(tz) - task.due_date
-                        
-                        # Напоминаем если просрочено не больше чем на 1 час
-                        if timedelta(0) < time_since_due < timedelta(hours=1):
-                            try:
-                                await bot.send_message(
-                                    chat_id=user.telegram_id,
-                                    text=(
-                                        f"⚠️ <b>Просроченная задача!</b>\n\n"
-                                        f"📌 <b>{task.title}</b>\n"
-                                        f"📝 {task.description if task.description else 'Без описания'}\n\n"
-                                        f"📅 Дедлайн был: {format_datetime(task.due_date)}\n"
-                                        f"🎯 Приоритет: {get_priority_emoji(task.priority)} {task.priority}\n\n"
-                                        f"Время выполнить! 💪"
-                                    ),
-                                    parse_mode="HTML"
-                                )
-                                
-                                logger.info(f"Напоминание о просроченной задаче #{task.id} отправлено")
-                            
-                            except Exception as e:
-                                logger.error(f"Ошибка отправки напоминания о просроченной задаче: {e}")
+                    await notify_overdue(task, task.due_date)
+                
+                last = overdue_tasks[-1]
+                await JobStateRepository.set(OVERDUE_SCAN_STATE, f"{last.due_date.isoformat()}|{last.id}")
+            
+            async for recurring_tasks in TaskRepository.iter_recurring(now.isoformat()):
+                for task in recurring_tasks:
+                    occurrences = task_recurrence.occurrences_between(task, window_start, now)
+                    if occurrences:
+                        await notify_overdue(task, occurrences[-1])
+            
+            # Все задачи с дедлайном раньше now обработаны
+            await JobStateRepository.set(OVERDUE_SCAN_STATE, f"{now.isoformat()}|0")
         
         except Exception as e:
             logger.error(f"Ошибка в check_overdue_tasks: {e}")
 
 
+async def notify_overdue(task, due_date: datetime):
+    """Постановка уведомления о просроченной задаче в очередь отправки"""
+    await message_dispatcher.send(
+        chat_id=task.user_id,
+        text=(
+            f"⚠️ <b>Просроченная задача!</b>\n\n"
+            f"📌 <b>{task.title}</b>\n"
+            f"📝 {task.description if task.description else 'Без описания'}\n\n"
+            f"📅 Дедлайн был: {format_datetime(due_date)}\n"
+            f"🎯 Приоритет: {get_priority_emoji(task.priority)} {task.priority}\n\n"
+            f"Время выполнить! 💪"
+        ),
+        parse_mode="HTML"
+    )
+    
+    logger.info(f"Напоминание о просроченной задаче #{task.id} поставлено в очередь")
+
+
 def format_datetime(dt: datetime) -> str:
     """Форматирование даты и времени"""
     if not dt:
@@ -152,10 +224,16 @@ async def on_startup(bot: Bot):
     await db.connect()
     logger.info("✅ Подключено к базе данных SQLite")
     
-    # Подключение к Redis
-    await reminder_service.connect()
+    # Запуск очереди отправки и фоновых задач
+    message_dispatcher.start(bot)
+    calendar_sync.start()
+    calendar_mirror.start()
     
-    # Запуск фоновых задач
+    # Сверка очереди напоминаний с базой (восстановление после потери данных Redis)
+    reminder_service.start_rehydration()
+    
+    # Клиент Google Calendar создается в фоне, не задерживая прием обновлений
+    asyncio.create_task(google_calendar.initialize())
     asyncio.create_task(check_reminders(bot))
     asyncio.create_task(check_overdue_tasks(bot))
     
@@ -170,23 +248,84 @@ async def on_shutdown(bot: Bot):
     """Действия при остановке бота"""
     logger.info("🛑 Остановка бота...")
     
+    # Отправка оставшихся сообщений
+    await message_dispatcher.stop()
+    logger.info(f"📈 Метрики очереди отправки: {message_dispatcher.get_stats()}")
+    
+    # Остановка синхронизации с календарем (неотправленные операции остаются в очереди)
+    await calendar_sync.stop()
+    await calendar_mirror.stop()
+    logger.info(f"📈 Метрики синхронизации с календарем: {calendar_sync.get_stats()}")
+    logger.info(f"📈 Метрики копии календаря: {calendar_mirror.get_stats()}")
+    logger.info(f"📈 Метрики Google Calendar API: {google_calendar.get_stats()}")
+    google_calendar.close()
+    
     # Отключение от базы данных
+    logger.info(f"📈 Метрики кэша задач: {task_cache.get_stats()}")
+    logger.info(f"📈 Метрики пула БД: {db.get_pool_stats()}")
     await db.disconnect()
     logger.info("✅ Отключено от базы данных")
     
     # Отключение от Redis
+    logger.info(f"📈 Метрики очереди напоминаний: {reminder_service.get_stats()}")
     await reminder_service.disconnect()
     logger.info("✅ Отключено от Redis")
 
 
+def create_fsm_storage() -> BaseStorage:
+    """
+    Создание хранилища состояний FSM
+    
+    В режиме redis использует подключение reminder_service, поэтому
+    состояния диалогов переживают перезапуск и общие для всех реплик.
+    Брошенные диалоги удаляются по истечении FSM_STATE_TTL.
+    """
+    if FSM_STORAGE == 'redis':
+        if reminder_service.redis:
+            logger.info("✅ Состояния FSM хранятся в Redis")
+            return RedisStorage(
+                reminder_service.redis,
+                key_builder=DefaultKeyBuilder(prefix=FSM_KEY_PREFIX),
+                state_ttl=FSM_STATE_TTL,
+                data_ttl=FSM_STATE_TTL,
+            )
+        logger.warning("⚠️ Redis недоступен, состояния FSM хранятся в памяти")
+    
+    return MemoryStorage()
+
+
+def configure_task_cache():
+    """
+    Выбор backend кэша задач
+    
+    redis - общий кэш для всех реплик (webhook за балансировщиком),
+    memory - LRU в памяти процесса, none - без кэша
+    """
+    if TASK_CACHE_BACKEND == 'redis':
+        if reminder_service.redis:
+            task_cache.backend = RedisCacheBackend(reminder_service.redis)
+            logger.info("✅ Кэш задач хранится в Redis")
+            return
+        logger.warning("⚠️ Redis недоступен, кэш задач хранится в памяти")
+    
+    if TASK_CACHE_BACKEND != 'none':
+        task_cache.backend = LRUCacheBackend()
+
+
 async def main():
     """Главная функция"""
+    # Подключение к Redis (очередь напоминаний, хранилище FSM и кэш задач)
+    await reminder_service.connect()
+    configure_task_cache()
+    
     # Создание бота и диспетчера
     bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-    dp = Dispatcher()
+    dp = Dispatcher(storage=create_fsm_storage())
     
     # Регистрация роутеров
     dp.include_router(commands_router)
+    dp.include_router(search_router)
+    dp.include_router(transfer_router)
     dp.include_router(tasks_router)
     dp.include_router(cancel_router)
     
@@ -194,9 +333,16 @@ async def main():
     dp.startup.register(on_startup)
     dp.shutdown.register(on_shutdown)
     
-    # Запуск polling
-    logger.info("🤖 Бот запущен в режиме polling...")
-    await dp.start_polling(bot)
+    try:
+        if BOT_MODE == 'webhook':
+            await run_webhook(dp, bot)
+        else:
+            # Запуск polling
+            logger.info("🤖 Бот запущен в режиме polling...")
+            await dp.start_polling(bot)
+    finally:
+        # Хранилище FSM (подключение к Redis) не закрывается aiogram ни в одном режиме
+        await dp.storage.close()
 
 
 if __name__ == "__main__":
@@ -7,6 +7,7 @@ class TaskStates(StatesGroup):
     waiting_for_description = State()
     waiting_for_priority = State()
     waiting_for_due_date = State()
+    waiting_for_recurrence = State()
     waiting_for_reminder = State()
     waiting_for_reminder_time = State()
 
@@ -17,3 +18,8 @@ class EditTaskStates(StatesGroup):
     waiting_for_new_description = State()
     waiting_for_new_priority = State()
     waiting_for_new_due_date = State()
+
+
+class ImportStates(StatesGroup):
+    """Состояния для импорта задач из файла"""
+    waiting_for_file = State()
@@ -0,0 +1,148 @@
+import asyncio
+import hmac
+import logging
+import signal
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from config.settings import (
+    WEBHOOK_URL, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH,
+    WEBHOOK_SECRET, WEBHOOK_MAX_CONCURRENT_UPDATES, WEBHOOK_DRAIN_TIMEOUT
+)
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookServer:
+    """
+    Прием обновлений Telegram через webhook
+    
+    Обновления обрабатываются в фоне, но одновременно не больше
+    max_concurrent: при заполнении запрос Telegram ждет свободного
+    слота. При остановке сервер перестает быть ready и дожидается
+    обработки уже принятых обновлений.
+    """
+    
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        path: str = WEBHOOK_PATH,
+        secret: str = WEBHOOK_SECRET,
+        max_concurrent: int = WEBHOOK_MAX_CONCURRENT_UPDATES
+    ):
+        self.dp = dp
+        self.bot = bot
+        self.path = path
+        self.secret = secret
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._in_flight: set[asyncio.Task] = set()
+        self.ready = False
+        self.draining = False
+        self.processed = 0
+    
+    def create_app(self) -> web.Application:
+        """Создание aiohttp приложения"""
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        app.router.add_get('/health', self.health)
+        app.router.add_get('/ready', self.readiness)
+        return app
+    
+    async def handle_update(self, request: web.Request) -> web.Response:
+        """Прием одного обновления"""
+        if self.secret:
+            token = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+            if not hmac.compare_digest(token, self.secret):
+                return web.Response(status=401)
+        
+        if self.draining:
+            return web.Response(status=503)
+        
+        # Некорректное тело - ошибка клиента, а не сервера
+        try:
+            update = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+        if not isinstance(update, dict):
+            return web.Response(status=400)
+        
+        await self._slots.acquire()
+        task = asyncio.create_task(self._process(update))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+        
+        return web.Response()
+    
+    async def _process(self, update: dict):
+        """Обработка обновления диспетчером"""
+        try:
+            result = await self.dp.feed_raw_update(bot=self.bot, update=update)
+            if isinstance(result, TelegramMethod):
+                await self.dp.silent_call_request(bot=self.bot, result=result)
+        except Exception as e:
+            logger.error(f"Ошибка обработки обновления: {e}")
+        finally:
+            self.processed += 1
+            self._slots.release()
+    
+    async def health(self, request: web.Request) -> web.Response:
+        """Проверка, что процесс жив"""
+        return web.json_response({
+            'status': 'ok',
+            'in_flight': len(self._in_flight),
+            'processed': self.processed,
+        })
+    
+    async def readiness(self, request: web.Request) -> web.Response:
+        """Готовность принимать обновления (для балансировщика)"""
+        if self.ready and not self.draining:
+            return web.json_response({'status': 'ready'})
+        return web.json_response({'status': 'not_ready'}, status=503)
+    
+    async def drain(self, timeout: float = WEBHOOK_DRAIN_TIMEOUT):
+        """Завершение обработки принятых обновлений"""
+        self.draining = True
+        if not self._in_flight:
+            return
+        
+        logger.info(f"⏳ Ожидание обработки обновлений: {len(self._in_flight)}")
+        _, pending = await asyncio.wait(self._in_flight, timeout=timeout)
+        for task in pending:
+            task.cancel()
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot):
+    """Запуск бота в режиме webhook до получения SIGINT/SIGTERM"""
+    server = WebhookServer(dp, bot)
+    runner = web.AppRunner(server.create_app())
+    await runner.setup()
+    
+    await dp.emit_startup(bot=bot, dispatcher=dp, **dp.workflow_data)
+    
+    site = web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT)
+    await site.start()
+    
+    if WEBHOOK_URL:
+        await bot.set_webhook(
+            url=WEBHOOK_URL + WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET or None,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+    
+    server.ready = True
+    logger.info(f"🤖 Бот запущен в режиме webhook на {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+    
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    
+    try:
+        await stop.wait()
+    finally:
+        logger.info("🛑 Остановка webhook сервера...")
+        await server.drain()
+        await runner.cleanup()
+        await dp.emit_shutdown(bot=bot, dispatcher=dp, **dp.workflow_data)
+        await bot.session.close()
@@ -1,4 +1,5 @@
 import os
+import socket
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -9,18 +10,96 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Telegram Bot
 BOT_TOKEN = os.getenv('BOT_TOKEN', '')
+# Telegram ID администраторов через запятую (служебные команды)
+ADMIN_IDS = {int(admin_id) for admin_id in os.getenv('ADMIN_IDS', '').split(',') if admin_id.strip()}
+
+# Режим получения обновлений: polling или webhook
+BOT_MODE = os.getenv('BOT_MODE', 'polling')
+
+# Webhook
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')  # публичный адрес, например https://bot.example.com
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8080))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+WEBHOOK_MAX_CONCURRENT_UPDATES = int(os.getenv('WEBHOOK_MAX_CONCURRENT_UPDATES', 100))
+WEBHOOK_DRAIN_TIMEOUT = float(os.getenv('WEBHOOK_DRAIN_TIMEOUT', 30))
 
 # Google Calendar API
 GOOGLE_CREDENTIALS_FILE = os.getenv('GOOGLE_CREDENTIALS_FILE', 'credentials.json')
 GOOGLE_CALENDAR_ID = os.getenv('GOOGLE_CALENDAR_ID', 'primary')
+# Пул потоков для вызовов Calendar API, лимит одновременных вызовов (0 - по числу потоков)
+# и таймаут одного вызова (сек)
+GOOGLE_CALENDAR_THREADS = int(os.getenv('GOOGLE_CALENDAR_THREADS', 4))
+GOOGLE_CALENDAR_MAX_CONCURRENT = int(os.getenv('GOOGLE_CALENDAR_MAX_CONCURRENT', 0))
+GOOGLE_CALENDAR_TIMEOUT = float(os.getenv('GOOGLE_CALENDAR_TIMEOUT', 30))
+# Очередь синхронизации с календарем: операций в одном batch-запросе,
+# интервал опроса (сек), число попыток и аренда забранных операций (сек)
+CALENDAR_SYNC_BATCH_SIZE = int(os.getenv('CALENDAR_SYNC_BATCH_SIZE', 50))
+CALENDAR_SYNC_INTERVAL = float(os.getenv('CALENDAR_SYNC_INTERVAL', 5))
+CALENDAR_SYNC_MAX_ATTEMPTS = int(os.getenv('CALENDAR_SYNC_MAX_ATTEMPTS', 8))
+CALENDAR_SYNC_LEASE_SECONDS = int(os.getenv('CALENDAR_SYNC_LEASE_SECONDS', 120))
+# Локальная копия календаря: интервал инкрементальной синхронизации и
+# максимальный возраст данных при просмотре календаря (сек)
+CALENDAR_MIRROR_INTERVAL = float(os.getenv('CALENDAR_MIRROR_INTERVAL', 60))
+CALENDAR_MIRROR_MAX_STALENESS = float(os.getenv('CALENDAR_MIRROR_MAX_STALENESS', 300))
+# Горизонт копии (дней вперед): повторяющиеся события разворачиваются только
+# до него, должен быть больше периода просмотра календаря (7 дней)
+CALENDAR_MIRROR_HORIZON_DAYS = int(os.getenv('CALENDAR_MIRROR_HORIZON_DAYS', 30))
 
 # Redis
 REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
 REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
 REDIS_DB = int(os.getenv('REDIS_DB', 0))
 
+# Очередь напоминаний: redis (общая для всех реплик) или memory (колесо таймеров в памяти процесса)
+REMINDER_BACKEND = os.getenv('REMINDER_BACKEND', 'redis')
+# Напоминания: задержка повторной попытки после ошибки отправки (сек)
+REMINDER_RETRY_DELAY = int(os.getenv('REMINDER_RETRY_DELAY', 60))
+# Аренда забранных напоминаний: если воркер не подтвердил отправку за это время, напоминание возвращается в очередь
+REMINDER_LEASE_SECONDS = int(os.getenv('REMINDER_LEASE_SECONDS', 60))
+# Уникальный id экземпляра бота (для нескольких реплик)
+REMINDER_WORKER_ID = os.getenv('REMINDER_WORKER_ID', f"{socket.gethostname()}:{os.getpid()}")
+# Восстановление очереди напоминаний из SQLite: интервал сверки (сек) и размер пачки
+REMINDER_REHYDRATE_INTERVAL = float(os.getenv('REMINDER_REHYDRATE_INTERVAL', 300))
+REMINDER_REHYDRATE_BATCH_SIZE = int(os.getenv('REMINDER_REHYDRATE_BATCH_SIZE', 1000))
+
+# Хранилище состояний FSM: redis (общий пул с очередью напоминаний) или memory
+FSM_STORAGE = os.getenv('FSM_STORAGE', 'redis')
+FSM_KEY_PREFIX = os.getenv('FSM_KEY_PREFIX', 'fsm')
+# Время жизни незавершенного диалога создания/редактирования задачи (сек)
+FSM_STATE_TTL = int(os.getenv('FSM_STATE_TTL', 24 * 60 * 60))
+
+# Очередь отправки сообщений Telegram
+TELEGRAM_SEND_RATE = float(os.getenv('TELEGRAM_SEND_RATE', 30))
+TELEGRAM_PER_CHAT_INTERVAL = float(os.getenv('TELEGRAM_PER_CHAT_INTERVAL', 1))
+TELEGRAM_SEND_WORKERS = int(os.getenv('TELEGRAM_SEND_WORKERS', 8))
+TELEGRAM_SEND_QUEUE_SIZE = int(os.getenv('TELEGRAM_SEND_QUEUE_SIZE', 10000))
+# Сколько неотправленных сообщений может ждать один чат (остальные ждут в send)
+TELEGRAM_CHAT_BACKLOG = int(os.getenv('TELEGRAM_CHAT_BACKLOG', 20))
+
 # SQLite Database
 DATABASE_PATH = os.getenv('DATABASE_PATH', BASE_DIR / 'tasks.db')
+# Количество read-only подключений (0 - одно общее подключение без WAL)
+DATABASE_READ_POOL_SIZE = int(os.getenv('DATABASE_READ_POOL_SIZE', 4))
+# Групповой коммит: окно ожидания (мс) и максимальный размер пачки записей
+DATABASE_COMMIT_WINDOW_MS = float(os.getenv('DATABASE_COMMIT_WINDOW_MS', 5))
+DATABASE_COMMIT_BATCH_SIZE = int(os.getenv('DATABASE_COMMIT_BATCH_SIZE', 100))
+
+# Статистика из таблицы счетчиков (true) или агрегирующим запросом по задачам (false)
+TASK_STATS_COUNTERS = os.getenv('TASK_STATS_COUNTERS', 'true').lower() == 'true'
+
+# Кэш задач пользователя: memory, redis или none
+TASK_CACHE_BACKEND = os.getenv('TASK_CACHE_BACKEND', 'memory')
+TASK_CACHE_TTL = float(os.getenv('TASK_CACHE_TTL', 60))
+# Ограничения кэша в памяти: число записей и суммарный размер значений (байт)
+TASK_CACHE_MAX_ENTRIES = int(os.getenv('TASK_CACHE_MAX_ENTRIES', 10000))
+TASK_CACHE_MAX_BYTES = int(os.getenv('TASK_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+# Импорт и экспорт задач: размер пачки, максимум задач и размер файла импорта (байт)
+TASK_TRANSFER_BATCH_SIZE = int(os.getenv('TASK_TRANSFER_BATCH_SIZE', 1000))
+IMPORT_MAX_TASKS = int(os.getenv('IMPORT_MAX_TASKS', 100000))
+IMPORT_MAX_FILE_SIZE = int(os.getenv('IMPORT_MAX_FILE_SIZE', 20 * 1024 * 1024))
 
 # Timezone
 TIMEZONE = os.getenv('TIMEZONE', 'Europe/Kiev')
@@ -0,0 +1,244 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Optional, Callable, Awaitable, Any
+from config.settings import TASK_CACHE_TTL, TASK_CACHE_MAX_ENTRIES, TASK_CACHE_MAX_BYTES
+from models.task import Task, TaskSummary, TaskPage
+
+# Поле hash пользователя в Redis с номером поколения его записей
+GENERATION_FIELD = '__gen__'
+
+# Сохранение записи, только если поколение не менялось с начала загрузки
+SET_IF_GENERATION = '''
+local generation = redis.call('HGET', KEYS[1], ARGV[1]) or ''
+if generation ~= ARGV[2] then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[3], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return 1
+'''
+
+# Удаление записей пользователя с увеличением поколения
+INVALIDATE = '''
+local generation = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0') + 1
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], ARGV[1], generation)
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return generation
+'''
+
+
+def _encode(value: Any):
+    """Сериализация моделей для хранения в кэше"""
+    if isinstance(value, Task):
+        return {'__task__': value.to_dict()}
+    if isinstance(value, TaskSummary):
+        return {'__summary__': value.to_dict()}
+    if isinstance(value, TaskPage):
+        return {'__page__': {'tasks': value.tasks, 'has_prev': value.has_prev, 'has_next': value.has_next}}
+    raise TypeError(f"Тип {type(value).__name__} не поддерживается кэшем")
+
+
+def _decode(obj: dict):
+    """Восстановление моделей из кэша"""
+    if '__task__' in obj:
+        return Task.from_row(obj['__task__'])
+    if '__summary__' in obj:
+        return TaskSummary.from_row(obj['__summary__'])
+    if '__page__' in obj:
+        return TaskPage(**obj['__page__'])
+    return obj
+
+
+def dumps(value: Any) -> str:
+    """Значение -> строка для кэша"""
+    return json.dumps(value, default=_encode)
+
+
+def loads(data: str) -> Any:
+    """Строка из кэша -> значение"""
+    return json.loads(data, object_hook=_decode)
+
+
+class LRUCacheBackend:
+    """
+    Кэш в памяти процесса
+    
+    Вытесняет давно неиспользуемые записи при превышении max_entries
+    или max_bytes (по размеру сериализованных значений), записи
+    устаревают через ttl секунд
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = TASK_CACHE_MAX_ENTRIES,
+        max_bytes: int = TASK_CACHE_MAX_BYTES,
+        ttl: float = TASK_CACHE_TTL
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple, tuple[str, float]] = OrderedDict()
+        self._user_keys: dict[int, set] = {}
+        self._generations: dict[int, int] = {}
+        self.bytes = 0
+        self.evictions = 0
+    
+    async def get(self, user_id: int, key: str) -> Optional[str]:
+        """Получение значения"""
+        entry = self._entries.get((user_id, key))
+        if entry is None:
+            return None
+        
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            self._remove((user_id, key))
+            return None
+        
+        self._entries.move_to_end((user_id, key))
+        return value
+    
+    async def generation(self, user_id: int) -> int:
+        """Поколение записей пользователя (меняется при каждой инвалидации)"""
+        return self._generations.get(user_id, 0)
+    
+    async def set(self, user_id: int, key: str, value: str, generation: int):
+        """Сохранение значения, если с чтения generation записи не инвалидировались"""
+        if self._generations.get(user_id, 0) != generation:
+            return
+        
+        entry_key = (user_id, key)
+        if entry_key in self._entries:
+            self._remove(entry_key)
+        
+        self._entries[entry_key] = (value, time.monotonic() + self.ttl)
+        self._user_keys.setdefault(user_id, set()).add(key)
+        self.bytes += len(value)
+        
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+    
+    async def invalidate(self, user_id: int):
+        """Удаление всех записей пользователя"""
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+        for key in self._user_keys.pop(user_id, set()):
+            entry = self._entries.pop((user_id, key), None)
+            if entry:
+                self.bytes -= len(entry[0])
+    
+    def _remove(self, entry_key: tuple):
+        """Удаление одной записи"""
+        value, _ = self._entries.pop(entry_key)
+        self.bytes -= len(value)
+        
+        user_id, key = entry_key
+        keys = self._user_keys.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[user_id]
+    
+    def get_stats(self) -> dict:
+        """Метрики размера кэша"""
+        return {'entries': len(self._entries), 'bytes': self.bytes, 'evictions': self.evictions}
+
+
+class RedisCacheBackend:
+    """
+    Кэш в Redis, общий для всех реплик
+    
+    Записи пользователя лежат в одном hash, поэтому инвалидация - один
+    вызов скрипта. В том же hash хранится поколение записей: запись
+    сохраняется скриптом, только если поколение не изменилось за время
+    загрузки. Срок жизни хранится в самой записи, память ограничивается
+    политикой maxmemory Redis.
+    """
+    
+    # Версия в префиксе меняется вместе с набором полей Task.to_dict
+    def __init__(self, redis, ttl: float = TASK_CACHE_TTL, prefix: str = 'taskcache:v2:'):
+        self.redis = redis
+        self.ttl = ttl
+        self.prefix = prefix
+        self._set_if_generation = redis.register_script(SET_IF_GENERATION)
+        self._invalidate = redis.register_script(INVALIDATE)
+    
+    async def get(self, user_id: int, key: str) -> Optional[str]:
+        """Получение значения"""
+        entry = await self.redis.hget(self.prefix + str(user_id), key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry.split('|', 1)
+        if float(expires_at) < time.time():
+            return None
+        return value
+    
+    async def generation(self, user_id: int) -> str:
+        """Поколение записей пользователя (меняется при каждой инвалидации)"""
+        return await self.redis.hget(self.prefix + str(user_id), GENERATION_FIELD) or ''
+    
+    async def set(self, user_id: int, key: str, value: str, generation: str):
+        """Сохранение значения, если с чтения generation записи не инвалидировались"""
+        await self._set_if_generation(
+            keys=[self.prefix + str(user_id)],
+            args=[GENERATION_FIELD, generation, key, f"{time.time() + self.ttl}|{value}", int(self.ttl) + 1],
+        )
+    
+    async def invalidate(self, user_id: int):
+        """Удаление всех записей пользователя"""
+        await self._invalidate(keys=[self.prefix + str(user_id)], args=[GENERATION_FIELD, int(self.ttl) + 1])
+    
+    def get_stats(self) -> dict:
+        """Метрики размера кэша (размером управляет Redis)"""
+        return {}
+
+
+class TaskCache:
+    """
+    Read-through кэш задач пользователя перед TaskRepository
+    
+    Без backend работает как прямой вызов загрузчика.
+    """
+    
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+    
+    async def get_or_load(self, user_id: int, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Значение из кэша или из загрузчика с сохранением в кэш"""
+        if self.backend is None:
+            return await loader()
+        
+        cached = await self.backend.get(user_id, key)
+        if cached is not None:
+            self.hits += 1
+            return loads(cached)
+        
+        # Инвалидация во время загрузки меняет поколение, и устаревший
+        # результат загрузчика не попадет в кэш
+        self.misses += 1
+        generation = await self.backend.generation(user_id)
+        value = await loader()
+        await self.backend.set(user_id, key, dumps(value), generation)
+        return value
+    
+    async def invalidate(self, user_id: int):
+        """Инвалидация всех записей пользователя"""
+        if self.backend is not None:
+            await self.backend.invalidate(user_id)
+    
+    def get_stats(self) -> dict:
+        """Метрики кэша"""
+        return {
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            **(self.backend.get_stats() if self.backend else {}),
+        }
+
+
+# Глобальный экземпляр кэша (backend настраивается при запуске бота)
+task_cache = TaskCache()
@@ -1,24 +1,180 @@
+import asyncio
+import threading
+import time
 import aiosqlite
-from config.settings import DATABASE_PATH
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Awaitable, AsyncIterator, Iterable
+from config.settings import (
+    DATABASE_PATH, DATABASE_READ_POOL_SIZE,
+    DATABASE_COMMIT_WINDOW_MS, DATABASE_COMMIT_BATCH_SIZE
+)
+from db.migrations import apply_migrations
+
+# База данных, явная транзакция которой открыта в текущем контексте
+_current_transaction: ContextVar['Database | None'] = ContextVar('current_transaction', default=None)
+
+
+@dataclass
+class PoolStats:
+    """Метрики ожидания подключений"""
+    checkouts: int = 0
+    waits: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    
+    def record(self, wait: float, waited: bool):
+        """Учет одного получения подключения"""
+        self.checkouts += 1
+        if waited:
+            self.waits += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+    
+    @property
+    def avg_wait(self) -> float:
+        """Среднее время ожидания в секундах"""
+        return self.total_wait / self.checkouts if self.checkouts else 0.0
+    
+    def to_dict(self) -> dict:
+        """Конвертация метрик в словарь"""
+        return {
+            'checkouts': self.checkouts,
+            'waits': self.waits,
+            'total_wait': self.total_wait,
+            'avg_wait': self.avg_wait,
+            'max_wait': self.max_wait,
+        }
 
 
 class Database:
-    """Класс для управления подключением к SQLite базе данных"""
+    """
+    Класс для управления подключением к SQLite базе данных
+    
+    При read_pool_size > 0 база переводится в режим WAL: все записи идут
+    через одно подключение-писатель, а fetchone/fetchall параллельно
+    выполняются на пуле read-only подключений
+    
+    Записи от параллельных корутин объединяются в общие транзакции:
+    запись, за которой в очереди писателя никого нет, коммитится сразу
+    (вместе с отложенными до нее), иначе коммит откладывается до
+    следующей записи, не дольше commit_window_ms и не больше
+    commit_batch_size записей. execute возвращает управление только
+    после коммита своей записи
+    """
     
-    def __init__(self, db_path: str = DATABASE_PATH):
+    def __init__(
+        self,
+        db_path: str = DATABASE_PATH,
+        read_pool_size: int = DATABASE_READ_POOL_SIZE,
+        commit_window_ms: float = DATABASE_COMMIT_WINDOW_MS,
+        commit_batch_size: int = DATABASE_COMMIT_BATCH_SIZE
+    ):
         self.db_path = db_path
+        self.read_pool_size = read_pool_size
+        self.commit_window = commit_window_ms / 1000
+        self.commit_batch_size = commit_batch_size
         self.connection: aiosqlite.Connection | None = None
+        self._readers: asyncio.Queue | None = None
+        self._reader_connections: list[aiosqlite.Connection] = []
+        self._write_lock = asyncio.Lock()
+        self._connect_lock = asyncio.Lock()
+        self._pending_commits: list[asyncio.Future] = []
+        self._waiting_writers = 0
+        self._flush_task: asyncio.Task | None = None
+        self._after_commit: list[Callable[[], Awaitable]] = []
+        self.read_stats = PoolStats()
+        self.write_stats = PoolStats()
+    
+    @property
+    def is_connected(self) -> bool:
+        """Открыто ли подключение"""
+        return self.connection is not None
     
     async def connect(self):
-        """Установка подключения к базе данных"""
-        self.connection = await aiosqlite.connect(self.db_path)
-        self.connection.row_factory = aiosqlite.Row
-        await self.create_tables()
+        """
+        Установка подключения к базе данных
+        
+        Повторный вызов при открытом подключении ничего не делает,
+        поэтому подключение и его потоки не дублируются
+        """
+        async with self._connect_lock:
+            if self.is_connected:
+                return
+            
+            connection = await aiosqlite.connect(self.db_path)
+            connection.row_factory = aiosqlite.Row
+            self.connection = connection
+            
+            if self.read_pool_size > 0:
+                await self.connection.execute('PRAGMA journal_mode=WAL')
+            
+            await self.create_tables()
+            await apply_migrations(self.connection)
+            
+            if self.read_pool_size > 0:
+                await self._open_readers()
+    
+    async def _open_readers(self):
+        """Открытие пула read-only подключений"""
+        uri = Path(self.db_path).resolve().as_uri() + '?mode=ro'
+        self._readers = asyncio.Queue()
+        
+        for _ in range(self.read_pool_size):
+            reader = await aiosqlite.connect(uri, uri=True)
+            reader.row_factory = aiosqlite.Row
+            self._reader_connections.append(reader)
+            self._readers.put_nowait(reader)
     
     async def disconnect(self):
         """Закрытие подключения к базе данных"""
+        if self.connection:
+            async with self._write_lock:
+                await self._commit_pending()
+                # Под блокировкой таймер не может быть внутри коммита
+                if self._flush_task:
+                    self._flush_task.cancel()
+                    self._flush_task = None
+        
+        for reader in self._reader_connections:
+            await reader.close()
+        self._reader_connections = []
+        self._readers = None
+        
         if self.connection:
             await self.connection.close()
+            self.connection = None
+    
+    @asynccontextmanager
+    async def _reader(self):
+        """Получение подключения для чтения из пула"""
+        # Внутри явной транзакции читаем через писателя, чтобы видеть свои изменения
+        if self._readers is None or _current_transaction.get() is self:
+            yield self.connection
+            return
+        
+        waited = self._readers.empty()
+        started = time.perf_counter()
+        reader = await self._readers.get()
+        self.read_stats.record(time.perf_counter() - started, waited)
+        try:
+            yield reader
+        finally:
+            self._readers.put_nowait(reader)
+    
+    def get_pool_stats(self) -> dict:
+        """Метрики ожидания подключений для чтения и записи"""
+        return {
+            'read_pool_size': self.read_pool_size,
+            'readers_available': self._readers.qsize() if self._readers else 0,
+            # Каждое подключение aiosqlite держит свой поток
+            'open_connections': int(self.is_connected) + len(self._reader_connections),
+            'threads': threading.active_count(),
+            'read': self.read_stats.to_dict(),
+            'write': self.write_stats.to_dict(),
+        }
     
     async def create_tables(self):
         """Создание таблиц базы данных"""
@@ -67,20 +223,168 @@ class Database:
     
     async def execute(self, query: str, params: tuple = ()):
         """Выполнение SQL запроса"""
-        cursor = await self.connection.execute(query, params)
-        await self.connection.commit()
+        if _current_transaction.get() is self:
+            return await self.connection.execute(query, params)
+        
+        async with self._writer():
+            cursor = await self.connection.execute(query, params)
+            
+            committed = asyncio.get_running_loop().create_future()
+            self._pending_commits.append(committed)
+            
+            # Следующая запись в очереди закоммитит и эту; одиночная запись не ждет окна
+            if (
+                not self._waiting_writers
+                or len(self._pending_commits) >= self.commit_batch_size
+                or self.commit_window <= 0
+            ):
+                await self._commit_pending()
+            elif self._flush_task is None:
+                self._flush_task = asyncio.create_task(self._flush_later())
+        
+        # Ждем, пока запись станет долговечной
+        await committed
         return cursor
     
+    async def executemany(self, query: str, params_seq: Iterable[tuple]):
+        """
+        Выполнение запроса для набора параметров одним вызовом
+        
+        Вне явной транзакции открывает собственную
+        """
+        if _current_transaction.get() is not self:
+            async with self.transaction():
+                return await self.connection.executemany(query, params_seq)
+        
+        return await self.connection.executemany(query, params_seq)
+    
+    @asynccontextmanager
+    async def _writer(self):
+        """Блокировка писателя с учетом ожидающих ее записей"""
+        waited = self._write_lock.locked()
+        started = time.perf_counter()
+        self._waiting_writers += 1
+        try:
+            await self._write_lock.acquire()
+        finally:
+            self._waiting_writers -= 1
+        
+        self.write_stats.record(time.perf_counter() - started, waited)
+        try:
+            yield
+        finally:
+            self._write_lock.release()
+    
+    async def _flush_later(self):
+        """Коммит накопленных записей по истечении окна (если их не закоммитила следующая запись)"""
+        await asyncio.sleep(self.commit_window)
+        async with self._write_lock:
+            self._flush_task = None
+            await self._commit_pending()
+    
+    async def _commit_pending(self):
+        """Коммит накопленных записей (вызывается под блокировкой писателя)"""
+        pending, self._pending_commits = self._pending_commits, []
+        if not pending:
+            return
+        
+        try:
+            await self.connection.commit()
+        except Exception as e:
+            await self.connection.rollback()
+            for future in pending:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future in pending:
+                if not future.done():
+                    future.set_result(None)
+        finally:
+            # Коммит прерван отменой: ожидающие записи не должны зависнуть
+            for future in pending:
+                if not future.done():
+                    future.set_exception(RuntimeError("Коммит записи прерван"))
+    
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Явная транзакция для нескольких запросов
+        
+        Пример:
+            async with db.transaction():
+                task = await TaskRepository.create(task)
+                await TaskRepository.set_google_event_id(task.id, user_id, event_id)
+        
+        Все execute внутри блока выполняются атомарно; при исключении
+        изменения откатываются. Вложенные блоки присоединяются к внешнему.
+        """
+        if _current_transaction.get() is self:
+            yield self
+            return
+        
+        async with self._writer():
+            await self._commit_pending()
+            
+            token = _current_transaction.set(self)
+            try:
+                await self.connection.execute('BEGIN')
+                yield self
+                await self.connection.commit()
+            except BaseException:
+                await self.connection.rollback()
+                raise
+            finally:
+                _current_transaction.reset(token)
+                callbacks, self._after_commit = self._after_commit, []
+        
+        for callback in callbacks:
+            await callback()
+    
+    def in_transaction(self) -> bool:
+        """Открыта ли явная транзакция в текущем контексте"""
+        return _current_transaction.get() is self
+    
+    def after_commit(self, callback: Callable[[], Awaitable]):
+        """
+        Вызов callback после коммита текущей явной транзакции
+        
+        Вне транзакции ничего не делает: запись уже закоммичена
+        к моменту возврата из execute. При откате callback не вызывается.
+        """
+        if self.in_transaction():
+            self._after_commit.append(callback)
+    
     async def fetchone(self, query: str, params: tuple = ()):
         """Получение одной строки результата"""
-        cursor = await self.connection.execute(query, params)
-        return await cursor.fetchone()
+        async with self._reader() as connection:
+            cursor = await connection.execute(query, params)
+            return await cursor.fetchone()
+    
+    async def iterate(self, query: str, params: tuple = (), batch_size: int = 500) -> AsyncIterator[list]:
+        """
+        Потоковое чтение результата пачками по batch_size строк
+        
+        Курсор держит подключение для чтения до конца выборки, поэтому
+        в памяти находится только текущая пачка
+        """
+        async with self._reader() as connection:
+            cursor = await connection.execute(query, params)
+            try:
+                while True:
+                    rows = await cursor.fetchmany(batch_size)
+                    if not rows:
+                        return
+                    yield rows
+            finally:
+                await cursor.close()
     
     async def fetchall(self, query: str, params: tuple = ()):
         """Получение всех строк результата"""
-        cursor = await self.connection.execute(query, params)
-        return await cursor.fetchall()
+        async with self._reader() as connection:
+            cursor = await connection.execute(query, params)
+            return await cursor.fetchall()
 
 
-# Глобальный экземпляр базы данных
+# Глобальный экземпляр базы данных: подключается один раз в on_startup,
+# репозитории и хендлеры используют его напрямую
 db = Database()
@@ -0,0 +1,308 @@
+import logging
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+# Заполнение полнотекстового индекса из таблицы задач
+# (используется миграцией и TaskRepository.rebuild_search_index)
+REBUILD_SEARCH_INDEX = [
+    "INSERT INTO tasks_fts (tasks_fts) VALUES ('delete-all')",
+    '''
+    INSERT INTO tasks_fts (rowid, title, description, owner)
+    SELECT id, title, description, 'u' || user_id FROM tasks
+    ''',
+]
+
+
+# Упорядоченный список миграций: (версия, описание, SQL-запросы)
+# Новые миграции добавляются только в конец списка с увеличенной версией
+MIGRATIONS = [
+    (
+        1,
+        "Индексы для выборок задач и напоминаний",
+        [
+            # TaskRepository.get_all (с фильтром по статусу и без него)
+            '''
+            CREATE INDEX IF NOT EXISTS idx_tasks_user_status_due
+            ON tasks (user_id, status, due_date)
+            ''',
+            # TaskRepository.get_overdue / get_upcoming
+            '''
+            CREATE INDEX IF NOT EXISTS idx_tasks_user_due
+            ON tasks (user_id, due_date)
+            ''',
+            # ReminderRepository.get_pending: частичный индекс только по неотправленным
+            '''
+            CREATE INDEX IF NOT EXISTS idx_reminders_pending
+            ON reminders (reminder_time) WHERE is_sent = 0
+            ''',
+        ],
+    ),
+    (
+        2,
+        "Индекс и состояние для сканирования просроченных задач",
+        [
+            # TaskRepository.get_newly_overdue: окно по due_date среди незавершенных задач
+            '''
+            CREATE INDEX IF NOT EXISTS idx_tasks_open_due
+            ON tasks (due_date) WHERE status NOT IN ('completed', 'cancelled')
+            ''',
+            # Сохраняемые позиции фоновых задач (high-water mark)
+            '''
+            CREATE TABLE IF NOT EXISTS job_state (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+        ],
+    ),
+    (
+        3,
+        "Счетчики задач пользователя для статистики",
+        [
+            '''
+            CREATE TABLE IF NOT EXISTS task_counters (
+                user_id INTEGER PRIMARY KEY,
+                total INTEGER NOT NULL DEFAULT 0,
+                pending INTEGER NOT NULL DEFAULT 0,
+                completed INTEGER NOT NULL DEFAULT 0
+            )
+            ''',
+            '''
+            INSERT OR REPLACE INTO task_counters (user_id, total, pending, completed)
+            SELECT user_id, COUNT(*), SUM(status = 'pending'), SUM(status = 'completed')
+            FROM tasks GROUP BY user_id
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_task_counters_insert AFTER INSERT ON tasks
+            BEGIN
+                INSERT INTO task_counters (user_id, total, pending, completed)
+                VALUES (NEW.user_id, 1, NEW.status = 'pending', NEW.status = 'completed')
+                ON CONFLICT (user_id) DO UPDATE SET
+                    total = total + 1,
+                    pending = pending + (NEW.status = 'pending'),
+                    completed = completed + (NEW.status = 'completed');
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_task_counters_delete AFTER DELETE ON tasks
+            BEGIN
+                UPDATE task_counters SET
+                    total = total - 1,
+                    pending = pending - (OLD.status = 'pending'),
+                    completed = completed - (OLD.status = 'completed')
+                WHERE user_id = OLD.user_id;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_task_counters_update AFTER UPDATE OF status, user_id ON tasks
+            BEGIN
+                UPDATE task_counters SET
+                    total = total - 1,
+                    pending = pending - (OLD.status = 'pending'),
+                    completed = completed - (OLD.status = 'completed')
+                WHERE user_id = OLD.user_id;
+                INSERT INTO task_counters (user_id, total, pending, completed)
+                VALUES (NEW.user_id, 1, NEW.status = 'pending', NEW.status = 'completed')
+                ON CONFLICT (user_id) DO UPDATE SET
+                    total = total + 1,
+                    pending = pending + (NEW.status = 'pending'),
+                    completed = completed + (NEW.status = 'completed');
+            END
+            ''',
+        ],
+    ),
+    (
+        4,
+        "Полнотекстовый поиск по задачам (FTS5)",
+        [
+            # owner - токен владельца (u<user_id>), чтобы поиск шел только по задачам пользователя
+            '''
+            CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+                title, description, owner,
+                content='', tokenize='unicode61'
+            )
+            ''',
+            *REBUILD_SEARCH_INDEX,
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_insert AFTER INSERT ON tasks
+            BEGIN
+                INSERT INTO tasks_fts (rowid, title, description, owner)
+                VALUES (NEW.id, NEW.title, NEW.description, 'u' || NEW.user_id);
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_delete AFTER DELETE ON tasks
+            BEGIN
+                INSERT INTO tasks_fts (tasks_fts, rowid, title, description, owner)
+                VALUES ('delete', OLD.id, OLD.title, OLD.description, 'u' || OLD.user_id);
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_update AFTER UPDATE OF title, description, user_id ON tasks
+            BEGIN
+                INSERT INTO tasks_fts (tasks_fts, rowid, title, description, owner)
+                VALUES ('delete', OLD.id, OLD.title, OLD.description, 'u' || OLD.user_id);
+                INSERT INTO tasks_fts (rowid, title, description, owner)
+                VALUES (NEW.id, NEW.title, NEW.description, 'u' || NEW.user_id);
+            END
+            ''',
+        ],
+    ),
+    (
+        5,
+        "Покрывающие индексы для кратких списков задач",
+        [
+            # TaskRepository.list_page(projection='summary'): страница читается
+            # только из индекса; префикс (user_id, due_date) заменяет idx_tasks_user_due
+            '''
+            CREATE INDEX IF NOT EXISTS idx_tasks_user_due_summary
+            ON tasks (user_id, due_date, id, title, priority, status)
+            ''',
+            'DROP INDEX IF EXISTS idx_tasks_user_due',
+            # То же для фильтров по статусу
+            '''
+            CREATE INDEX IF NOT EXISTS idx_tasks_user_status_due_summary
+            ON tasks (user_id, status, due_date, id, title, priority)
+            ''',
+            'DROP INDEX IF EXISTS idx_tasks_user_status_due',
+        ],
+    ),
+    (
+        6,
+        "Очередь операций синхронизации с Google Calendar",
+        [
+            # Записывается в одной транзакции с задачей, отправляется фоновым воркером
+            '''
+            CREATE TABLE IF NOT EXISTS calendar_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                operation TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                next_attempt_at TIMESTAMP NOT NULL,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+            '''
+            CREATE INDEX IF NOT EXISTS idx_calendar_outbox_due
+            ON calendar_outbox (next_attempt_at) WHERE status = 'pending'
+            ''',
+            '''
+            CREATE INDEX IF NOT EXISTS idx_calendar_outbox_task
+            ON calendar_outbox (task_id, operation)
+            ''',
+        ],
+    ),
+    (
+        7,
+        "Локальная копия событий Google Calendar",
+        [
+            # start_time/end_time - исходные объекты события (JSON), start_utc - для выборки по периоду
+            '''
+            CREATE TABLE IF NOT EXISTS calendar_events (
+                id TEXT PRIMARY KEY,
+                summary TEXT,
+                description TEXT,
+                start_time TEXT NOT NULL,
+                end_time TEXT,
+                start_utc TEXT NOT NULL,
+                updated TEXT
+            )
+            ''',
+            '''
+            CREATE INDEX IF NOT EXISTS idx_calendar_events_start
+            ON calendar_events (start_utc)
+            ''',
+        ],
+    ),
+    (
+        8,
+        "Повторяющиеся задачи",
+        [
+            # Правило RRULE задачи; due_date хранит ближайшее незавершенное повторение
+            'ALTER TABLE tasks ADD COLUMN recurrence TEXT',
+            # Разворачивание правил в get_upcoming и сканировании просроченных:
+            # индекс содержит только активные правила, а не их повторения
+            '''
+            CREATE INDEX IF NOT EXISTS idx_tasks_recurring
+            ON tasks (user_id, due_date)
+            WHERE recurrence IS NOT NULL AND status NOT IN ('completed', 'cancelled')
+            ''',
+            # ReminderRepository.get_by_task: перенос напоминания на следующее повторение
+            '''
+            CREATE INDEX IF NOT EXISTS idx_reminders_task
+            ON reminders (task_id)
+            ''',
+        ],
+    ),
+    (
+        9,
+        "Индекс повторяющихся задач по дедлайну",
+        [
+            # TaskRepository.iter_recurring: выборка правил всех пользователей по due_date
+            # (idx_tasks_recurring начинается с user_id и для нее не подходит)
+            '''
+            CREATE INDEX IF NOT EXISTS idx_tasks_recurring_due
+            ON tasks (due_date)
+            WHERE recurrence IS NOT NULL AND status NOT IN ('completed', 'cancelled')
+            ''',
+        ],
+    ),
+]
+
+
+async def get_schema_version(connection: aiosqlite.Connection) -> int:
+    """Получение текущей версии схемы"""
+    cursor = await connection.execute('SELECT MAX(version) FROM schema_version')
+    row = await cursor.fetchone()
+    return row[0] or 0
+
+
+async def apply_migrations(connection: aiosqlite.Connection) -> int:
+    """
+    Применение миграций к базе данных
+    
+    Каждая миграция выполняется в отдельной транзакции вместе
+    с записью своей версии в schema_version, поэтому прерванный
+    запуск не оставляет схему в промежуточном состоянии
+    
+    Returns:
+        Версия схемы после применения миграций
+    """
+    await connection.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    await connection.commit()
+    
+    current = await get_schema_version(connection)
+    
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        
+        try:
+            await connection.execute('BEGIN')
+            for statement in statements:
+                await connection.execute(statement)
+            await connection.execute(
+                'INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                (version, description)
+            )
+            await connection.commit()
+        except Exception:
+            await connection.rollback()
+            raise
+        
+        current = version
+        logger.info(f"Применена миграция #{version}: {description}")
+    
+    return current
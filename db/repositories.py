@@ -1,19 +1,72 @@
-from datetime import datetime
-from typing import Optional, List
+import asyncio
+import json
+import re
+from dataclasses import replace
+from datetime import datetime, timedelta
+from itertools import islice
+from functools import partial
+from typing import Optional, List, AsyncIterator, Iterable, Callable, Awaitable, Any
+from config.settings import TASK_STATS_COUNTERS, TIMEZONE
+from db.cache import task_cache
 from db.database import db
-from models.task import Task, User, Reminder
+from db.migrations import REBUILD_SEARCH_INDEX
+from models.recurrence import Recurrence, in_timezone
+from models.task import Task, TaskSummary, User, Reminder, CalendarJob, TaskStats, TaskPage
+
+# Проекции задач: модель строки и выбираемые колонки
+# summary - для списков: без описания и служебных полей, покрывается индексом
+TASK_PROJECTIONS = {
+    'full': (Task, (
+        'id', 'user_id', 'title', 'description', 'priority', 'status', 'due_date',
+        'google_event_id', 'reminder_enabled', 'reminder_time', 'created_at', 'updated_at',
+        'recurrence',
+    )),
+    'summary': (TaskSummary, ('id', 'user_id', 'title', 'priority', 'status', 'due_date')),
+}
+
+TASK_COLUMNS = ', '.join(TASK_PROJECTIONS['full'][1])
+
+INSERT_TASK = '''
+    INSERT INTO tasks (
+        user_id, title, description, priority, status, due_date, reminder_enabled, reminder_time, recurrence
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def task_projection(projection: str, table: str = '') -> tuple[type, str]:
+    """Модель и список колонок SELECT для проекции (table - префикс колонок)"""
+    model, columns = TASK_PROJECTIONS[projection]
+    prefix = f'{table}.' if table else ''
+    return model, ', '.join(prefix + column for column in columns)
 
 
 class TaskRepository:
-    """Репозиторий для работы с задачами"""
+    """
+    Репозиторий для работы с задачами
+    
+    Выборки задач одного пользователя читаются через task_cache,
+    изменения задачи сбрасывают кэш ее владельца. Списочные методы
+    принимают projection ('full' или 'summary', см. TASK_PROJECTIONS)
+    """
     
     @staticmethod
-    async def create(task: Task) -> Task:
-        """Создание новой задачи"""
-        cursor = await db.execute('''
-            INSERT INTO tasks (user_id, title, description, priority, status, due_date, reminder_enabled, reminder_time)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+    async def _cached(user_id: int, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Чтение через кэш (внутри транзакции - мимо кэша, данные еще не закоммичены)"""
+        if db.in_transaction():
+            return await loader()
+        return await task_cache.get_or_load(user_id, key, loader)
+    
+    @staticmethod
+    async def _invalidate(user_id: int):
+        """Сброс кэша пользователя (повторно - после коммита явной транзакции)"""
+        await task_cache.invalidate(user_id)
+        db.after_commit(partial(task_cache.invalidate, user_id))
+    
+    @staticmethod
+    def _insert_params(task: Task) -> tuple:
+        """Параметры INSERT_TASK для задачи"""
+        return (
             task.user_id,
             task.title,
             task.description,
@@ -22,35 +75,243 @@ class TaskRepository:
             task.due_date.isoformat() if task.due_date else None,
             task.reminder_enabled,
             task.reminder_time.isoformat() if task.reminder_time else None,
-        ))
+            task.recurrence,
+        )
+    
+    @staticmethod
+    async def create(task: Task) -> Task:
+        """Создание новой задачи"""
+        cursor = await db.execute(INSERT_TASK, TaskRepository._insert_params(task))
         
         task.id = cursor.lastrowid
+        await TaskRepository._invalidate(task.user_id)
         return task
     
+    @staticmethod
+    async def bulk_create(tasks: Iterable[Task], batch_size: int = 1000) -> int:
+        """
+        Массовое создание задач
+        
+        Задачи вставляются пачками через executemany, каждая пачка -
+        отдельная транзакция: между пачками блокировка записи отпускается
+        и другие запросы успевают выполниться. tasks может быть
+        генератором, в памяти держится только текущая пачка.
+        ID созданных задач не заполняются.
+        
+        Returns:
+            Количество созданных задач
+        """
+        tasks = iter(tasks)
+        created = 0
+        
+        while batch := list(islice(tasks, batch_size)):
+            async with db.transaction():
+                await db.executemany(INSERT_TASK, [TaskRepository._insert_params(task) for task in batch])
+                for user_id in {task.user_id for task in batch}:
+                    await TaskRepository._invalidate(user_id)
+            
+            created += len(batch)
+            await asyncio.sleep(0)
+        
+        return created
+    
+    @staticmethod
+    async def iter_all(user_id: int, batch_size: int = 500) -> AsyncIterator[List[Task]]:
+        """Потоковая выборка всех задач пользователя пачками (для экспорта)"""
+        async for rows in db.iterate(f'''
+            SELECT {TASK_COLUMNS} FROM tasks WHERE user_id = ?
+            ORDER BY id ASC
+        ''', (user_id,), batch_size):
+            yield Task.from_rows(rows)
+    
     @staticmethod
     async def get_by_id(task_id: int, user_id: int) -> Optional[Task]:
         """Получение задачи по ID"""
-        row = await db.fetchone('''
-            SELECT * FROM tasks WHERE id = ? AND user_id = ?
-        ''', (task_id, user_id))
+        async def load() -> Optional[Task]:
+            row = await db.fetchone(f'''
+                SELECT {TASK_COLUMNS} FROM tasks WHERE id = ? AND user_id = ?
+            ''', (task_id, user_id))
+            
+            return Task.from_row(row) if row else None
         
-        return Task.from_row(row) if row else None
+        return await TaskRepository._cached(user_id, f'task:{task_id}', load)
     
     @staticmethod
-    async def get_all(user_id: int, status: Optional[str] = None) -> List[Task]:
+    async def get_all(user_id: int, status: Optional[str] = None, projection: str = 'full') -> List[Task]:
         """Получение всех задач пользователя"""
-        if status:
-            rows = await db.fetchall('''
-                SELECT * FROM tasks WHERE user_id = ? AND status = ?
-                ORDER BY due_date ASC, created_at DESC
-            ''', (user_id, status))
-        else:
-            rows = await db.fetchall('''
-                SELECT * FROM tasks WHERE user_id = ?
-                ORDER BY due_date ASC, created_at DESC
+        model, columns = task_projection(projection)
+        
+        async def load() -> List[Task]:
+            if status:
+                rows = await db.fetchall(f'''
+                    SELECT {columns} FROM tasks WHERE user_id = ? AND status = ?
+                    ORDER BY due_date ASC, created_at DESC
+                ''', (user_id, status))
+            else:
+                rows = await db.fetchall(f'''
+                    SELECT {columns} FROM tasks WHERE user_id = ?
+                    ORDER BY due_date ASC, created_at DESC
+                ''', (user_id,))
+            
+            return model.from_rows(rows)
+        
+        return await TaskRepository._cached(user_id, f'all:{status or ""}:{projection}', load)
+    
+    @staticmethod
+    def _filter_clause(user_id: int, filter_type: str) -> tuple[str, list]:
+        """Условие WHERE для фильтра списка задач"""
+        if filter_type in ('pending', 'completed'):
+            return 'user_id = ? AND status = ?', [user_id, filter_type]
+        if filter_type == 'overdue':
+            return (
+                "user_id = ? AND due_date < ? AND status NOT IN ('completed', 'cancelled')",
+                [user_id, datetime.now().isoformat()]
+            )
+        return 'user_id = ?', [user_id]
+    
+    @staticmethod
+    async def list_page(
+        user_id: int,
+        filter_type: str = 'all',
+        cursor: Optional[int] = None,
+        limit: int = 10,
+        backward: bool = False,
+        projection: str = 'full'
+    ) -> TaskPage:
+        """
+        Страница списка задач с keyset-пагинацией по (due_date, id)
+        
+        cursor - id последней задачи предыдущей страницы (или первой
+        задачи следующей при backward=True). Задачи без дедлайна идут
+        первыми. Стоимость запроса зависит только от размера страницы.
+        Фильтр overdue зависит от текущего времени и не кэшируется.
+        """
+        load = partial(TaskRepository._load_page, user_id, filter_type, cursor, limit, backward, projection)
+        if filter_type == 'overdue':
+            return await load()
+        
+        return await TaskRepository._cached(
+            user_id, f'page:{filter_type}:{cursor}:{limit}:{int(backward)}:{projection}', load
+        )
+    
+    @staticmethod
+    async def _load_page(
+        user_id: int,
+        filter_type: str,
+        cursor: Optional[int],
+        limit: int,
+        backward: bool,
+        projection: str
+    ) -> TaskPage:
+        """Выборка страницы списка задач из базы"""
+        model, columns = task_projection(projection)
+        where, params = TaskRepository._filter_clause(user_id, filter_type)
+        
+        # Части выборки в порядке страницы. Задачи без дедлайна и с дедлайном
+        # читаются отдельными запросами: сравнение строк (due_date, id) дает
+        # диапазон по индексу (user_id, due_date, id), а OR с IS NULL - нет
+        segments = [('', [])]
+        if cursor is not None:
+            row = await db.fetchone('''
+                SELECT due_date FROM tasks WHERE id = ? AND user_id = ?
+            ''', (cursor, user_id))
+            
+            if row:
+                due_date = row['due_date']
+                if due_date is None and not backward:
+                    segments = [(' AND due_date IS NULL AND id > ?', [cursor]), (' AND due_date IS NOT NULL', [])]
+                elif due_date is None:
+                    segments = [(' AND due_date IS NULL AND id < ?', [cursor])]
+                elif not backward:
+                    segments = [(' AND (due_date, id) > (?, ?)', [due_date, cursor])]
+                else:
+                    segments = [(' AND (due_date, id) < (?, ?)', [due_date, cursor]), (' AND due_date IS NULL', [])]
+            else:
+                cursor = None
+        
+        order = 'DESC' if backward else 'ASC'
+        rows = []
+        for condition, condition_params in segments:
+            rows += await db.fetchall(f'''
+                SELECT {columns} FROM tasks WHERE {where}{condition}
+                ORDER BY due_date {order}, id {order}
+                LIMIT ?
+            ''', (*params, *condition_params, limit + 1 - len(rows)))
+            if len(rows) > limit:
+                break
+        
+        has_more = len(rows) > limit
+        tasks = model.from_rows(rows[:limit])
+        
+        if backward:
+            tasks.reverse()
+            return TaskPage(tasks=tasks, has_prev=has_more, has_next=True)
+        
+        return TaskPage(tasks=tasks, has_prev=cursor is not None, has_next=has_more)
+    
+    @staticmethod
+    async def count(user_id: int, filter_type: str = 'all') -> int:
+        """Количество задач по фильтру"""
+        if filter_type == 'overdue':
+            return await TaskRepository._load_count(user_id, filter_type)
+        
+        return await TaskRepository._cached(
+            user_id, f'count:{filter_type}', partial(TaskRepository._load_count, user_id, filter_type)
+        )
+    
+    @staticmethod
+    async def _load_count(user_id: int, filter_type: str) -> int:
+        """Подсчет задач по фильтру в базе"""
+        if TASK_STATS_COUNTERS and filter_type in ('all', 'pending', 'completed'):
+            column = 'total' if filter_type == 'all' else filter_type
+            row = await db.fetchone(f'''
+                SELECT {column} FROM task_counters WHERE user_id = ?
             ''', (user_id,))
+            return row[0] if row else 0
+        
+        where, params = TaskRepository._filter_clause(user_id, filter_type)
+        row = await db.fetchone(f'SELECT COUNT(*) FROM tasks WHERE {where}', tuple(params))
+        return row[0]
+    
+    @staticmethod
+    async def search(
+        user_id: int,
+        query: str,
+        limit: int = 10,
+        offset: int = 0,
+        projection: str = 'full'
+    ) -> List[Task]:
+        """
+        Полнотекстовый поиск по названию и описанию задач пользователя
         
-        return [Task.from_row(row) for row in rows]
+        Каждое слово запроса ищется по префиксу, результаты
+        ранжируются по bm25 (совпадения в названии весят больше)
+        """
+        words = re.findall(r'\w+', query)
+        if not words:
+            return []
+        
+        model, columns = task_projection(projection, 'tasks')
+        # Слова ищутся только в тексте задачи: без фильтра колонок префикс
+        # вроде "u" совпадал бы с owner и находил все задачи пользователя
+        terms = ' '.join(f'"{word}"*' for word in words)
+        match = f'owner:u{user_id} AND {{title description}}: ({terms})'
+        rows = await db.fetchall(f'''
+            SELECT {columns} FROM tasks_fts
+            JOIN tasks ON tasks.id = tasks_fts.rowid
+            WHERE tasks_fts MATCH ?
+            ORDER BY bm25(tasks_fts, 10.0, 1.0, 0.0)
+            LIMIT ? OFFSET ?
+        ''', (match, limit, offset))
+        
+        return model.from_rows(rows)
+    
+    @staticmethod
+    async def rebuild_search_index():
+        """Полная перестройка полнотекстового индекса по всем задачам"""
+        async with db.transaction():
+            for statement in REBUILD_SEARCH_INDEX:
+                await db.execute(statement)
     
     @staticmethod
     async def update(task: Task) -> Task:
@@ -58,7 +319,7 @@ class TaskRepository:
         await db.execute('''
             UPDATE tasks 
             SET title = ?, description = ?, priority = ?, status = ?, 
-                due_date = ?, reminder_enabled = ?, reminder_time = ?, updated_at = ?
+                due_date = ?, reminder_enabled = ?, reminder_time = ?, recurrence = ?, updated_at = ?
             WHERE id = ? AND user_id = ?
         ''', (
             task.title,
@@ -68,12 +329,14 @@ class TaskRepository:
             task.due_date.isoformat() if task.due_date else None,
             task.reminder_enabled,
             task.reminder_time.isoformat() if task.reminder_time else None,
+            task.recurrence,
             datetime.now().isoformat(),
             task.id,
             task.user_id,
         ))
         
         task.updated_at = datetime.now()
+        await TaskRepository._invalidate(task.user_id)
         return task
     
     @staticmethod
@@ -83,42 +346,195 @@ class TaskRepository:
             DELETE FROM tasks WHERE id = ? AND user_id = ?
         ''', (task_id, user_id))
         
+        await TaskRepository._invalidate(user_id)
         return cursor.rowcount > 0
     
     @staticmethod
-    async def get_overdue(user_id: int) -> List[Task]:
+    async def get_overdue(user_id: int, projection: str = 'full') -> List[Task]:
         """Получение просроченных задач"""
+        model, columns = task_projection(projection)
         now = datetime.now().isoformat()
-        rows = await db.fetchall('''
-            SELECT * FROM tasks 
+        rows = await db.fetchall(f'''
+            SELECT {columns} FROM tasks 
             WHERE user_id = ? AND due_date < ? AND status NOT IN ('completed', 'cancelled')
             ORDER BY due_date ASC
         ''', (user_id, now))
         
-        return [Task.from_row(row) for row in rows]
+        return model.from_rows(rows)
     
     @staticmethod
-    async def get_upcoming(user_id: int, days: int = 7) -> List[Task]:
-        """Получение задач на ближайшие N дней"""
-        from datetime import timedelta
+    async def get_upcoming(user_id: int, days: int = 7, projection: str = 'full') -> List[Task]:
+        """
+        Получение задач на ближайшие N дней
+        
+        Повторяющиеся задачи разворачиваются в повторения периода:
+        каждое повторение - копия задачи со своим due_date
+        """
+        model, columns = task_projection(projection)
         now = datetime.now()
-        future = (now + timedelta(days=days)).isoformat()
+        future = now + timedelta(days=days)
         
-        rows = await db.fetchall('''
-            SELECT * FROM tasks 
+        rows = await db.fetchall(f'''
+            SELECT {columns} FROM tasks 
             WHERE user_id = ? AND due_date >= ? AND due_date <= ? AND status NOT IN ('completed', 'cancelled')
+              AND recurrence IS NULL
             ORDER BY due_date ASC
-        ''', (user_id, now.isoformat(), future))
+        ''', (user_id, now.isoformat(), future.isoformat()))
+        tasks = model.from_rows(rows)
+        
+        if projection != 'full':
+            columns += ', recurrence'
+        recurring = await db.fetchall(f'''
+            SELECT {columns} FROM tasks
+            WHERE user_id = ? AND due_date <= ? AND recurrence IS NOT NULL
+              AND status NOT IN ('completed', 'cancelled')
+        ''', (user_id, future.isoformat()))
+        
+        if not recurring:
+            return tasks
+        
+        for task, row in zip(model.from_rows(recurring), recurring):
+            rule = Recurrence.parse(row['recurrence'], TIMEZONE)
+            for moment in rule.between(in_timezone(task.due_date, TIMEZONE), now, future):
+                tasks.append(replace(task, due_date=moment))
         
-        return [Task.from_row(row) for row in rows]
+        tasks.sort(key=lambda task: task.due_date.timestamp())
+        return tasks
     
     @staticmethod
-    async def set_google_event_id(task_id: int, user_id: int, event_id: str):
-        """Установка ID события Google Calendar"""
-        await db.execute('''
+    async def get_stats(user_id: int, use_counters: bool = TASK_STATS_COUNTERS) -> TaskStats:
+        """
+        Статистика задач пользователя
+        
+        С use_counters итоги читаются из task_counters (поддерживается
+        триггерами), а запросом считаются только просроченные задачи.
+        Иначе все счетчики считаются одним агрегирующим запросом.
+        """
+        now = datetime.now().isoformat()
+        
+        if use_counters:
+            counters = await db.fetchone('''
+                SELECT total, pending, completed FROM task_counters WHERE user_id = ?
+            ''', (user_id,))
+            if not counters:
+                return TaskStats()
+            
+            overdue = await db.fetchone('''
+                SELECT COUNT(*) FROM tasks
+                WHERE user_id = ? AND due_date < ? AND status NOT IN ('completed', 'cancelled')
+            ''', (user_id, now))
+            
+            return TaskStats(
+                total=counters['total'],
+                pending=counters['pending'],
+                completed=counters['completed'],
+                overdue=overdue[0],
+            )
+        
+        row = await db.fetchone('''
+            SELECT
+                COUNT(*) AS total,
+                SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) AS pending,
+                SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) AS completed,
+                SUM(CASE WHEN due_date < ? AND status NOT IN ('completed', 'cancelled') THEN 1 ELSE 0 END) AS overdue
+            FROM tasks WHERE user_id = ?
+        ''', (now, user_id))
+        
+        return TaskStats(
+            total=row['total'],
+            pending=row['pending'] or 0,
+            completed=row['completed'] or 0,
+            overdue=row['overdue'] or 0,
+        )
+    
+    @staticmethod
+    async def get_newly_overdue(
+        since: str,
+        until: str,
+        after_id: int = 0,
+        batch_size: int = 500
+    ) -> AsyncIterator[List[Task]]:
+        """
+        Задачи всех пользователей, дедлайн которых наступил в окне (since, until)
+        
+        Выдает пачки по batch_size, упорядоченные по (due_date, id).
+        Курсор (since, after_id) позволяет продолжить прерванное сканирование;
+        сравнение строк (due_date, id) ограничивает индекс с обеих сторон,
+        поэтому читаются только задачи окна.
+        Повторяющиеся задачи не входят (см. iter_recurring).
+        """
+        while True:
+            rows = await db.fetchall(f'''
+                SELECT {TASK_COLUMNS} FROM tasks
+                WHERE status NOT IN ('completed', 'cancelled')
+                  AND recurrence IS NULL
+                  AND due_date < ?
+                  AND (due_date, id) > (?, ?)
+                ORDER BY due_date ASC, id ASC
+                LIMIT ?
+            ''', (until, since, after_id, batch_size))
+            
+            if not rows:
+                return
+            
+            yield Task.from_rows(rows)
+            
+            if len(rows) < batch_size:
+                return
+            
+            since, after_id = rows[-1]['due_date'], rows[-1]['id']
+    
+    @staticmethod
+    async def iter_recurring(until: str, batch_size: int = 500) -> AsyncIterator[List[Task]]:
+        """
+        Активные повторяющиеся задачи всех пользователей с due_date раньше until
+        
+        Читается частичный индекс idx_tasks_recurring_due: одна строка
+        на правило, повторения разворачивает вызывающий код
+        """
+        async for rows in db.iterate(f'''
+            SELECT {TASK_COLUMNS} FROM tasks
+            WHERE recurrence IS NOT NULL AND status NOT IN ('completed', 'cancelled')
+              AND due_date < ?
+        ''', (until,), batch_size):
+            yield Task.from_rows(rows)
+    
+    @staticmethod
+    async def set_google_event_id(task_id: int, user_id: int, event_id: str) -> bool:
+        """
+        Установка ID события Google Calendar
+        
+        Returns:
+            False, если задача уже удалена
+        """
+        cursor = await db.execute('''
             UPDATE tasks SET google_event_id = ?, updated_at = ?
             WHERE id = ? AND user_id = ?
         ''', (event_id, datetime.now().isoformat(), task_id, user_id))
+        
+        await TaskRepository._invalidate(user_id)
+        return cursor.rowcount > 0
+
+
+class JobStateRepository:
+    """Репозиторий сохраняемых позиций фоновых задач"""
+    
+    @staticmethod
+    async def get(name: str) -> Optional[str]:
+        """Получение значения"""
+        row = await db.fetchone('''
+            SELECT value FROM job_state WHERE name = ?
+        ''', (name,))
+        
+        return row['value'] if row else None
+    
+    @staticmethod
+    async def set(name: str, value: str):
+        """Сохранение значения"""
+        await db.execute('''
+            INSERT INTO job_state (name, value, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+        ''', (name, value, datetime.now().isoformat()))
 
 
 class UserRepository:
@@ -127,20 +543,21 @@ class UserRepository:
     @staticmethod
     async def create_or_update(telegram_id: int, username: str = None, first_name: str = None) -> User:
         """Создание или обновление пользователя"""
-        # Проверка существует ли пользователь
-        existing = await UserRepository.get_by_telegram_id(telegram_id)
-        
-        if existing:
-            await db.execute('''
-                UPDATE users SET username = ?, first_name = ? WHERE telegram_id = ?
-            ''', (username, first_name, telegram_id))
-            return existing
-        
-        # Создание нового пользователя
-        cursor = await db.execute('''
-            INSERT INTO users (telegram_id, username, first_name)
-            VALUES (?, ?, ?)
-        ''', (telegram_id, username, first_name))
+        async with db.transaction():
+            # Проверка существует ли пользователь
+            existing = await UserRepository.get_by_telegram_id(telegram_id)
+            
+            if existing:
+                await db.execute('''
+                    UPDATE users SET username = ?, first_name = ? WHERE telegram_id = ?
+                ''', (username, first_name, telegram_id))
+                return existing
+            
+            # Создание нового пользователя
+            cursor = await db.execute('''
+                INSERT INTO users (telegram_id, username, first_name)
+                VALUES (?, ?, ?)
+            ''', (telegram_id, username, first_name))
         
         return User(id=cursor.lastrowid, telegram_id=telegram_id, username=username, first_name=first_name)
     
@@ -178,6 +595,25 @@ class ReminderRepository:
         reminder.id = cursor.lastrowid
         return reminder
     
+    @staticmethod
+    async def get_by_id(reminder_id: int) -> Optional[Reminder]:
+        """Получение напоминания по ID"""
+        row = await db.fetchone('''
+            SELECT * FROM reminders WHERE id = ?
+        ''', (reminder_id,))
+        
+        return Reminder.from_row(row) if row else None
+    
+    @staticmethod
+    async def get_by_task(task_id: int) -> Optional[Reminder]:
+        """Получение напоминания задачи"""
+        row = await db.fetchone('''
+            SELECT * FROM reminders WHERE task_id = ?
+            ORDER BY id DESC LIMIT 1
+        ''', (task_id,))
+        
+        return Reminder.from_row(row) if row else None
+    
     @staticmethod
     async def get_pending() -> List[Reminder]:
         """Получение всех ненаправленных напоминаний"""
@@ -186,7 +622,22 @@ class ReminderRepository:
             ORDER BY reminder_time ASC
         ''', (datetime.now().isoformat(),))
         
-        return [Reminder.from_row(row) for row in rows]
+        return Reminder.from_rows(rows)
+    
+    @staticmethod
+    async def iter_pending(batch_size: int = 1000) -> AsyncIterator[List[Reminder]]:
+        """
+        Все неотправленные напоминания существующих задач пачками
+        
+        Ближайшие напоминания идут первыми (частичный индекс idx_reminders_pending)
+        """
+        async for rows in db.iterate('''
+            SELECT r.* FROM reminders r
+            JOIN tasks t ON t.id = r.task_id
+            WHERE r.is_sent = 0
+            ORDER BY r.reminder_time ASC
+        ''', batch_size=batch_size):
+            yield Reminder.from_rows(rows)
     
     @staticmethod
     async def mark_as_sent(reminder_id: int):
@@ -195,7 +646,166 @@ class ReminderRepository:
             UPDATE reminders SET is_sent = 1 WHERE id = ?
         ''', (reminder_id,))
     
+    @staticmethod
+    async def reschedule(reminder_id: int, reminder_time: datetime):
+        """Перенос напоминания на следующее повторение задачи (снова неотправленное)"""
+        await db.execute('''
+            UPDATE reminders SET reminder_time = ?, is_sent = 0 WHERE id = ?
+        ''', (reminder_time.isoformat(), reminder_id))
+    
     @staticmethod
     async def delete(reminder_id: int):
         """Удаление напоминания"""
         await db.execute('DELETE FROM reminders WHERE id = ?', (reminder_id,))
+
+
+class CalendarOutboxRepository:
+    """
+    Репозиторий очереди операций Google Calendar (outbox)
+    
+    Операции записываются в одной транзакции с изменением задачи
+    и отправляются фоновым воркером services.calendar_sync
+    """
+    
+    @staticmethod
+    async def enqueue(task_id: int, user_id: int, operation: str, payload: dict) -> int:
+        """Добавление операции в очередь"""
+        cursor = await db.execute('''
+            INSERT INTO calendar_outbox (task_id, user_id, operation, payload, next_attempt_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (task_id, user_id, operation, json.dumps(payload), datetime.now().isoformat()))
+        
+        return cursor.lastrowid
+    
+    @staticmethod
+    async def cancel_pending(task_id: int, operation: str) -> int:
+        """
+        Отмена еще не отправленных операций задачи
+        
+        Returns:
+            Количество отмененных операций
+        """
+        cursor = await db.execute('''
+            DELETE FROM calendar_outbox
+            WHERE task_id = ? AND operation = ? AND status = 'pending' AND attempts = 0
+              AND next_attempt_at <= ?
+        ''', (task_id, operation, datetime.now().isoformat()))
+        
+        return cursor.rowcount
+    
+    @staticmethod
+    async def claim_due(limit: int, lease_seconds: int) -> List[CalendarJob]:
+        """
+        Выборка наступивших операций с арендой
+        
+        Забранные операции откладываются на lease_seconds: если воркер
+        упадет, не завершив их, они будут выбраны повторно
+        """
+        now = datetime.now()
+        async with db.transaction():
+            rows = await db.fetchall('''
+                SELECT * FROM calendar_outbox
+                WHERE status = 'pending' AND next_attempt_at <= ?
+                ORDER BY next_attempt_at ASC, id ASC
+                LIMIT ?
+            ''', (now.isoformat(), limit))
+            
+            if rows:
+                placeholders = ', '.join('?' * len(rows))
+                await db.execute(f'''
+                    UPDATE calendar_outbox SET next_attempt_at = ? WHERE id IN ({placeholders})
+                ''', ((now + timedelta(seconds=lease_seconds)).isoformat(), *(row['id'] for row in rows)))
+        
+        return [CalendarJob.from_row(row) for row in rows]
+    
+    @staticmethod
+    async def complete(job_ids: List[int]):
+        """Удаление выполненных операций"""
+        if not job_ids:
+            return
+        
+        placeholders = ', '.join('?' * len(job_ids))
+        await db.execute(f'DELETE FROM calendar_outbox WHERE id IN ({placeholders})', tuple(job_ids))
+    
+    @staticmethod
+    async def reschedule(job_id: int, attempts: int, next_attempt_at: Optional[datetime], error: str):
+        """Отложенный повтор операции (без next_attempt_at - окончательная ошибка)"""
+        await db.execute('''
+            UPDATE calendar_outbox
+            SET attempts = ?, next_attempt_at = COALESCE(?, next_attempt_at), last_error = ?,
+                status = CASE WHEN ? IS NULL THEN 'failed' ELSE 'pending' END
+            WHERE id = ?
+        ''', (
+            attempts,
+            next_attempt_at.isoformat() if next_attempt_at else None,
+            error,
+            next_attempt_at.isoformat() if next_attempt_at else None,
+            job_id,
+        ))
+    
+    @staticmethod
+    async def count_pending() -> int:
+        """Количество операций, ожидающих отправки"""
+        row = await db.fetchone("SELECT COUNT(*) FROM calendar_outbox WHERE status = 'pending'")
+        return row[0]
+
+
+
+class CalendarEventRepository:
+    """Репозиторий локальной копии событий Google Calendar"""
+    
+    @staticmethod
+    async def upsert_many(events: List[dict]):
+        """Сохранение событий (event - объект события Calendar API и start_utc)"""
+        for event in events:
+            await db.execute('''
+                INSERT INTO calendar_events (id, summary, description, start_time, end_time, start_utc, updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    summary = excluded.summary,
+                    description = excluded.description,
+                    start_time = excluded.start_time,
+                    end_time = excluded.end_time,
+                    start_utc = excluded.start_utc,
+                    updated = excluded.updated
+            ''', (
+                event['id'],
+                event.get('summary'),
+                event.get('description'),
+                json.dumps(event['start']),
+                json.dumps(event.get('end')),
+                event['start_utc'],
+                event.get('updated'),
+            ))
+    
+    @staticmethod
+    async def delete_many(event_ids: List[str]):
+        """Удаление событий"""
+        for event_id in event_ids:
+            await db.execute('DELETE FROM calendar_events WHERE id = ?', (event_id,))
+    
+    @staticmethod
+    async def clear():
+        """Удаление всех событий (перед полной синхронизацией)"""
+        await db.execute('DELETE FROM calendar_events')
+    
+    @staticmethod
+    async def get_range(start_utc: str, end_utc: str, limit: int = 10) -> List[dict]:
+        """События, начинающиеся в периоде [start_utc, end_utc), в формате Calendar API"""
+        rows = await db.fetchall('''
+            SELECT id, summary, description, start_time, end_time FROM calendar_events
+            WHERE start_utc >= ? AND start_utc < ?
+            ORDER BY start_utc ASC
+            LIMIT ?
+        ''', (start_utc, end_utc, limit))
+        
+        return [
+            {
+                'id': row['id'],
+                'summary': row['summary'],
+                'description': row['description'],
+                'start': json.loads(row['start_time']),
+                'end': json.loads(row['end_time']) if row['end_time'] else None,
+            }
+            for row in rows
+        ]
@@ -48,6 +48,9 @@ async def cmd_help(callback: CallbackQuery | Message):
 /help - Показать справку
 /tasks - Список задач
 /add - Добавить задачу
+/search - Поиск задач
+/import - Импорт задач из CSV, JSON или ICS
+/export - Экспорт задач (csv, json, ics)
 /stats - Статистика
 
 <b>Как создать задачу:</b>
@@ -56,7 +59,8 @@ async def cmd_help(callback: CallbackQuery | Message):
 3. Введите описание (или пропустите)
 4. Выберите приоритет
 5. Укажите дедлайн
-6. Настройте напоминание
+6. Выберите повторение (каждый день, по будням, каждую неделю, каждый месяц или правило RRULE)
+7. Настройте напоминание
 
 <b>Интеграция с Google Calendar:</b>
 Для синхронизации с календарем необходимо настроить credentials.json
@@ -109,10 +113,10 @@ async def task_create_handler(callback: CallbackQuery, state: FSMContext):
 
 @router.callback_query(F.data == "calendar_view")
 async def calendar_view_handler(callback: CallbackQuery):
-    """Просмотр календаря"""
-    from services.google_calendar import google_calendar
+    """Просмотр календаря (из локальной копии, см. services.calendar_mirror)"""
+    from services.calendar_mirror import calendar_mirror
     
-    events = await google_calendar.get_events()
+    events = await calendar_mirror.get_events()
     
     if not events:
         text = "📅 <b>Календарь</b>\n\nНа ближайшие 7 дней событий нет."
@@ -135,11 +139,9 @@ async def calendar_view_handler(callback: CallbackQuery):
 
 @router.callback_query(F.data == "reminders_view")
 async def reminders_view_handler(callback: CallbackQuery):
-    """Просмотр напоминаний"""
+    """Просмотр напоминаний (репозитории работают с общим подключением db, открытым в on_startup)"""
     from db.repositories import ReminderRepository
-    from db.database import db
     
-    await db.connect()
     reminders = await ReminderRepository.get_pending()
     
     if not reminders:
@@ -160,31 +162,25 @@ async def reminders_view_handler(callback: CallbackQuery):
 
 @router.callback_query(F.data == "stats_view")
 async def stats_view_handler(callback: CallbackQuery):
-    """Просмотр статистики"""
+    """Просмотр статистики (репозитории работают с общим подключением db, открытым в on_startup)"""
     from db.repositories import TaskRepository
-    from db.database import db
     
-    await db.connect()
     user_id = callback.from_user.id
     
-    all_tasks = await TaskRepository.get_all(user_id)
-    pending = await TaskRepository.get_all(user_id, status='pending')
-    completed = await TaskRepository.get_all(user_id, status='completed')
-    overdue = await TaskRepository.get_overdue(user_id)
+    stats = await TaskRepository.get_stats(user_id)
     
     text = f"""
 📊 <b>Статистика задач</b>
 
-📋 Всего задач: <b>{len(all_tasks)}</b>
-⏳ В ожидании: <b>{len(pending)}</b>
-✅ Завершенные: <b>{len(completed)}</b>
-🔥 Просроченные: <b>{len(overdue)}</b>
+📋 Всего задач: <b>{stats.total}</b>
+⏳ В ожидании: <b>{stats.pending}</b>
+✅ Завершенные: <b>{stats.completed}</b>
+🔥 Просроченные: <b>{stats.overdue}</b>
 
 """
     
-    if all_tasks:
-        completion_rate = len(completed) / len(all_tasks) * 100
-        text += f"📈 Процент выполнения: <b>{completion_rate:.1f}%</b>"
+    if stats.total:
+        text += f"📈 Процент выполнения: <b>{stats.completion_rate:.1f}%</b>"
     
     await callback.message.edit_text(
         text,
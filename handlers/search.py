@@ -0,0 +1,76 @@
+import html
+from aiogram import Router, F
+from aiogram.types import Message, CallbackQuery
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
+
+from bot.keyboards import get_search_page_keyboard
+from db.repositories import TaskRepository
+from config.settings import ADMIN_IDS
+
+router = Router()
+
+SEARCH_PAGE_SIZE = 10
+
+
+@router.message(Command("search"))
+async def cmd_search(message: Message, command: CommandObject, state: FSMContext):
+    """Обработчик команды /search <запрос>"""
+    query = (command.args or "").strip()
+    if not query:
+        await message.answer(
+            "🔍 <b>Поиск задач</b>\n\n"
+            "Использование: /search <i>текст</i>",
+            parse_mode="HTML"
+        )
+        return
+    
+    # Запрос сохраняется для перехода по страницам результатов
+    await state.update_data(search_query=query)
+    
+    text, markup = await render_search_page(message.from_user.id, query, 0)
+    await message.answer(text, reply_markup=markup, parse_mode="HTML")
+
+
+@router.callback_query(F.data.startswith("searchpage_"))
+async def search_page_handler(callback: CallbackQuery, state: FSMContext):
+    """Переход по страницам результатов поиска"""
+    offset = int(callback.data.split("_")[1])
+    query = (await state.get_data()).get("search_query")
+    
+    if not query:
+        await callback.answer("Поиск устарел, повторите /search")
+        return
+    
+    text, markup = await render_search_page(callback.from_user.id, query, offset)
+    await callback.message.edit_text(text, reply_markup=markup, parse_mode="HTML")
+    await callback.answer()
+
+
+async def render_search_page(user_id: int, query: str, offset: int):
+    """Текст и клавиатура страницы результатов поиска"""
+    tasks = await TaskRepository.search(user_id, query, SEARCH_PAGE_SIZE + 1, offset)
+    has_next = len(tasks) > SEARCH_PAGE_SIZE
+    
+    # Запрос и текст задач вставляются в HTML-сообщение
+    if not tasks:
+        text = f"🔍 По запросу «{html.escape(query)}» ничего не найдено."
+    else:
+        text = f"🔍 <b>Результаты поиска:</b> «{html.escape(query)}»\n\n"
+        for i, task in enumerate(tasks[:SEARCH_PAGE_SIZE], offset + 1):
+            text += f"{i}. <b>{html.escape(task.title)}</b>\n"
+            if task.description:
+                text += f"   📝 {html.escape(task.description[:100])}\n"
+            text += "\n"
+    
+    return text, get_search_page_keyboard(offset, SEARCH_PAGE_SIZE, has_next)
+
+
+@router.message(Command("reindex_search"))
+async def cmd_reindex_search(message: Message):
+    """Перестройка поискового индекса (только для администраторов)"""
+    if message.from_user.id not in ADMIN_IDS:
+        return
+    
+    await TaskRepository.rebuild_search_index()
+    await message.answer("✅ Поисковый индекс перестроен")
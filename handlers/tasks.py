@@ -7,17 +7,28 @@ import pytz
 from bot.states import TaskStates, EditTaskStates
 from bot.keyboards import (
     get_main_menu, get_priority_keyboard,
-    get_reminder_keyboard, get_cancel_keyboard,
-    get_task_actions_keyboard, get_task_list_keyboard
+    get_reminder_keyboard, get_recurrence_keyboard, get_cancel_keyboard,
+    get_task_actions_keyboard, get_task_page_keyboard
 )
-from db.repositories import TaskRepository, UserRepository
+from db.repositories import TaskRepository, UserRepository, ReminderRepository, CalendarOutboxRepository
 from db.database import db
 from services.google_calendar import google_calendar
-from models.task import Task
+from services.calendar_sync import calendar_sync
+from services.reminder_service import reminder_service
+from services import task_recurrence
+from models.task import Task, Reminder
 from config.settings import TIMEZONE
 
 router = Router()
 
+# Правила повторения для кнопок клавиатуры повторения
+RECURRENCE_PRESETS = {
+    "daily": "FREQ=DAILY",
+    "weekdays": "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR",
+    "weekly": "FREQ=WEEKLY",
+    "monthly": "FREQ=MONTHLY",
+}
+
 
 # ==================== СОЗДАНИЕ ЗАДАЧИ ====================
 
@@ -82,10 +93,12 @@ async def process_task_due_date(message: Message, state: FSMContext):
         due_date = datetime.strptime(message.text, "%d.%m.%Y %H:%M")
         due_date = pytz.timezone(TIMEZONE).localize(due_date)
         await state.update_data(due_date=due_date.isoformat())
-        await state.set_state(TaskStates.waiting_for_reminder)
+        await state.set_state(TaskStates.waiting_for_recurrence)
         await message.answer(
-            "🔔 Хотите ли вы получать <b>напоминания</b>?",
-            reply_markup=get_reminder_keyboard(),
+            "🔁 Задача <b>повторяется</b>?\n\n"
+            "Выберите вариант или введите правило RRULE, например:\n"
+            "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,FR;COUNT=10",
+            reply_markup=get_recurrence_keyboard(),
             parse_mode="HTML"
         )
     except ValueError:
@@ -99,7 +112,42 @@ async def process_task_due_date(message: Message, state: FSMContext):
 @router.message(TaskStates.waiting_for_due_date, F.text.lower() == "пропустить")
 async def skip_task_due_date(message: Message, state: FSMContext):
     """Пропуск дедлайна"""
-    await state.update_data(due_date=None)
+    await state.update_data(due_date=None, recurrence=None)
+    await state.set_state(TaskStates.waiting_for_reminder)
+    await message.answer(
+        "🔔 Хотите ли вы получать <b>напоминания</b>?",
+        reply_markup=get_reminder_keyboard(),
+        parse_mode="HTML"
+    )
+
+
+@router.callback_query(TaskStates.waiting_for_recurrence, F.data.startswith("recurrence_"))
+async def process_recurrence_preset(callback: CallbackQuery, state: FSMContext):
+    """Выбор повторения кнопкой"""
+    await state.update_data(recurrence=RECURRENCE_PRESETS.get(callback.data.split("_", 1)[1]))
+    await state.set_state(TaskStates.waiting_for_reminder)
+    await callback.message.edit_text(
+        "🔔 Хотите ли вы получать <b>напоминания</b>?",
+        reply_markup=get_reminder_keyboard(),
+        parse_mode="HTML"
+    )
+    await callback.answer()
+
+
+@router.message(TaskStates.waiting_for_recurrence)
+async def process_recurrence_rule(message: Message, state: FSMContext):
+    """Обработка введенного правила повторения"""
+    try:
+        recurrence = task_recurrence.parse_rule(message.text or "")
+    except ValueError:
+        await message.answer(
+            "❌ Неподдерживаемое правило. Доступны FREQ=DAILY/WEEKLY/MONTHLY, "
+            "INTERVAL, BYDAY, COUNT и UNTIL.\n"
+            "Пример: FREQ=WEEKLY;BYDAY=MO,WE,FR"
+        )
+        return
+    
+    await state.update_data(recurrence=recurrence)
     await state.set_state(TaskStates.waiting_for_reminder)
     await message.answer(
         "🔔 Хотите ли вы получать <b>напоминания</b>?",
@@ -150,27 +198,43 @@ async def finalize_task_creation(message: Message, state: FSMContext):
     data = await state.get_data()
     user_id = message.from_user.id
     
-    # Создание задачи
-    task = await TaskRepository.create(Task(
-        user_id=user_id,
-        title=data['title'],
-        description=data.get('description', ''),
-        priority=data.get('priority', 'medium'),
-        due_date=datetime.fromisoformat(data['due_date']) if data.get('due_date') else None,
-        reminder_enabled=data.get('reminder_enabled', False),
-        reminder_time=datetime.fromisoformat(data['reminder_time']) if data.get('reminder_time') else None,
-    ))
+    reminder = None
     
-    # Синхронизация с Google Calendar
-    if task.due_date:
-        event_id = await google_calendar.create_event(
-            title=task.title,
-            description=task.description,
-            start_time=task.due_date,
-            end_time=task.due_date + timedelta(hours=1) if task.due_date else None
-        )
-        if event_id:
-            await TaskRepository.set_google_event_id(task.id, user_id, event_id)
+    async with db.transaction():
+        # Создание задачи
+        task = await TaskRepository.create(Task(
+            user_id=user_id,
+            title=data['title'],
+            description=data.get('description', ''),
+            priority=data.get('priority', 'medium'),
+            due_date=datetime.fromisoformat(data['due_date']) if data.get('due_date') else None,
+            reminder_enabled=data.get('reminder_enabled', False),
+            reminder_time=datetime.fromisoformat(data['reminder_time']) if data.get('reminder_time') else None,
+            recurrence=data.get('recurrence'),
+        ))
+        
+        if task.reminder_enabled and task.reminder_time:
+            reminder = await ReminderRepository.create(Reminder(
+                task_id=task.id,
+                user_id=user_id,
+                reminder_time=task.reminder_time,
+            ))
+        
+        # Синхронизация с Google Calendar выполняется в фоне (calendar_sync)
+        if task.due_date and google_calendar.enabled:
+            await CalendarOutboxRepository.enqueue(task.id, user_id, 'create', google_calendar.build_event_body(
+                title=task.title,
+                description=task.description,
+                start_time=task.due_date,
+                end_time=task.due_date + timedelta(hours=1),
+                recurrence=task.recurrence,
+            ))
+    
+    calendar_sync.notify()
+    
+    # Постановка напоминания в очередь
+    if reminder:
+        await reminder_service.add_reminder(reminder.id, user_id, task.id, reminder.reminder_time)
     
     await state.clear()
     
@@ -179,6 +243,7 @@ async def finalize_task_creation(message: Message, state: FSMContext):
         f"📌 Название: {task.title}\n"
         f"🎯 Приоритет: {get_priority_emoji(task.priority)} {task.priority}\n"
         f"📅 Дедлайн: {format_datetime(task.due_date)}\n"
+        f"🔁 Повтор: {task_recurrence.describe(task.recurrence)}\n"
         f"🔔 Напоминание: {'✅' if task.reminder_enabled else '❌'}",
         reply_markup=get_main_menu(),
         parse_mode="HTML"
@@ -187,44 +252,62 @@ async def finalize_task_creation(message: Message, state: FSMContext):
 
 # ==================== СПИСОК ЗАДАЧ ====================
 
+TASK_LIST_TITLES = {
+    "all": "📋 Все задачи",
+    "pending": "⏳ Задачи в ожидании",
+    "completed": "✅ Завершенные задачи",
+    "overdue": "🔥 Просроченные задачи",
+}
+
+TASKS_PAGE_SIZE = 10
+
+
 @router.callback_query(F.data.startswith("tasks_"))
 async def show_tasks(callback: CallbackQuery):
-    """Показ списка задач"""
+    """Показ первой страницы списка задач"""
     filter_type = callback.data.split("_")[1]
-    user_id = callback.from_user.id
+    if filter_type not in TASK_LIST_TITLES:
+        return
     
-    if filter_type == "all":
-        tasks = await TaskRepository.get_all(user_id)
-        title = "📋 Все задачи"
-    elif filter_type == "pending":
-        tasks = await TaskRepository.get_all(user_id, status='pending')
-        title = "⏳ Задачи в ожидании"
-    elif filter_type == "completed":
-        tasks = await TaskRepository.get_all(user_id, status='completed')
-        title = "✅ Завершенные задачи"
-    elif filter_type == "overdue":
-        tasks = await TaskRepository.get_overdue(user_id)
-        title = "🔥 Просроченные задачи"
-    else:
+    await show_tasks_page(callback, filter_type)
+
+
+@router.callback_query(F.data.startswith("taskspage_"))
+async def show_tasks_page_handler(callback: CallbackQuery):
+    """Переход по страницам списка задач"""
+    _, filter_type, direction, cursor = callback.data.split("_")
+    if filter_type not in TASK_LIST_TITLES:
         return
     
-    if not tasks:
+    await show_tasks_page(callback, filter_type, int(cursor), backward=direction == "prev")
+
+
+async def show_tasks_page(callback: CallbackQuery, filter_type: str, cursor: int = None, backward: bool = False):
+    """Показ страницы списка задач"""
+    user_id = callback.from_user.id
+    title = TASK_LIST_TITLES[filter_type]
+    
+    page = await TaskRepository.list_page(user_id, filter_type, cursor, TASKS_PAGE_SIZE, backward, projection='summary')
+    
+    if not page.tasks:
         text = f"{title}\n\nЗадач не найдено."
     else:
-        text = f"{title}\n\n"
-        for i, task in enumerate(tasks[:10], 1):
+        total = await TaskRepository.count(user_id, filter_type)
+        text = f"{title} ({total})\n\n"
+        for i, task in enumerate(page.tasks, 1):
             status_emoji = get_status_emoji(task.status)
             priority_emoji = get_priority_emoji(task.priority)
             text += f"{i}. {status_emoji} <b>{task.title}</b>\n"
             text += f"   {priority_emoji} Приоритет: {task.priority}\n"
             text += f"   📅 Дедлайн: {format_datetime(task.due_date)}\n\n"
-        
-        if len(tasks) > 10:
-            text += f"... и еще {len(tasks) - 10} задач\n"
     
     await callback.message.edit_text(
         text,
-        reply_markup=get_task_list_keyboard() if len(tasks) > 0 else get_main_menu(),
+        reply_markup=get_task_page_keyboard(
+            filter_type,
+            prev_cursor=page.first_id if page.has_prev else None,
+            next_cursor=page.last_id if page.has_next else None,
+        ) if page.tasks else get_main_menu(),
         parse_mode="HTML"
     )
     await callback.answer()
@@ -239,7 +322,16 @@ async def complete_task(callback: CallbackQuery):
     user_id = callback.from_user.id
     
     task = await TaskRepository.get_by_id(task_id, user_id)
-    if task:
+    
+    # Повторяющаяся задача переносится на следующее повторение
+    if task and task.recurrence and task.due_date and await task_recurrence.complete_occurrence(task):
+        await callback.message.edit_text(
+            f"✅ <b>Повторение выполнено!</b>\n\n{task.title}\n\n"
+            f"🔁 Следующее: {format_datetime(task.due_date)}",
+            reply_markup=get_main_menu(),
+            parse_mode="HTML"
+        )
+    elif task:
         task.status = 'completed'
         await TaskRepository.update(task)
         
@@ -260,11 +352,16 @@ async def delete_task(callback: CallbackQuery):
     
     task = await TaskRepository.get_by_id(task_id, user_id)
     if task:
-        # Удаление события из Google Calendar
-        if task.google_event_id:
-            await google_calendar.delete_event(task.google_event_id)
+        async with db.transaction():
+            # Удаление события из Google Calendar (в фоне) или отмена его создания
+            if task.google_event_id:
+                await CalendarOutboxRepository.enqueue(task_id, user_id, 'delete', {'event_id': task.google_event_id})
+            else:
+                await CalendarOutboxRepository.cancel_pending(task_id, 'create')
+            
+            await TaskRepository.delete(task_id, user_id)
         
-        await TaskRepository.delete(task_id, user_id)
+        calendar_sync.notify()
         
         await callback.message.edit_text(
             f"🗑️ <b>Задача удалена!</b>\n\n{task.title}",
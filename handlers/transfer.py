@@ -0,0 +1,99 @@
+import logging
+import os
+import tempfile
+from aiogram import Router, F
+from aiogram.types import Message, FSInputFile
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
+
+from bot.keyboards import get_main_menu, get_cancel_keyboard
+from bot.states import ImportStates
+from config.settings import IMPORT_MAX_FILE_SIZE, IMPORT_MAX_TASKS
+from services.task_transfer import FORMATS, detect_format, import_tasks, export_tasks
+
+logger = logging.getLogger(__name__)
+
+router = Router()
+
+
+@router.message(Command("export"))
+async def cmd_export(message: Message, command: CommandObject):
+    """Обработчик команды /export [csv|json|ics]"""
+    file_format = (command.args or "csv").strip().lower()
+    if file_format not in FORMATS:
+        await message.answer(
+            "📤 <b>Экспорт задач</b>\n\n"
+            "Использование: /export <i>csv</i> | <i>json</i> | <i>ics</i>",
+            parse_mode="HTML"
+        )
+        return
+    
+    user_id = message.from_user.id
+    fd, path = tempfile.mkstemp(suffix=f".{file_format}")
+    os.close(fd)
+    
+    try:
+        exported = await export_tasks(user_id, file_format, path)
+        if not exported:
+            await message.answer("📤 Задач для экспорта нет.", reply_markup=get_main_menu())
+            return
+        
+        await message.answer_document(
+            FSInputFile(path, filename=f"tasks.{file_format}"),
+            caption=f"📤 Выгружено задач: {exported}"
+        )
+    finally:
+        os.remove(path)
+
+
+@router.message(Command("import"))
+async def cmd_import(message: Message, state: FSMContext):
+    """Обработчик команды /import"""
+    await state.set_state(ImportStates.waiting_for_file)
+    await message.answer(
+        "📥 <b>Импорт задач</b>\n\n"
+        "Отправьте файл CSV, JSON или ICS.\n\n"
+        "CSV/JSON: поля title, description, priority (low/medium/high), "
+        "status, due_date (ISO или ДД.ММ.ГГГГ ЧЧ:ММ).\n"
+        f"Не больше {IMPORT_MAX_TASKS} задач за один импорт.",
+        reply_markup=get_cancel_keyboard(),
+        parse_mode="HTML"
+    )
+
+
+@router.message(ImportStates.waiting_for_file, F.document)
+async def process_import_file(message: Message, state: FSMContext):
+    """Обработка файла импорта"""
+    document = message.document
+    file_format = detect_format(document.file_name)
+    
+    if not file_format:
+        await message.answer("❌ Поддерживаются файлы .csv, .json и .ics. Отправьте другой файл:")
+        return
+    
+    if document.file_size and document.file_size > IMPORT_MAX_FILE_SIZE:
+        await message.answer("❌ Файл слишком большой. Отправьте другой файл:")
+        return
+    
+    fd, path = tempfile.mkstemp(suffix=f".{file_format}")
+    os.close(fd)
+    
+    try:
+        await message.bot.download(document, destination=path)
+        created, skipped, truncated = await import_tasks(path, file_format, message.from_user.id)
+    except (ValueError, UnicodeDecodeError) as e:
+        logger.warning(f"Ошибка разбора файла импорта: {e}")
+        await message.answer("❌ Не удалось прочитать файл. Проверьте формат и кодировку (UTF-8):")
+        return
+    finally:
+        os.remove(path)
+    
+    await state.clear()
+    
+    text = f"✅ <b>Импорт завершен</b>\n\n📋 Создано задач: {created}"
+    if skipped:
+        text += f"\n⚠️ Пропущено записей: {skipped}"
+    if truncated:
+        text += f"\n⛔ Не импортировано сверх лимита {IMPORT_MAX_TASKS}: {truncated}"
+    
+    await message.answer(text, reply_markup=get_main_menu(), parse_mode="HTML")
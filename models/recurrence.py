@@ -0,0 +1,252 @@
+import calendar
+from dataclasses import dataclass, replace
+from datetime import datetime, date, timedelta
+from typing import Optional, Iterator, List
+import pytz
+
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY')
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+WEEKDAY_NAMES = ('пн', 'вт', 'ср', 'чт', 'пт', 'сб', 'вс')
+
+# Сколько периодов подряд без повторений допускается (MONTHLY с 31 числом и т.п.)
+MAX_EMPTY_PERIODS = 1000
+
+
+def _plural(number: int, forms: tuple) -> str:
+    """Форма слова для числа: (1 день, 2 дня, 5 дней)"""
+    if number % 10 == 1 and number % 100 != 11:
+        return forms[0]
+    if 2 <= number % 10 <= 4 and not 12 <= number % 100 <= 14:
+        return forms[1]
+    return forms[2]
+
+
+def _align(moment: datetime, like: datetime) -> datetime:
+    """Приведение moment к наивному/aware виду like (наивное время - локальное время системы)"""
+    if like.tzinfo is not None and moment.tzinfo is None:
+        return moment.astimezone(like.tzinfo)
+    if like.tzinfo is None and moment.tzinfo is not None:
+        return moment.astimezone().replace(tzinfo=None)
+    return moment
+
+
+def in_timezone(moment: Optional[datetime], zone: str) -> Optional[datetime]:
+    """
+    Aware-дата в поясе zone
+    
+    Даты из базы хранят только смещение; повторения считаются по
+    стенным часам пояса, поэтому перед разворачиванием правила
+    дата переводится в pytz-пояс
+    """
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(pytz.timezone(zone))
+
+
+@dataclass(slots=True, frozen=True)
+class Recurrence:
+    """
+    Правило повторения - подмножество RRULE (RFC 5545)
+    
+    FREQ=DAILY|WEEKLY|MONTHLY, INTERVAL, BYDAY (набор дней недели),
+    COUNT, UNTIL. Первое повторение - dtstart, время суток берется
+    из него. Правило хранится одной строкой на задачу, повторения
+    вычисляются по запросу; для правил без COUNT разворачивание
+    сразу переходит к нужному периоду.
+    """
+    freq: str
+    interval: int = 1
+    by_day: tuple = ()  # дни недели, 0 - понедельник
+    count: Optional[int] = None
+    until: Optional[datetime] = None
+    
+    @classmethod
+    def parse(cls, rule: str, zone: Optional[str] = None) -> 'Recurrence':
+        """
+        Разбор строки RRULE (с префиксом RRULE: или без него)
+        
+        UNTIL без Z (локальное время) относится к поясу zone
+        
+        Raises:
+            ValueError: неподдерживаемое или некорректное правило
+        """
+        rule = rule.strip()
+        if rule.upper().startswith('RRULE:'):
+            rule = rule[6:]
+        
+        parts = {}
+        for part in filter(None, rule.split(';')):
+            name, _, value = part.partition('=')
+            parts[name.strip().upper()] = value.strip().upper()
+        
+        freq = parts.pop('FREQ', None)
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Неподдерживаемая частота повторения: {freq}")
+        
+        interval = int(parts.pop('INTERVAL', 1))
+        by_day = tuple(sorted({WEEKDAYS.index(day) for day in parts.pop('BYDAY', '').split(',') if day}))
+        count = int(parts.pop('COUNT')) if 'COUNT' in parts else None
+        until = parts.pop('UNTIL', None)
+        parts.pop('WKST', None)
+        
+        if parts:
+            raise ValueError(f"Неподдерживаемые части правила: {', '.join(parts)}")
+        if interval < 1 or (count is not None and count < 1):
+            raise ValueError("INTERVAL и COUNT должны быть положительными")
+        
+        if until:
+            if len(until) == 8:
+                # Дата без времени - включительно до конца дня
+                until = datetime.strptime(until, '%Y%m%d').replace(hour=23, minute=59, second=59)
+            else:
+                utc = until.endswith('Z')
+                until = datetime.strptime(until.rstrip('Z'), '%Y%m%dT%H%M%S')
+                if utc:
+                    until = pytz.utc.localize(until)
+            if until.tzinfo is None and zone:
+                until = pytz.timezone(zone).localize(until)
+        
+        return cls(freq, interval, by_day, count, until)
+    
+    def __str__(self) -> str:
+        """Строка RRULE (без префикса)"""
+        parts = [f'FREQ={self.freq}']
+        if self.interval != 1:
+            parts.append(f'INTERVAL={self.interval}')
+        if self.by_day:
+            parts.append('BYDAY=' + ','.join(WEEKDAYS[day] for day in self.by_day))
+        if self.count is not None:
+            parts.append(f'COUNT={self.count}')
+        if self.until is not None:
+            if self.until.tzinfo is not None:
+                parts.append('UNTIL=' + self.until.astimezone(pytz.utc).strftime('%Y%m%dT%H%M%SZ'))
+            else:
+                parts.append('UNTIL=' + self.until.strftime('%Y%m%dT%H%M%S'))
+        return ';'.join(parts)
+    
+    def describe(self) -> str:
+        """Описание правила для пользователя"""
+        units = {
+            'DAILY': ('день', 'дня', 'дней'),
+            'WEEKLY': ('неделю', 'недели', 'недель'),
+            'MONTHLY': ('месяц', 'месяца', 'месяцев'),
+        }[self.freq]
+        
+        if self.by_day == (0, 1, 2, 3, 4) and self.interval == 1 and self.freq in ('DAILY', 'WEEKLY'):
+            text = 'по будням'
+        else:
+            if self.interval == 1:
+                text = f"каждый {units[0]}" if self.freq != 'WEEKLY' else 'каждую неделю'
+            else:
+                text = f"каждые {self.interval} {_plural(self.interval, units)}"
+            if self.by_day:
+                text += ' (' + ', '.join(WEEKDAY_NAMES[day] for day in self.by_day) + ')'
+        
+        if self.count is not None:
+            text += f", {self.count} {_plural(self.count, ('раз', 'раза', 'раз'))}"
+        if self.until is not None:
+            text += f", до {self.until.strftime('%d.%m.%Y')}"
+        return text
+    
+    def _period_days(self, first_day: date, index: int) -> List[date]:
+        """Дни повторений в периоде index (период 0 содержит first_day)"""
+        if self.freq == 'DAILY':
+            day = first_day + timedelta(days=index * self.interval)
+            return [day] if not self.by_day or day.weekday() in self.by_day else []
+        
+        if self.freq == 'WEEKLY':
+            monday = first_day - timedelta(days=first_day.weekday()) + timedelta(weeks=index * self.interval)
+            return [monday + timedelta(days=weekday) for weekday in self.by_day or (first_day.weekday(),)]
+        
+        year, month = divmod(first_day.year * 12 + first_day.month - 1 + index * self.interval, 12)
+        month += 1
+        days_in_month = calendar.monthrange(year, month)[1]
+        if self.by_day:
+            days = (date(year, month, day) for day in range(1, days_in_month + 1))
+            return [day for day in days if day.weekday() in self.by_day]
+        return [date(year, month, first_day.day)] if first_day.day <= days_in_month else []
+    
+    def _period_index(self, first_day: date, day: date) -> int:
+        """Номер периода, в который попадает day"""
+        if self.freq == 'DAILY':
+            periods = (day - first_day).days
+        elif self.freq == 'WEEKLY':
+            periods = (day - first_day).days // 7 + (day.weekday() < first_day.weekday())
+        else:
+            periods = (day.year - first_day.year) * 12 + day.month - first_day.month
+        return periods // self.interval
+    
+    def occurrences(self, dtstart: datetime, start: Optional[datetime] = None) -> Iterator[datetime]:
+        """
+        Повторения по возрастанию, начиная с dtstart (оно учитывается в COUNT)
+        
+        С start выдаются только повторения не раньше start; для правил
+        без COUNT пропущенные периоды не перебираются
+        """
+        tzinfo = dtstart.tzinfo
+        first_day, clock = dtstart.date(), dtstart.time()
+        until = _align(self.until, dtstart) if self.until is not None else None
+        remaining = self.count
+        
+        index = 0
+        if start is not None:
+            start = _align(start, dtstart)
+            if remaining is None:
+                local_start = start.astimezone(tzinfo) if tzinfo is not None else start
+                index = max(0, self._period_index(first_day, local_start.date()) - 1)
+        
+        # dtstart - всегда первое повторение, даже если не совпадает с BYDAY
+        if until is not None and dtstart > until:
+            return
+        if remaining is not None:
+            remaining -= 1
+        if start is None or dtstart >= start:
+            yield dtstart
+        
+        empty = 0
+        while empty < MAX_EMPTY_PERIODS:
+            days = self._period_days(first_day, index)
+            empty = 0 if days else empty + 1
+            index += 1
+            
+            for day in days:
+                moment = datetime.combine(day, clock)
+                if tzinfo is not None:
+                    # pytz учитывает переход на летнее время, фиксированное смещение - нет
+                    moment = tzinfo.localize(moment) if hasattr(tzinfo, 'localize') else moment.replace(tzinfo=tzinfo)
+                if moment <= dtstart:
+                    continue
+                if until is not None and moment > until:
+                    return
+                if remaining is not None:
+                    if remaining == 0:
+                        return
+                    remaining -= 1
+                if start is None or moment >= start:
+                    yield moment
+    
+    def between(self, dtstart: datetime, start: datetime, end: datetime) -> List[datetime]:
+        """Повторения в полуинтервале [start, end)"""
+        result = []
+        end = _align(end, dtstart)
+        for moment in self.occurrences(dtstart, start):
+            if moment >= end:
+                break
+            result.append(moment)
+        return result
+    
+    def advance(self, dtstart: datetime, after: datetime) -> Optional[tuple[datetime, 'Recurrence']]:
+        """
+        Следующее после after повторение и оставшееся с него правило
+        
+        Пропущенные повторения уменьшают COUNT. Возвращает None,
+        если повторения закончились.
+        """
+        after = _align(after, dtstart)
+        consumed = 0
+        for moment in self.occurrences(dtstart, after if self.count is None else None):
+            if moment > after and moment != dtstart:
+                remaining = replace(self, count=self.count - consumed) if self.count is not None else self
+                return moment, remaining
+            consumed += 1
+        return None
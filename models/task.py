@@ -1,9 +1,52 @@
-from dataclasses import dataclass
+import json
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List, Iterable, Union
 
 
-@dataclass
+class _LazyDatetime:
+    """
+    Поле даты, хранящее строку из базы до первого обращения
+    
+    Оборачивает слот dataclass: from_row кладет в слот строку ISO,
+    а fromisoformat вызывается только при чтении поля
+    """
+    
+    __slots__ = ('slot',)
+    
+    def __init__(self, slot):
+        self.slot = slot
+    
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = self.slot.__get__(obj, owner)
+        if value.__class__ is str:
+            value = datetime.fromisoformat(value)
+            self.slot.__set__(obj, value)
+        return value
+    
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, value)
+
+
+def lazy_datetimes(*names: str):
+    """Декоратор слотового dataclass: поля names разбираются из строки лениво"""
+    def decorate(cls):
+        for name in names:
+            setattr(cls, name, _LazyDatetime(cls.__dict__[name]))
+        return cls
+    return decorate
+
+
+def _column_indexes(rows: list, columns: Iterable[str]) -> list:
+    """Позиции колонок в строках выборки (определяются один раз на выборку)"""
+    keys = rows[0].keys()
+    return [keys.index(column) for column in columns]
+
+
+@lazy_datetimes('due_date', 'reminder_time', 'created_at', 'updated_at')
+@dataclass(slots=True)
 class Task:
     """Модель задачи"""
     id: Optional[int] = None
@@ -18,6 +61,7 @@ class Task:
     reminder_time: Optional[datetime] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+    recurrence: Optional[str] = None  # правило RRULE, due_date - ближайшее повторение
     
     def to_dict(self) -> dict:
         """Конвертация задачи в словарь"""
@@ -34,6 +78,7 @@ class Task:
             'reminder_time': self.reminder_time.isoformat() if self.reminder_time else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'recurrence': self.recurrence,
         }
     
     @classmethod
@@ -46,16 +91,96 @@ class Task:
             description=row['description'],
             priority=row['priority'],
             status=row['status'],
-            due_date=datetime.fromisoformat(row['due_date']) if row['due_date'] else None,
+            due_date=row['due_date'] or None,
             google_event_id=row['google_event_id'],
             reminder_enabled=bool(row['reminder_enabled']),
-            reminder_time=datetime.fromisoformat(row['reminder_time']) if row['reminder_time'] else None,
-            created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None,
-            updated_at=datetime.fromisoformat(row['updated_at']) if row['updated_at'] else None,
+            reminder_time=row['reminder_time'] or None,
+            created_at=row['created_at'] or None,
+            updated_at=row['updated_at'] or None,
+            recurrence=row['recurrence'],
         )
+    
+    @classmethod
+    def from_rows(cls, rows: list) -> List['Task']:
+        """
+        Создание задач из выборки
+        
+        Позиции колонок определяются один раз, строки читаются по индексу
+        """
+        if not rows:
+            return []
+        
+        (id_, user_id, title, description, priority, status, due_date,
+         google_event_id, reminder_enabled, reminder_time, created_at, updated_at,
+         recurrence) = _column_indexes(rows, (
+            'id', 'user_id', 'title', 'description', 'priority', 'status', 'due_date',
+            'google_event_id', 'reminder_enabled', 'reminder_time', 'created_at', 'updated_at',
+            'recurrence',
+        ))
+        
+        return [
+            cls(
+                row[id_], row[user_id], row[title], row[description], row[priority], row[status],
+                row[due_date] or None, row[google_event_id], bool(row[reminder_enabled]),
+                row[reminder_time] or None, row[created_at] or None, row[updated_at] or None,
+                row[recurrence],
+            )
+            for row in rows
+        ]
 
 
-@dataclass
+@lazy_datetimes('due_date')
+@dataclass(slots=True)
+class TaskSummary:
+    """Краткая модель задачи для списков (без описания и служебных полей)"""
+    id: Optional[int] = None
+    user_id: Optional[int] = None
+    title: str = ""
+    priority: str = "medium"
+    status: str = "pending"
+    due_date: Optional[datetime] = None
+    
+    def to_dict(self) -> dict:
+        """Конвертация задачи в словарь"""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'title': self.title,
+            'priority': self.priority,
+            'status': self.status,
+            'due_date': self.due_date.isoformat() if self.due_date else None,
+        }
+    
+    @classmethod
+    def from_row(cls, row) -> 'TaskSummary':
+        """Создание задачи из строки базы данных"""
+        return cls(
+            id=row['id'],
+            user_id=row['user_id'],
+            title=row['title'],
+            priority=row['priority'],
+            status=row['status'],
+            due_date=row['due_date'] or None,
+        )
+    
+    @classmethod
+    def from_rows(cls, rows: list) -> List['TaskSummary']:
+        """Создание задач из выборки (колонки читаются по индексу)"""
+        if not rows:
+            return []
+        
+        id_, user_id, title, priority, status, due_date = _column_indexes(rows, (
+            'id', 'user_id', 'title', 'priority', 'status', 'due_date',
+        ))
+        
+        return [
+            cls(row[id_], row[user_id], row[title], row[priority], row[status], row[due_date] or None)
+            for row in rows
+        ]
+
+
+@lazy_datetimes('created_at')
+@dataclass(slots=True)
 class User:
     """Модель пользователя"""
     id: Optional[int] = None
@@ -82,11 +207,12 @@ class User:
             telegram_id=row['telegram_id'],
             username=row['username'],
             first_name=row['first_name'],
-            created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None,
+            created_at=row['created_at'] or None,
         )
 
 
-@dataclass
+@lazy_datetimes('reminder_time', 'created_at')
+@dataclass(slots=True)
 class Reminder:
     """Модель напоминания"""
     id: Optional[int] = None
@@ -114,7 +240,80 @@ class Reminder:
             id=row['id'],
             task_id=row['task_id'],
             user_id=row['user_id'],
-            reminder_time=datetime.fromisoformat(row['reminder_time']) if row['reminder_time'] else None,
+            reminder_time=row['reminder_time'] or None,
             is_sent=bool(row['is_sent']),
-            created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None,
+            created_at=row['created_at'] or None,
         )
+    
+    @classmethod
+    def from_rows(cls, rows: list) -> List['Reminder']:
+        """Создание напоминаний из выборки (колонки читаются по индексу)"""
+        if not rows:
+            return []
+        
+        id_, task_id, user_id, reminder_time, is_sent, created_at = _column_indexes(rows, (
+            'id', 'task_id', 'user_id', 'reminder_time', 'is_sent', 'created_at',
+        ))
+        
+        return [
+            cls(
+                row[id_], row[task_id], row[user_id], row[reminder_time] or None,
+                bool(row[is_sent]), row[created_at] or None,
+            )
+            for row in rows
+        ]
+
+
+@dataclass(slots=True)
+class CalendarJob:
+    """Операция синхронизации с Google Calendar из очереди calendar_outbox"""
+    id: Optional[int] = None
+    task_id: Optional[int] = None
+    user_id: Optional[int] = None
+    operation: str = "create"  # create, delete
+    payload: dict = field(default_factory=dict)
+    attempts: int = 0
+    
+    @classmethod
+    def from_row(cls, row) -> 'CalendarJob':
+        """Создание операции из строки базы данных"""
+        return cls(
+            id=row['id'],
+            task_id=row['task_id'],
+            user_id=row['user_id'],
+            operation=row['operation'],
+            payload=json.loads(row['payload']),
+            attempts=row['attempts'],
+        )
+
+
+@dataclass(slots=True)
+class TaskStats:
+    """Статистика задач пользователя"""
+    total: int = 0
+    pending: int = 0
+    completed: int = 0
+    overdue: int = 0
+    
+    @property
+    def completion_rate(self) -> float:
+        """Процент выполненных задач"""
+        return self.completed / self.total * 100 if self.total else 0.0
+
+
+@dataclass(slots=True)
+class TaskPage:
+    """Страница списка задач"""
+    tasks: List[Union[Task, TaskSummary]] = field(default_factory=list)
+    has_prev: bool = False
+    has_next: bool = False
+    
+    @property
+    def first_id(self) -> Optional[int]:
+        """Курсор для перехода на предыдущую страницу"""
+        return self.tasks[0].id if self.tasks else None
+    
+    @property
+    def last_id(self) -> Optional[int]:
+        """Курсор для перехода на следующую страницу"""
+        return self.tasks[-1].id if self.tasks else None
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List
+import pytz
+from config.settings import (
+    TIMEZONE, CALENDAR_MIRROR_INTERVAL, CALENDAR_MIRROR_MAX_STALENESS, CALENDAR_MIRROR_HORIZON_DAYS
+)
+from db.database import db
+from db.repositories import CalendarEventRepository, JobStateRepository
+from services.google_calendar import google_calendar
+
+logger = logging.getLogger(__name__)
+
+# Токен инкрементальной синхронизации в job_state
+SYNC_TOKEN_STATE = 'calendar_sync_token'
+# Конец периода полной синхронизации (start_utc), к которому относится токен
+SYNC_HORIZON_STATE = 'calendar_sync_horizon'
+
+
+def _http_status(error: Exception) -> Optional[int]:
+    """HTTP статус ошибки Google API (если есть)"""
+    resp = getattr(error, 'resp', None)
+    return getattr(resp, 'status', None)
+
+
+def start_utc(start: dict) -> str:
+    """Начало события в UTC (ISO без смещения) для сортировки и выборки по периоду"""
+    if 'dateTime' in start:
+        moment = datetime.fromisoformat(start['dateTime'])
+    else:
+        # Событие на весь день
+        moment = datetime.fromisoformat(start['date'])
+    
+    if moment.tzinfo is None:
+        moment = pytz.timezone(start.get('timeZone', TIMEZONE)).localize(moment)
+    
+    return moment.astimezone(timezone.utc).replace(tzinfo=None).isoformat()
+
+
+class CalendarMirror:
+    """
+    Локальная копия событий Google Calendar
+    
+    Фоновая задача раз в interval секунд забирает только изменения
+    (events.list с syncToken) и применяет их к таблице calendar_events.
+    Просмотр календаря читает локальную таблицу; если данные старше
+    max_staleness, перед чтением выполняется синхронизация.
+    
+    Полная синхронизация забирает события только до горизонта
+    horizon_days: бесконечные серии не разворачиваются в бесконечное
+    число строк. Токен привязан к периоду полной синхронизации, поэтому
+    когда до горизонта остается меньше половины, копия синхронизируется
+    полностью заново.
+    """
+    
+    def __init__(
+        self,
+        calendar=google_calendar,
+        interval: float = CALENDAR_MIRROR_INTERVAL,
+        max_staleness: float = CALENDAR_MIRROR_MAX_STALENESS,
+        horizon_days: int = CALENDAR_MIRROR_HORIZON_DAYS
+    ):
+        self.calendar = calendar
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self.horizon_days = horizon_days
+        self.synced_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.full_syncs = 0
+        self.incremental_syncs = 0
+        self.changes = 0
+    
+    def start(self):
+        """Запуск фоновой синхронизации"""
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Остановка фоновой синхронизации"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self):
+        """Цикл синхронизации"""
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error(f"Ошибка синхронизации календаря: {e}")
+            await asyncio.sleep(self.interval)
+    
+    @property
+    def staleness(self) -> float:
+        """Возраст локальных данных в секундах"""
+        if self.synced_at is None:
+            return float('inf')
+        return time.monotonic() - self.synced_at
+    
+    async def sync(self):
+        """Применение изменений календаря к локальной копии"""
+        if not self.calendar.enabled:
+            return
+        
+        async with self._lock:
+            started = time.monotonic()
+            now = datetime.now(timezone.utc)
+            sync_token = await JobStateRepository.get(SYNC_TOKEN_STATE)
+            horizon = await JobStateRepository.get(SYNC_HORIZON_STATE)
+            
+            refresh_at = now + timedelta(days=self.horizon_days / 2)
+            if sync_token and (not horizon or horizon < refresh_at.replace(tzinfo=None).isoformat()):
+                logger.info("Горизонт копии календаря подходит к концу, полная синхронизация")
+                sync_token = None
+            
+            if sync_token:
+                try:
+                    items, next_token = await self.calendar.list_event_changes(sync_token=sync_token)
+                except Exception as e:
+                    if _http_status(e) != 410:
+                        raise
+                    # Токен устарел - нужна полная синхронизация
+                    logger.info("Токен синхронизации календаря устарел, полная синхронизация")
+                    sync_token = None
+            
+            full = sync_token is None
+            if full:
+                time_max = now + timedelta(days=self.horizon_days)
+                horizon = time_max.replace(tzinfo=None).isoformat()
+                items, next_token = await self.calendar.list_event_changes(
+                    time_min=now - timedelta(days=1),
+                    time_max=time_max
+                )
+            
+            changed, removed = [], []
+            for item in items:
+                if item.get('status') == 'cancelled' or not item.get('start'):
+                    removed.append(item['id'])
+                    continue
+                
+                item = {**item, 'start_utc': start_utc(item['start'])}
+                # Событие, перенесенное за горизонт, удаляется из копии по id
+                if item['start_utc'] < horizon:
+                    changed.append(item)
+                else:
+                    removed.append(item['id'])
+            
+            async with db.transaction():
+                if full:
+                    await CalendarEventRepository.clear()
+                await CalendarEventRepository.upsert_many(changed)
+                await CalendarEventRepository.delete_many(removed)
+                if next_token:
+                    await JobStateRepository.set(SYNC_TOKEN_STATE, next_token)
+                if full:
+                    await JobStateRepository.set(SYNC_HORIZON_STATE, horizon)
+            
+            if full:
+                self.full_syncs += 1
+            else:
+                self.incremental_syncs += 1
+            self.changes += len(items)
+            self.synced_at = started
+    
+    async def get_events(self, days: int = 7, limit: int = 10) -> List[dict]:
+        """
+        События на ближайшие days дней из локальной копии
+        
+        Если копия старше max_staleness, сначала синхронизируется;
+        при ошибке синхронизации возвращаются имеющиеся данные.
+        """
+        if self.staleness > self.max_staleness:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error(f"Ошибка синхронизации календаря: {e}")
+        
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return await CalendarEventRepository.get_range(
+            now.isoformat(), (now + timedelta(days=days)).isoformat(), limit
+        )
+    
+    def get_stats(self) -> dict:
+        """Метрики синхронизации"""
+        return {
+            'full_syncs': self.full_syncs,
+            'incremental_syncs': self.incremental_syncs,
+            'changes': self.changes,
+            'staleness': round(self.staleness, 1) if self.synced_at else None,
+        }
+
+
+# Глобальный экземпляр локальной копии календаря
+calendar_mirror = CalendarMirror()
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Optional, List
+from config.settings import (
+    CALENDAR_SYNC_BATCH_SIZE, CALENDAR_SYNC_INTERVAL,
+    CALENDAR_SYNC_MAX_ATTEMPTS, CALENDAR_SYNC_LEASE_SECONDS
+)
+from db.repositories import TaskRepository, CalendarOutboxRepository
+from models.task import CalendarJob
+from services.google_calendar import google_calendar
+
+logger = logging.getLogger(__name__)
+
+# Максимальная задержка повтора операции (сек)
+MAX_RETRY_DELAY = 3600
+
+
+def _http_status(error: Exception) -> Optional[int]:
+    """HTTP статус ошибки Google API (если есть)"""
+    resp = getattr(error, 'resp', None)
+    return getattr(resp, 'status', None)
+
+
+class CalendarSyncWorker:
+    """
+    Фоновая отправка операций из calendar_outbox в Google Calendar
+    
+    Хендлеры только записывают операцию в одной транзакции с задачей
+    и будят воркер. Воркер забирает до batch_size наступивших операций,
+    отправляет их одним batch HTTP запросом и записывает google_event_id
+    созданных событий. Ошибки повторяются с экспоненциальной задержкой.
+    """
+    
+    def __init__(
+        self,
+        calendar=google_calendar,
+        batch_size: int = CALENDAR_SYNC_BATCH_SIZE,
+        interval: float = CALENDAR_SYNC_INTERVAL,
+        max_attempts: int = CALENDAR_SYNC_MAX_ATTEMPTS,
+        lease_seconds: int = CALENDAR_SYNC_LEASE_SECONDS
+    ):
+        self.calendar = calendar
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.synced = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+    
+    def start(self):
+        """Запуск воркера"""
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Остановка воркера (незавершенные операции останутся в очереди)"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def notify(self):
+        """Пробуждение воркера после добавления операции"""
+        self._wakeup.set()
+    
+    async def _run(self):
+        """Цикл отправки"""
+        while True:
+            try:
+                processed = await self.sync_once()
+            except Exception as e:
+                logger.error(f"Ошибка синхронизации с Google Calendar: {e}")
+                processed = 0
+            
+            # Полная пачка - в очереди, вероятно, есть еще операции
+            if processed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+    
+    async def sync_once(self) -> int:
+        """
+        Отправка одной пачки операций
+        
+        Returns:
+            Количество забранных из очереди операций
+        """
+        if not self.calendar.enabled:
+            return 0
+        
+        jobs = await CalendarOutboxRepository.claim_due(self.batch_size, self.lease_seconds)
+        if not jobs:
+            return 0
+        
+        claimed = len(jobs)
+        jobs = await self._coalesce(jobs)
+        
+        try:
+            results = await self.calendar.execute_batch([
+                (job.operation, job.payload if job.operation == 'create' else job.payload['event_id'])
+                for job in jobs
+            ])
+        except Exception as e:
+            for job in jobs:
+                await self._retry(job, e)
+            return claimed
+        
+        self.batches += 1
+        done = []
+        
+        for job, (response, error) in zip(jobs, results):
+            # Событие уже удалено в календаре - удаление выполнено
+            if error is not None and not (job.operation == 'delete' and _http_status(error) in (404, 410)):
+                await self._retry(job, error)
+                continue
+            
+            if job.operation == 'create':
+                event_id = response['id']
+                if not await TaskRepository.set_google_event_id(job.task_id, job.user_id, event_id):
+                    # Задачу удалили, пока событие создавалось
+                    await CalendarOutboxRepository.enqueue(job.task_id, job.user_id, 'delete', {'event_id': event_id})
+            
+            done.append(job.id)
+            self.synced += 1
+        
+        await CalendarOutboxRepository.complete(done)
+        return claimed
+    
+    async def _coalesce(self, jobs: List[CalendarJob]) -> List[CalendarJob]:
+        """Удаление повторяющихся операций из пачки"""
+        unique, duplicates = {}, []
+        for job in jobs:
+            key = (job.operation, job.task_id if job.operation == 'create' else job.payload['event_id'])
+            if key in unique:
+                duplicates.append(job.id)
+            else:
+                unique[key] = job
+        
+        await CalendarOutboxRepository.complete(duplicates)
+        return list(unique.values())
+    
+    async def _retry(self, job: CalendarJob, error: Exception):
+        """Повтор операции с экспоненциальной задержкой"""
+        attempts = job.attempts + 1
+        
+        # Некорректный запрос не исправится повтором
+        if attempts >= self.max_attempts or _http_status(error) == 400:
+            self.failed += 1
+            logger.error(f"Операция календаря #{job.id} ({job.operation}) не выполнена: {error}")
+            await CalendarOutboxRepository.reschedule(job.id, attempts, None, str(error))
+            return
+        
+        self.retries += 1
+        delay = min(self.interval * 2 ** attempts, MAX_RETRY_DELAY) * random.uniform(0.5, 1)
+        await CalendarOutboxRepository.reschedule(
+            job.id, attempts, datetime.now() + timedelta(seconds=delay), str(error)
+        )
+    
+    def get_stats(self) -> dict:
+        """Метрики синхронизации"""
+        return {
+            'synced': self.synced,
+            'failed': self.failed,
+            'retries': self.retries,
+            'batches': self.batches,
+        }
+
+
+# Глобальный экземпляр воркера синхронизации
+calendar_sync = CalendarSyncWorker()
@@ -1,42 +1,238 @@
 import asyncio
+import bisect
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, List
-from google.oauth2.credentials import Credentials
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+from typing import Optional, List, Callable, Any
 from googleapiclient.errors import HttpError
-from config.settings import GOOGLE_CREDENTIALS_FILE, GOOGLE_CALENDAR_ID, TIMEZONE
+from config.settings import (
+    GOOGLE_CREDENTIALS_FILE, GOOGLE_CALENDAR_ID, TIMEZONE,
+    GOOGLE_CALENDAR_THREADS, GOOGLE_CALENDAR_MAX_CONCURRENT, GOOGLE_CALENDAR_TIMEOUT
+)
 
 
-class GoogleCalendarService:
-    """Сервис для интеграции с Google Calendar API"""
+class LatencyHistogram:
+    """Гистограмма длительности вызовов API (границы корзин в секундах)"""
+    
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
     
     def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+    
+    def observe(self, seconds: float, error: bool = False):
+        """Учет одного вызова"""
+        self.counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if error:
+            self.errors += 1
+    
+    @property
+    def count(self) -> int:
+        """Количество вызовов"""
+        return sum(self.counts)
+    
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля по верхней границе корзины"""
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.BUCKETS, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.max
+    
+    def to_dict(self) -> dict:
+        """Конвертация метрик в словарь"""
+        count = self.count
+        return {
+            'count': count,
+            'errors': self.errors,
+            'avg_ms': round(self.total / count * 1000, 1) if count else 0.0,
+            'p50_ms': round(self.quantile(0.5) * 1000) if count else 0,
+            'p95_ms': round(self.quantile(0.95) * 1000) if count else 0,
+            'max_ms': round(self.max * 1000, 1),
+        }
+
+
+class GoogleCalendarService:
+    """
+    Сервис для интеграции с Google Calendar API
+    
+    Блокирующие вызовы выполняются в собственном пуле потоков, чтобы
+    не занимать общий executor. httplib2 не потокобезопасен, поэтому
+    у каждого потока свой авторизованный клиент с постоянным соединением.
+    Одновременных вызовов не больше max_concurrent, каждый ограничен timeout.
+    
+    Клиент создается лениво: при первом вызове API или заранее в фоне
+    через initialize() при запуске бота. Описание API берется из
+    документов, поставляемых с googleapiclient, без сетевого запроса.
+    """
+    
+    def __init__(
+        self,
+        threads: int = GOOGLE_CALENDAR_THREADS,
+        max_concurrent: int = GOOGLE_CALENDAR_MAX_CONCURRENT,
+        timeout: float = GOOGLE_CALENDAR_TIMEOUT
+    ):
         self.service = None
+        self.credentials = None
         self.calendar_id = GOOGLE_CALENDAR_ID
-        self._initialize_service()
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='google-calendar')
+        self._slots = asyncio.Semaphore(max_concurrent or threads)
+        self._local = threading.local()
+        self.latency: dict[str, LatencyHistogram] = {}
+        self._initialized = False
+        self._init_lock = threading.Lock()
+    
+    async def initialize(self):
+        """Создание клиента в пуле потоков календаря (не блокирует event loop)"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._ensure_initialized)
+    
+    def _ensure_initialized(self):
+        """Однократная инициализация (вызывается из потоков пула)"""
+        if self._initialized:
+            return
+        
+        with self._init_lock:
+            if not self._initialized:
+                self._initialize_service()
+                # Клиент, созданный при инициализации, используется этим потоком
+                self._local.service = self.service
+                self._initialized = True
     
     def _initialize_service(self):
         """Инициализация сервиса Google Calendar"""
+        from google.oauth2 import service_account
+        
         try:
             # Попытка загрузить учетные данные сервисного аккаунта
-            credentials = service_account.Credentials.from_service_account_file(
+            self.credentials = service_account.Credentials.from_service_account_file(
                 GOOGLE_CREDENTIALS_FILE,
                 scopes=['https://www.googleapis.com/auth/calendar']
             )
-            self.service = build('calendar', 'v3', credentials=credentials)
+            self.service = self._build_service()
         except FileNotFoundError:
             print(f"Файл {GOOGLE_CREDENTIALS_FILE} не найден. Google Calendar интеграция будет недоступна.")
         except Exception as e:
             print(f"Ошибка инициализации Google Calendar: {e}")
     
+    def _build_service(self):
+        """Клиент Calendar API с собственным HTTP подключением"""
+        import httplib2
+        from google_auth_httplib2 import AuthorizedHttp
+        from googleapiclient.discovery import build
+        
+        http = AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=self.timeout))
+        return build('calendar', 'v3', http=http, static_discovery=True, cache_discovery=False)
+    
+    def _thread_service(self):
+        """Клиент текущего потока пула (создается при первом вызове в потоке)"""
+        self._ensure_initialized()
+        if self.service is None:
+            raise RuntimeError("Google Calendar не настроен")
+        
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            service = self._local.service = self._build_service()
+        return service
+    
+    async def _call(self, operation: str, request: Callable[[Any], Any]) -> Any:
+        """
+        Выполнение запроса в пуле потоков календаря
+        
+        Args:
+            operation: имя операции для метрик (insert, get, update, delete, list, batch)
+            request: функция, выполняющая запрос через переданный клиент потока
+        """
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            started = time.perf_counter()
+            error = False
+            try:
+                return await asyncio.wait_for(
+                    loop.run_in_executor(self._executor, lambda: request(self._thread_service())),
+                    self.timeout
+                )
+            except BaseException:
+                error = True
+                raise
+            finally:
+                self.latency.setdefault(operation, LatencyHistogram()).observe(time.perf_counter() - started, error)
+    
+    def get_stats(self) -> dict:
+        """Метрики вызовов API по операциям"""
+        return {operation: histogram.to_dict() for operation, histogram in self.latency.items()}
+    
+    def close(self):
+        """Остановка пула потоков"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    @property
+    def enabled(self) -> bool:
+        """Настроена ли интеграция с календарем (до инициализации - есть ли файл ключа)"""
+        if self._initialized:
+            return self.service is not None
+        return os.path.exists(GOOGLE_CREDENTIALS_FILE)
+    
+    @staticmethod
+    def build_event_body(
+        title: str,
+        description: str = "",
+        start_time: datetime = None,
+        end_time: datetime = None,
+        reminder_minutes: int = 15,
+        recurrence: Optional[str] = None
+    ) -> dict:
+        """
+        Тело события для events.insert
+        
+        С recurrence (правило RRULE) создается одно повторяющееся событие
+        """
+        # Время по умолчанию
+        if start_time is None:
+            start_time = datetime.now()
+        if end_time is None:
+            end_time = start_time + timedelta(hours=1)
+        
+        event = {
+            'summary': title,
+            'description': description,
+            'start': {
+                'dateTime': start_time.isoformat(),
+                'timeZone': TIMEZONE,
+            },
+            'end': {
+                'dateTime': end_time.isoformat(),
+                'timeZone': TIMEZONE,
+            },
+            'reminders': {
+                'useDefault': False,
+                'overrides': [
+                    {'method': 'popup', 'minutes': reminder_minutes},
+                    {'method': 'email', 'minutes': reminder_minutes * 2},
+                ],
+            },
+        }
+        if recurrence:
+            event['recurrence'] = [f'RRULE:{recurrence}']
+        return event
+    
     async def create_event(
         self,
         title: str,
         description: str = "",
         start_time: datetime = None,
         end_time: datetime = None,
-        reminder_minutes: int = 15
+        reminder_minutes: int = 15,
+        recurrence: Optional[str] = None
     ) -> Optional[str]:
         """
         Создание события в Google Calendar
@@ -44,41 +240,16 @@ class GoogleCalendarService:
         Returns:
             ID созданного события или None в случае ошибки
         """
-        if not self.service:
+        if not self.enabled:
             return None
         
         try:
-            # Время по умолчанию
-            if start_time is None:
-                start_time = datetime.now()
-            if end_time is None:
-                end_time = start_time + timedelta(hours=1)
+            event = self.build_event_body(title, description, start_time, end_time, reminder_minutes, recurrence)
             
-            event = {
-                'summary': title,
-                'description': description,
-                'start': {
-                    'dateTime': start_time.isoformat(),
-                    'timeZone': TIMEZONE,
-                },
-                'end': {
-                    'dateTime': end_time.isoformat(),
-                    'timeZone': TIMEZONE,
-                },
-                'reminders': {
-                    'useDefault': False,
-                    'overrides': [
-                        {'method': 'popup', 'minutes': reminder_minutes},
-                        {'method': 'email', 'minutes': reminder_minutes * 2},
-                    ],
-                },
-            }
-            
-            # Выполнение запроса в отдельном потоке (блокирующая операция)
-            loop = asyncio.get_event_loop()
-            created_event = await loop.run_in_executor(
-                None,
-                lambda: self.service.events().insert(
+            # Выполнение запроса в пуле потоков календаря (блокирующая операция)
+            created_event = await self._call(
+                'insert',
+                lambda service: service.events().insert(
                     calendarId=self.calendar_id,
                     body=event
                 ).execute()
@@ -102,15 +273,14 @@ class GoogleCalendarService:
         end_time: datetime = None
     ) -> bool:
         """Обновление события в Google Calendar"""
-        if not self.service:
+        if not self.enabled:
             return False
         
         try:
             # Получение текущего события
-            loop = asyncio.get_event_loop()
-            event = await loop.run_in_executor(
-                None,
-                lambda: self.service.events().get(
+            event = await self._call(
+                'get',
+                lambda service: service.events().get(
                     calendarId=self.calendar_id,
                     eventId=event_id
                 ).execute()
@@ -127,9 +297,9 @@ class GoogleCalendarService:
                 event['end']['dateTime'] = end_time.isoformat()
             
             # Сохранение изменений
-            await loop.run_in_executor(
-                None,
-                lambda: self.service.events().update(
+            await self._call(
+                'update',
+                lambda service: service.events().update(
                     calendarId=self.calendar_id,
                     eventId=event_id,
                     body=event
@@ -147,14 +317,13 @@ class GoogleCalendarService:
     
     async def delete_event(self, event_id: str) -> bool:
         """Удаление события из Google Calendar"""
-        if not self.service:
+        if not self.enabled:
             return False
         
         try:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None,
-                lambda: self.service.events().delete(
+            await self._call(
+                'delete',
+                lambda service: service.events().delete(
                     calendarId=self.calendar_id,
                     eventId=event_id
                 ).execute()
@@ -168,6 +337,36 @@ class GoogleCalendarService:
             print(f"Неизвестная ошибка удаления события: {e}")
             return False
     
+    async def execute_batch(self, operations: List[tuple[str, object]]) -> List[tuple[Optional[dict], Optional[Exception]]]:
+        """
+        Выполнение операций одним batch HTTP запросом (до 50 операций)
+        
+        Args:
+            operations: ('create', тело события) или ('delete', ID события)
+        
+        Returns:
+            (ответ, ошибка) для каждой операции в порядке operations.
+            Ошибка всего запроса (сеть, авторизация) пробрасывается.
+        """
+        results: List[tuple[Optional[dict], Optional[Exception]]] = [(None, None)] * len(operations)
+        
+        def on_response(request_id, response, exception):
+            results[int(request_id)] = (response, exception)
+        
+        def execute(service):
+            batch = service.new_batch_http_request(callback=on_response)
+            events = service.events()
+            for index, (operation, argument) in enumerate(operations):
+                if operation == 'create':
+                    request = events.insert(calendarId=self.calendar_id, body=argument)
+                else:
+                    request = events.delete(calendarId=self.calendar_id, eventId=argument)
+                batch.add(request, request_id=str(index))
+            batch.execute()
+        
+        await self._call('batch', execute)
+        return results
+    
     async def get_events(
         self,
         start_date: datetime = None,
@@ -175,7 +374,7 @@ class GoogleCalendarService:
         max_results: int = 10
     ) -> List[dict]:
         """Получение списка событий из календаря"""
-        if not self.service:
+        if not self.enabled:
             return []
         
         try:
@@ -184,10 +383,9 @@ class GoogleCalendarService:
             if end_date is None:
                 end_date = start_date + timedelta(days=7)
             
-            loop = asyncio.get_event_loop()
-            events_result = await loop.run_in_executor(
-                None,
-                lambda: self.service.events().list(
+            events_result = await self._call(
+                'list',
+                lambda service: service.events().list(
                     calendarId=self.calendar_id,
                     timeMin=start_date.isoformat() + 'Z',
                     timeMax=end_date.isoformat() + 'Z',
@@ -216,6 +414,46 @@ class GoogleCalendarService:
         except Exception as e:
             print(f"Неизвестная ошибка получения событий: {e}")
             return []
+    
+    async def list_event_changes(
+        self,
+        sync_token: Optional[str] = None,
+        time_min: datetime = None,
+        time_max: datetime = None
+    ) -> tuple[List[dict], Optional[str]]:
+        """
+        Инкрементальная выборка событий (events.list с syncToken)
+        
+        Без sync_token выполняется полная выборка событий в периоде
+        [time_min, time_max); повторяющиеся события разворачиваются
+        в экземпляры только внутри него. Удаленные события приходят
+        со status='cancelled'. Ошибки пробрасываются: HttpError 410
+        означает, что токен устарел и нужна полная синхронизация.
+        
+        Returns:
+            (измененные события, токен для следующей выборки)
+        """
+        def execute(service):
+            items, page_token = [], None
+            while True:
+                params = {'calendarId': self.calendar_id, 'singleEvents': True, 'maxResults': 250}
+                if sync_token:
+                    params['syncToken'] = sync_token
+                else:
+                    if time_min:
+                        params['timeMin'] = time_min.isoformat()
+                    if time_max:
+                        params['timeMax'] = time_max.isoformat()
+                if page_token:
+                    params['pageToken'] = page_token
+                
+                result = service.events().list(**params).execute()
+                items.extend(result.get('items', []))
+                page_token = result.get('nextPageToken')
+                if not page_token:
+                    return items, result.get('nextSyncToken')
+        
+        return await self._call('list', execute)
 
 
 # Глобальный экземпляр сервиса
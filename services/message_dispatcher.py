@@ -0,0 +1,307 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional, Callable, Awaitable
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter, TelegramNetworkError, TelegramServerError
+from config.settings import (
+    TELEGRAM_SEND_RATE, TELEGRAM_PER_CHAT_INTERVAL,
+    TELEGRAM_SEND_WORKERS, TELEGRAM_SEND_QUEUE_SIZE, TELEGRAM_CHAT_BACKLOG
+)
+
+logger = logging.getLogger(__name__)
+
+# Колбэк, вызываемый после успешной или неудачной отправки
+SendCallback = Optional[Callable[[], Awaitable[None]]]
+
+
+@dataclass
+class OutgoingMessage:
+    """Сообщение в очереди на отправку"""
+    chat_id: int
+    text: str
+    kwargs: dict = field(default_factory=dict)
+    on_sent: SendCallback = None
+    on_failed: SendCallback = None
+    attempts: int = 0
+    done: Optional[asyncio.Future] = None
+    expires_at: Optional[float] = None
+
+
+class TokenBucket:
+    """Ограничитель скорости: rate токенов в секунду с запасом capacity"""
+    
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+    
+    def pause(self, seconds: float):
+        """Пауза после RetryAfter от Telegram"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+    
+    async def acquire(self):
+        """Ожидание свободного токена"""
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class MessageDispatcher:
+    """
+    Очередь исходящих сообщений Telegram
+    
+    Фоновые задачи кладут сообщения в очередь, а пул воркеров
+    отправляет их с глобальным лимитом скорости и не чаще одного
+    сообщения в per_chat_interval секунд в один чат. Сообщение
+    в занятый чат воркер не ждет, а откладывает в очередь этого чата,
+    которую по порядку отправляет отдельная задача; токен лимита
+    берется непосредственно перед отправкой. При RetryAfter отправка
+    приостанавливается на указанное Telegram время.
+    
+    Сообщение занимает место до своей отправки: send ждет, пока
+    неотправленных сообщений больше queue_size всего или chat_backlog
+    в этот чат. Сообщение, не отправленное за ttl секунд, не
+    отправляется, вызывается on_failed.
+    """
+    
+    def __init__(
+        self,
+        rate: float = TELEGRAM_SEND_RATE,
+        per_chat_interval: float = TELEGRAM_PER_CHAT_INTERVAL,
+        workers: int = TELEGRAM_SEND_WORKERS,
+        queue_size: int = TELEGRAM_SEND_QUEUE_SIZE,
+        chat_backlog: int = TELEGRAM_CHAT_BACKLOG,
+        max_attempts: int = 5
+    ):
+        self.bucket = TokenBucket(rate)
+        self.per_chat_interval = per_chat_interval
+        self.workers_count = workers
+        self.max_attempts = max_attempts
+        self.queue_size = queue_size
+        self.chat_backlog = chat_backlog
+        self.queue: asyncio.Queue[OutgoingMessage] = asyncio.Queue()
+        self.bot: Optional[Bot] = None
+        self._workers: list[asyncio.Task] = []
+        self._chat_next_send: dict[int, float] = {}
+        self._chat_backlog: dict[int, deque] = {}
+        self._chat_senders: set[asyncio.Task] = set()
+        # Неотправленные сообщения (всего и по чатам) и ожидание места для send
+        self._pending = 0
+        self._chat_pending: dict[int, int] = {}
+        self._room = asyncio.Condition()
+        self._sent_times: deque = deque()
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.expired = 0
+    
+    def start(self, bot: Bot):
+        """Запуск пула воркеров"""
+        self.bot = bot
+        self._workers = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.workers_count)
+        ]
+    
+    async def stop(self, timeout: float = 10):
+        """Остановка с дожиданием отправки оставшихся сообщений"""
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Не отправлено сообщений при остановке: {self.queue.qsize()}")
+        
+        for task in (*self._workers, *self._chat_senders):
+            task.cancel()
+        self._workers = []
+    
+    async def send(
+        self,
+        chat_id: int,
+        text: str,
+        on_sent: SendCallback = None,
+        on_failed: SendCallback = None,
+        ttl: float = None,
+        **kwargs
+    ) -> asyncio.Future:
+        """
+        Постановка сообщения в очередь
+        
+        Ждет, если очередь или очередь чата заполнена. on_sent/on_failed
+        вызываются воркером после отправки или окончательной ошибки;
+        сообщение, не отправленное за ttl секунд, считается ошибкой.
+        
+        Returns:
+            Future, завершающийся после обработки сообщения
+        """
+        async with self._room:
+            await self._room.wait_for(
+                lambda: self._pending < self.queue_size
+                and self._chat_pending.get(chat_id, 0) < self.chat_backlog
+            )
+            self._pending += 1
+            self._chat_pending[chat_id] = self._chat_pending.get(chat_id, 0) + 1
+        
+        done = asyncio.get_running_loop().create_future()
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self.queue.put_nowait(OutgoingMessage(
+            chat_id, text, kwargs, on_sent, on_failed, done=done, expires_at=expires_at
+        ))
+        return done
+    
+    async def _worker(self):
+        """Воркер отправки сообщений"""
+        while True:
+            message = await self.queue.get()
+            chat_id = message.chat_id
+            
+            # Занятый чат не задерживает воркер: сообщение уходит в очередь чата
+            backlog = self._chat_backlog.get(chat_id)
+            if backlog is not None:
+                backlog.append(message)
+                continue
+            if self._chat_next_send.get(chat_id, 0) > time.monotonic():
+                self._chat_backlog[chat_id] = deque([message])
+                sender = asyncio.create_task(self._drain_chat(chat_id))
+                self._chat_senders.add(sender)
+                sender.add_done_callback(self._chat_senders.discard)
+                continue
+            
+            await self._process(message)
+    
+    async def _drain_chat(self, chat_id: int):
+        """Отправка отложенных сообщений одного чата по порядку"""
+        backlog = self._chat_backlog[chat_id]
+        try:
+            while backlog:
+                await self._process(backlog.popleft())
+        finally:
+            del self._chat_backlog[chat_id]
+    
+    async def _process(self, message: OutgoingMessage):
+        """Отправка сообщения и отметка его обработки в очереди"""
+        try:
+            await self._deliver(message)
+        except Exception as e:
+            logger.error(f"Ошибка в обработчике отправки сообщения: {e}")
+        finally:
+            if message.done and not message.done.done():
+                message.done.set_result(None)
+            await self._release(message.chat_id)
+            self.queue.task_done()
+    
+    async def _release(self, chat_id: int):
+        """Освобождение места обработанного сообщения"""
+        async with self._room:
+            self._pending -= 1
+            self._chat_pending[chat_id] -= 1
+            if not self._chat_pending[chat_id]:
+                del self._chat_pending[chat_id]
+            self._room.notify_all()
+    
+    async def _deliver(self, message: OutgoingMessage):
+        """Отправка одного сообщения с учетом лимитов и повторов"""
+        while True:
+            # Сначала слот чата, затем токен - токены не тратятся на ожидание чата
+            await self._wait_for_chat(message.chat_id)
+            
+            # Срок истек (например, аренда напоминания) - отправит другой обработчик
+            if message.expires_at is not None and time.monotonic() > message.expires_at:
+                self.expired += 1
+                logger.warning(f"Истек срок отправки сообщения в чат {message.chat_id}")
+                if message.on_failed:
+                    await message.on_failed()
+                return
+            
+            await self.bucket.acquire()
+            message.attempts += 1
+            
+            try:
+                await self.bot.send_message(chat_id=message.chat_id, text=message.text, **message.kwargs)
+            except TelegramRetryAfter as e:
+                self.retries += 1
+                logger.warning(f"Flood limit Telegram, пауза {e.retry_after} сек")
+                self.bucket.pause(e.retry_after)
+                if message.attempts < self.max_attempts:
+                    continue
+                await self._failed(message, e)
+                return
+            except (TelegramNetworkError, TelegramServerError) as e:
+                self.retries += 1
+                if message.attempts < self.max_attempts:
+                    await asyncio.sleep(2 ** message.attempts)
+                    continue
+                await self._failed(message, e)
+                return
+            except Exception as e:
+                await self._failed(message, e)
+                return
+            
+            self._record_sent()
+            if message.on_sent:
+                await message.on_sent()
+            return
+    
+    async def _wait_for_chat(self, chat_id: int):
+        """Соблюдение интервала между сообщениями в один чат"""
+        now = time.monotonic()
+        next_send = self._chat_next_send.get(chat_id, now)
+        self._chat_next_send[chat_id] = max(now, next_send) + self.per_chat_interval
+        
+        if next_send > now:
+            await asyncio.sleep(next_send - now)
+        
+        # Очистка устаревших записей
+        if len(self._chat_next_send) > 10000:
+            self._chat_next_send = {
+                chat: moment for chat, moment in self._chat_next_send.items()
+                if moment > now
+            }
+    
+    async def _failed(self, message: OutgoingMessage, error: Exception):
+        """Обработка окончательной ошибки отправки"""
+        self.failed += 1
+        logger.error(f"Ошибка отправки сообщения в чат {message.chat_id}: {error}")
+        if message.on_failed:
+            await message.on_failed()
+    
+    def _record_sent(self):
+        """Учет отправленного сообщения для расчета пропускной способности"""
+        now = time.monotonic()
+        self.sent += 1
+        self._sent_times.append(now)
+        while self._sent_times and self._sent_times[0] < now - 60:
+            self._sent_times.popleft()
+    
+    def get_stats(self) -> dict:
+        """Метрики очереди отправки"""
+        return {
+            'queue_depth': self.queue.qsize(),
+            'deferred': sum(len(backlog) for backlog in self._chat_backlog.values()),
+            'pending': self._pending,
+            'sent': self.sent,
+            'failed': self.failed,
+            'retries': self.retries,
+            'expired': self.expired,
+            'throughput_per_min': len(self._sent_times),
+        }
+
+
+# Глобальный экземпляр очереди отправки
+message_dispatcher = MessageDispatcher()
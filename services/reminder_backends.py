@@ -0,0 +1,554 @@
+import asyncio
+import json
+import math
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Optional, List
+
+# Очередь: sorted set из id напоминаний (score - timestamp), данные - в отдельном hash
+QUEUE_KEY = 'reminders_queue'
+PAYLOAD_KEY = 'reminders_payload'
+WAKEUP_CHANNEL = 'reminders_wakeup'
+
+# Забранные воркером напоминания: sorted set на воркер (score - срок аренды)
+PROCESSING_KEY_PREFIX = 'reminders_processing:'
+WORKERS_KEY = 'reminders_workers'
+
+# Атомарный захват наступивших напоминаний: каждое достается ровно одному воркеру
+# и переносится в его processing-set со сроком аренды. Id без данных в hash
+# (запись потеряна) просто удаляется из очереди и не арендуется - иначе
+# после истечения аренды он возвращался бы в очередь бесконечно;
+# неотправленное напоминание восстановит сверка с SQLite
+CLAIM_DUE_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #ids == 0 then
+    return {}
+end
+redis.call('ZREM', KEYS[1], unpack(ids))
+local payloads = redis.call('HMGET', KEYS[2], unpack(ids))
+local claimed = {}
+for i, id in ipairs(ids) do
+    if payloads[i] then
+        redis.call('ZADD', KEYS[3], ARGV[3], id)
+        claimed[#claimed + 1] = payloads[i]
+    end
+end
+if #claimed > 0 then
+    redis.call('SADD', KEYS[4], ARGV[4])
+end
+return claimed
+"""
+
+# Возврат в очередь напоминаний с истекшей арендой у всех воркеров
+REAP_EXPIRED_SCRIPT = """
+local moved = 0
+for _, worker in ipairs(redis.call('SMEMBERS', KEYS[1])) do
+    local key = ARGV[2] .. worker
+    local ids = redis.call('ZRANGEBYSCORE', key, '-inf', ARGV[1])
+    for _, id in ipairs(ids) do
+        redis.call('ZREM', key, id)
+        redis.call('ZADD', KEYS[2], ARGV[1], id)
+        moved = moved + 1
+    end
+    if redis.call('EXISTS', key) == 0 then
+        redis.call('SREM', KEYS[1], worker)
+    end
+end
+return moved
+"""
+
+# Восстановление напоминаний из SQLite: ZADD NX пропускает уже стоящие в очереди,
+# напоминания в processing-set какого-либо воркера тоже пропускаются.
+# ARGV: префикс processing-set, затем тройки (id, score, данные)
+REHYDRATE_SCRIPT = """
+local workers = redis.call('SMEMBERS', KEYS[3])
+local added = 0
+for i = 2, #ARGV, 3 do
+    local id = ARGV[i]
+    local leased = false
+    for _, worker in ipairs(workers) do
+        if redis.call('ZSCORE', ARGV[1] .. worker, id) then
+            leased = true
+            break
+        end
+    end
+    if not leased then
+        redis.call('HSETNX', KEYS[2], id, ARGV[i + 2])
+        added = added + redis.call('ZADD', KEYS[1], 'NX', ARGV[i + 1], id)
+    end
+end
+return added
+"""
+
+# Размер пачки при переносе очереди старого формата
+MIGRATION_BATCH_SIZE = 500
+
+# Уровни колеса таймеров: (сдвиг в битах, количество ячеек).
+# Ячейка уровня 0 - 1 секунда, уровней 1-3 - весь предыдущий уровень:
+# 256 сек, ~4.5 часа, ~12 дней; колесо целиком - ~2 года
+WHEEL_LEVELS = ((0, 256), (8, 64), (14, 64), (20, 64))
+
+
+def reminder_payload(reminder_id: int, user_id: int, task_id: int, reminder_time: datetime) -> dict:
+    """Данные напоминания в очереди"""
+    return {
+        'reminder_id': reminder_id,
+        'user_id': user_id,
+        'task_id': task_id,
+        'reminder_time': reminder_time.isoformat(),
+    }
+
+
+class RedisReminderBackend:
+    """
+    Очередь напоминаний в Redis, общая для всех реплик
+    
+    Наступившие напоминания атомарно забираются в processing-set
+    воркера со сроком аренды; неподтвержденные возвращаются в очередь
+    по истечении аренды. Добавление напоминания будит диспетчеры
+    всех реплик через pub/sub.
+    """
+    
+    name = 'redis'
+    # Данные Redis могут пропасть независимо от базы - очередь сверяется периодически
+    periodic_rehydration = True
+    
+    def __init__(self, redis, worker_id: str, lease_seconds: int):
+        self.redis = redis
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.processing_key = PROCESSING_KEY_PREFIX + worker_id
+        self._claim_due = None
+        self._reap_expired = None
+        self._rehydrate = None
+        self._next_reap = 0.0
+        self._wakeup = asyncio.Event()
+        self._next_due: Optional[float] = None
+        self._listener: Optional[asyncio.Task] = None
+        # Устанавливается после переподключения к Redis
+        self.rehydrate_requested = asyncio.Event()
+    
+    async def start(self):
+        """Регистрация скриптов и подписка на пробуждения"""
+        self._claim_due = self.redis.register_script(CLAIM_DUE_SCRIPT)
+        self._reap_expired = self.redis.register_script(REAP_EXPIRED_SCRIPT)
+        self._rehydrate = self.redis.register_script(REHYDRATE_SCRIPT)
+        await self._migrate_legacy_queue()
+        self._listener = asyncio.create_task(self._listen_wakeups())
+    
+    async def close(self):
+        """Остановка подписки"""
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+    
+    async def _migrate_legacy_queue(self):
+        """
+        Перенос очереди старого формата на ключи по id
+        
+        Раньше членами sorted set были JSON-строки напоминаний; теперь
+        член - id напоминания, а JSON хранится в PAYLOAD_KEY
+        """
+        migrated = 0
+        pipe = self.redis.pipeline(transaction=False)
+        
+        async for member, score in self.redis.zscan_iter(QUEUE_KEY, match='{*'):
+            reminder_id = json.loads(member)['reminder_id']
+            pipe.zrem(QUEUE_KEY, member)
+            pipe.zadd(QUEUE_KEY, {reminder_id: score})
+            pipe.hset(PAYLOAD_KEY, reminder_id, member)
+            migrated += 1
+            
+            if migrated % MIGRATION_BATCH_SIZE == 0:
+                await pipe.execute()
+        
+        await pipe.execute()
+        
+        if migrated:
+            print(f"🔄 Очередь напоминаний перенесена на новый формат: {migrated}")
+    
+    async def _listen_wakeups(self):
+        """
+        Подписка на добавление напоминаний другими процессами
+        
+        Будит диспетчер, если новое напоминание раньше того,
+        до которого он сейчас спит
+        """
+        reconnected = False
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(WAKEUP_CHANNEL)
+                # После (пере)подключения очередь могла измениться
+                self._wakeup.set()
+                # Redis мог перезапуститься без данных - сверяем очередь с базой
+                if reconnected:
+                    self.rehydrate_requested.set()
+                async for message in pubsub.listen():
+                    if message['type'] == 'message':
+                        self._notify(float(message['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Ошибка подписки на {WAKEUP_CHANNEL}: {e}")
+                reconnected = True
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+    
+    def _notify(self, timestamp: float):
+        """Пробуждение диспетчера, если напоминание раньше текущего ожидания"""
+        if self._next_due is None or timestamp < self._next_due:
+            self._wakeup.set()
+    
+    async def add(self, reminder_data: dict, timestamp: float):
+        """Добавление напоминания в sorted set с timestamp как score"""
+        await self._enqueue(reminder_data, timestamp)
+        
+        self._notify(timestamp)
+        await self.redis.publish(WAKEUP_CHANNEL, timestamp)
+    
+    async def add_many(self, items: List[tuple[dict, float]]) -> int:
+        """
+        Добавление пачки напоминаний, которых еще нет в очереди
+        и которые не забраны воркерами (одним вызовом скрипта)
+        
+        Returns:
+            Количество добавленных напоминаний
+        """
+        args = [PROCESSING_KEY_PREFIX]
+        for reminder_data, timestamp in items:
+            args += [reminder_data['reminder_id'], timestamp, json.dumps(reminder_data)]
+        
+        added = await self._rehydrate(keys=[QUEUE_KEY, PAYLOAD_KEY, WORKERS_KEY], args=args)
+        
+        # Добавленные напоминания могут быть раньше текущего ожидания диспетчеров
+        if added:
+            earliest = min(timestamp for _, timestamp in items)
+            self._notify(earliest)
+            await self.redis.publish(WAKEUP_CHANNEL, earliest)
+        return added
+    
+    async def wait_for_due(self, limit: int) -> List[dict]:
+        """
+        Ожидание и извлечение наступивших напоминаний
+        
+        Без наступивших напоминаний к Redis обращается только раз в
+        lease_seconds - для возврата в очередь просроченных аренд.
+        """
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            
+            if now >= self._next_reap:
+                await self._reap_expired(keys=[WORKERS_KEY, QUEUE_KEY], args=[now, PROCESSING_KEY_PREFIX])
+                self._next_reap = now + self.lease_seconds
+            
+            head = await self.redis.zrange(QUEUE_KEY, 0, 0, withscores=True)
+            
+            if head and head[0][1] <= now:
+                self._next_due = None
+                claimed = await self._claim_due(
+                    keys=[QUEUE_KEY, PAYLOAD_KEY, self.processing_key, WORKERS_KEY],
+                    args=[now, limit, now + self.lease_seconds, self.worker_id]
+                )
+                if claimed:
+                    return [json.loads(reminder) for reminder in claimed]
+                continue
+            
+            self._next_due = head[0][1] if head else None
+            timeout = min(head[0][1], self._next_reap) - now if head else self._next_reap - now
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def ack(self, reminder_id: int):
+        """Подтверждение обработки забранного напоминания"""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(self.processing_key, reminder_id)
+            pipe.hdel(PAYLOAD_KEY, reminder_id)
+            await pipe.execute()
+    
+    async def requeue(self, reminder_data: dict, delay: float):
+        """Возврат забранного напоминания в очередь"""
+        reminder_id = reminder_data['reminder_id']
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(self.processing_key, reminder_id)
+            pipe.zadd(QUEUE_KEY, {reminder_id: time.time() + delay})
+            await pipe.execute()
+    
+    async def _enqueue(self, reminder_data: dict, timestamp: float):
+        """Запись напоминания в очередь и hash данных одной транзакцией"""
+        reminder_id = reminder_data['reminder_id']
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(PAYLOAD_KEY, reminder_id, json.dumps(reminder_data))
+            pipe.zadd(QUEUE_KEY, {reminder_id: timestamp})
+            await pipe.execute()
+    
+    async def get_due(self) -> List[dict]:
+        """Наступившие напоминания без извлечения"""
+        reminder_ids = await self.redis.zrangebyscore(QUEUE_KEY, '-inf', time.time())
+        if not reminder_ids:
+            return []
+        
+        reminders = await self.redis.hmget(PAYLOAD_KEY, reminder_ids)
+        return [json.loads(reminder) for reminder in reminders if reminder]
+    
+    async def remove(self, *reminder_ids: int) -> int:
+        """
+        Удаление напоминаний из очереди
+        
+        Returns:
+            Количество удаленных из очереди напоминаний
+        """
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(QUEUE_KEY, *reminder_ids)
+            pipe.hdel(PAYLOAD_KEY, *reminder_ids)
+            removed, _ = await pipe.execute()
+        return removed
+    
+    async def count(self) -> int:
+        """Количество напоминаний в очереди"""
+        return await self.redis.zcard(QUEUE_KEY)
+    
+    def get_stats(self) -> dict:
+        """Метрики очереди (размером управляет Redis)"""
+        return {}
+
+
+class TimingWheelBackend:
+    """
+    Очередь напоминаний в памяти процесса на иерархическом колесе таймеров
+    
+    Напоминание кладется в ячейку своего времени (WHEEL_LEVELS) и
+    удаляется из нее по id, поэтому добавление и отмена - O(1) без
+    сортировки. Когда время доходит до ячейки верхнего уровня, ее
+    напоминания раскладываются по нижним; напоминания дальше колеса
+    ждут в отдельном словаре. Диспетчер спит одним таймером до
+    ближайшей непустой ячейки, точность - 1 секунда (не раньше срока).
+    
+    Источником истины остается таблица reminders: очередь заполняется
+    из нее при запуске (ReminderService.rehydrate). Подходит для
+    одного экземпляра бота.
+    """
+    
+    name = 'memory'
+    # Очередь в памяти никто, кроме этого процесса, не меняет
+    periodic_rehydration = False
+    
+    def __init__(self):
+        self._levels = [[{} for _ in range(size)] for _, size in WHEEL_LEVELS]
+        # Верхние уровни от старшего к младшему (порядок раскладки)
+        self._upper = list(zip(WHEEL_LEVELS, self._levels))[:0:-1]
+        self._overflow: dict[int, None] = {}
+        # Наступившие напоминания в порядке наступления
+        self._ready: dict[int, None] = {}
+        # id -> (timestamp, user_id, task_id, ячейка); у забранных ячейка None
+        self._entries: dict[int, tuple] = {}
+        self._leased = 0
+        # Первая еще не обработанная секунда
+        self._time = int(time.time())
+        self._next_wake: Optional[int] = None
+        self._wakeup = asyncio.Event()
+        self.rehydrate_requested = asyncio.Event()
+        self.cascaded = 0
+    
+    async def start(self):
+        """Запуск (ресурсов не требует)"""
+    
+    async def close(self):
+        """Остановка (ресурсов не требует)"""
+    
+    def _slot(self, tick: int) -> dict:
+        """Ячейка колеса для секунды tick относительно текущего времени колеса"""
+        if tick < self._time:
+            return self._ready
+        
+        for (shift, size), slots in zip(WHEEL_LEVELS, self._levels):
+            if (tick >> shift) - (self._time >> shift) < size:
+                return slots[(tick >> shift) % size]
+        return self._overflow
+    
+    def _detach(self, reminder_id: int) -> bool:
+        """
+        Удаление напоминания из колеса
+        
+        Returns:
+            Ожидало ли напоминание в очереди (False - не было или забрано)
+        """
+        entry = self._entries.pop(reminder_id, None)
+        if entry is None:
+            return False
+        if entry[3] is None:
+            self._leased -= 1
+            return False
+        del entry[3][reminder_id]
+        return True
+    
+    def _schedule(self, reminder_id: int, timestamp: float, user_id: int, task_id: int):
+        """Постановка напоминания в ячейку его времени"""
+        tick = math.ceil(timestamp)
+        slot = self._slot(tick)
+        slot[reminder_id] = None
+        self._entries[reminder_id] = (timestamp, user_id, task_id, slot)
+        
+        if self._next_wake is None or tick < self._next_wake:
+            self._wakeup.set()
+    
+    async def add(self, reminder_data: dict, timestamp: float, nx: bool = False) -> bool:
+        """
+        Добавление или перенос напоминания
+        
+        При nx=True ожидающее или забранное напоминание не меняется
+        
+        Returns:
+            Добавлено ли напоминание
+        """
+        reminder_id = reminder_data['reminder_id']
+        if reminder_id in self._entries:
+            if nx:
+                return False
+            self._detach(reminder_id)
+        
+        self._schedule(reminder_id, timestamp, reminder_data['user_id'], reminder_data['task_id'])
+        return True
+    
+    async def add_many(self, items: List[tuple[dict, float]]) -> int:
+        """Добавление пачки напоминаний, которых еще нет в очереди"""
+        added = 0
+        for reminder_data, timestamp in items:
+            added += await self.add(reminder_data, timestamp, nx=True)
+        return added
+    
+    def _next_event(self) -> Optional[int]:
+        """Ближайшая секунда, в которую есть работа: наступление или раскладка ячейки"""
+        if self._levels[0][self._time % WHEEL_LEVELS[0][1]]:
+            return self._time
+        
+        events = []
+        
+        for (shift, size), slots in zip(WHEEL_LEVELS, self._levels):
+            current = self._time >> shift
+            for block in range(current, current + size):
+                if slots[block % size]:
+                    events.append(max(block << shift, self._time))
+                    break
+        
+        if self._overflow:
+            top_shift = WHEEL_LEVELS[-1][0]
+            events.append(-(-self._time >> top_shift) << top_shift)
+        
+        return min(events) if events else None
+    
+    def _cascade(self, slot: dict):
+        """Раскладка напоминаний ячейки по нижним уровням"""
+        reminder_ids = list(slot)
+        slot.clear()
+        for reminder_id in reminder_ids:
+            timestamp, user_id, task_id, _ = self._entries[reminder_id]
+            self._schedule(reminder_id, timestamp, user_id, task_id)
+        self.cascaded += len(reminder_ids)
+    
+    def _advance(self, now: int, limit: int):
+        """
+        Обработка секунд колеса до now включительно
+        
+        Останавливается, когда наступило limit напоминаний, поэтому
+        после простоя первая пачка отправляется сразу
+        """
+        while len(self._ready) < limit:
+            tick = self._next_event()
+            if tick is None or tick > now:
+                self._time = max(self._time, now + 1)
+                return
+            
+            self._time = tick
+            
+            # Сначала верхние уровни: их напоминания могут опуститься до текущей секунды
+            top_shift = WHEEL_LEVELS[-1][0]
+            if self._overflow and tick % (1 << top_shift) == 0:
+                self._cascade(self._overflow)
+            for (shift, size), slots in self._upper:
+                if tick % (1 << shift) == 0:
+                    self._cascade(slots[(tick >> shift) % size])
+            
+            slot = self._levels[0][tick % WHEEL_LEVELS[0][1]]
+            for reminder_id in slot:
+                self._ready[reminder_id] = None
+                timestamp, user_id, task_id, _ = self._entries[reminder_id]
+                self._entries[reminder_id] = (timestamp, user_id, task_id, self._ready)
+            slot.clear()
+            
+            self._time = tick + 1
+    
+    def _claim(self, limit: int) -> List[dict]:
+        """Извлечение до limit наступивших напоминаний"""
+        due = []
+        for reminder_id in list(islice(self._ready, limit)):
+            del self._ready[reminder_id]
+            timestamp, user_id, task_id, _ = self._entries[reminder_id]
+            self._entries[reminder_id] = (timestamp, user_id, task_id, None)
+            self._leased += 1
+            due.append(reminder_payload(reminder_id, user_id, task_id, datetime.fromtimestamp(timestamp)))
+        return due
+    
+    async def wait_for_due(self, limit: int) -> List[dict]:
+        """Ожидание ближайшего напоминания и извлечение наступивших"""
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            self._advance(int(now), limit)
+            
+            if self._ready:
+                self._next_wake = None
+                return self._claim(limit)
+            
+            self._next_wake = self._next_event()
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(),
+                    self._next_wake - now if self._next_wake is not None else None
+                )
+            except asyncio.TimeoutError:
+                pass
+    
+    async def ack(self, reminder_id: int):
+        """Подтверждение обработки забранного напоминания"""
+        self._detach(reminder_id)
+    
+    async def requeue(self, reminder_data: dict, delay: float):
+        """Возврат забранного напоминания в очередь"""
+        await self.add(reminder_data, time.time() + delay)
+    
+    async def get_due(self) -> List[dict]:
+        """Наступившие напоминания без извлечения"""
+        now = time.time()
+        return [
+            reminder_payload(reminder_id, user_id, task_id, datetime.fromtimestamp(timestamp))
+            for reminder_id, (timestamp, user_id, task_id, slot) in self._entries.items()
+            if slot is not None and timestamp <= now
+        ]
+    
+    async def remove(self, *reminder_ids: int) -> int:
+        """
+        Удаление напоминаний (ожидающих или забранных)
+        
+        Returns:
+            Количество удаленных из очереди ожидающих напоминаний
+        """
+        return sum(self._detach(reminder_id) for reminder_id in reminder_ids)
+    
+    async def count(self) -> int:
+        """Количество ожидающих напоминаний"""
+        return len(self._entries) - self._leased
+    
+    def get_stats(self) -> dict:
+        """Метрики колеса"""
+        return {
+            'scheduled': len(self._entries) - self._leased,
+            'leased': self._leased,
+            'overflow': len(self._overflow),
+            'cascaded': self.cascaded,
+        }
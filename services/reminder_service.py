@@ -1,22 +1,45 @@
 import asyncio
-import json
+import time
 import redis.asyncio as redis
 from datetime import datetime
 from typing import Optional, List
-from config.settings import REDIS_HOST, REDIS_PORT, REDIS_DB
+from config.settings import (
+    REDIS_HOST, REDIS_PORT, REDIS_DB, REMINDER_BACKEND,
+    REMINDER_RETRY_DELAY, REMINDER_LEASE_SECONDS, REMINDER_WORKER_ID,
+    REMINDER_REHYDRATE_INTERVAL, REMINDER_REHYDRATE_BATCH_SIZE
+)
+from db.repositories import ReminderRepository
+from services.reminder_backends import RedisReminderBackend, TimingWheelBackend, reminder_payload
 
 
 class ReminderService:
-    """Сервис для управления напоминаниями через Redis"""
+    """
+    Сервис для управления напоминаниями
+    
+    Очередь хранится в backend, выбранном настройкой REMINDER_BACKEND:
+    redis - общая очередь для всех реплик (RedisReminderBackend),
+    memory - колесо таймеров в памяти процесса (TimingWheelBackend).
+    Если Redis недоступен, используется memory. Backend реализует
+    add, add_many, wait_for_due, ack, requeue, get_due, remove, count
+    и get_stats; источник истины для обоих - таблица reminders.
+    """
     
     def __init__(self):
         self.redis: Optional[redis.Redis] = None
         self.host = REDIS_HOST
         self.port = REDIS_PORT
         self.db = REDIS_DB
+        self.worker_id = REMINDER_WORKER_ID
+        self.lease_seconds = REMINDER_LEASE_SECONDS
+        self.backend = TimingWheelBackend()
+        self._reconciler: Optional[asyncio.Task] = None
+        self.rehydrate_interval = REMINDER_REHYDRATE_INTERVAL
+        self.rehydrations = 0
+        self.restored = 0
+        self.last_rehydration_seconds: Optional[float] = None
     
     async def connect(self):
-        """Подключение к Redis"""
+        """Подключение к Redis и выбор backend очереди напоминаний"""
         try:
             self.redis = redis.Redis(
                 host=self.host,
@@ -29,91 +52,147 @@ class ReminderService:
         except Exception as e:
             print(f"❌ Ошибка подключения к Redis: {e}")
             self.redis = None
+        
+        if REMINDER_BACKEND == 'redis' and self.redis:
+            self.backend = RedisReminderBackend(self.redis, self.worker_id, self.lease_seconds)
+        else:
+            if REMINDER_BACKEND == 'redis':
+                print("⚠️ Напоминания хранятся в памяти процесса и восстанавливаются из базы при запуске")
+            self.backend = TimingWheelBackend()
+        
+        await self.backend.start()
     
     async def disconnect(self):
         """Отключение от Redis"""
+        if self._reconciler:
+            self._reconciler.cancel()
+            self._reconciler = None
+        await self.backend.close()
         if self.redis:
             await self.redis.close()
     
     async def add_reminder(self, reminder_id: int, user_id: int, task_id: int, reminder_time: datetime):
-        """
-        Добавление напоминания в Redis
-        
-        Сохраняет напоминание в sorted set с timestamp как score
-        для возможности эффективного поиска напоминаний по времени
-        """
-        if not self.redis:
-            return
-        
-        reminder_data = {
-            'reminder_id': reminder_id,
-            'user_id': user_id,
-            'task_id': task_id,
-            'reminder_time': reminder_time.isoformat(),
-        }
-        
-        # Добавляем в sorted set с timestamp как score
-        timestamp = reminder_time.timestamp()
-        await self.redis.zadd(
-            'reminders_queue',
-            {json.dumps(reminder_data): timestamp}
+        """Добавление напоминания в очередь"""
+        await self.backend.add(
+            reminder_payload(reminder_id, user_id, task_id, reminder_time),
+            reminder_time.timestamp()
         )
         
         print(f"🔔 Напоминание #{reminder_id} добавлено в очередь на {reminder_time}")
     
+    async def wait_for_due_reminders(self, limit: int = 100) -> List[dict]:
+        """
+        Ожидание и извлечение наступивших напоминаний
+        
+        Спит ровно до времени ближайшего напоминания в очереди (или до
+        пробуждения более ранним добавленным напоминанием) и забирает
+        наступившие напоминания. Каждое забранное напоминание нужно
+        подтвердить через ack_reminder или вернуть через
+        requeue_reminder; в Redis неподтвержденное напоминание по
+        истечении аренды заберет другой воркер.
+        """
+        return await self.backend.wait_for_due(limit)
+    
+    async def ack_reminder(self, reminder_id: int):
+        """Подтверждение обработки забранного напоминания"""
+        await self.backend.ack(reminder_id)
+    
+    async def requeue_reminder(self, reminder_data: dict, delay: int = REMINDER_RETRY_DELAY):
+        """Возврат забранного напоминания в очередь после неудачной отправки"""
+        await self.backend.requeue(reminder_data, delay)
+    
     async def get_due_reminders(self) -> List[dict]:
         """
         Получение напоминаний, которые настало время отправить
         
         Возвращает все напоминания с временем <= текущего времени
         """
-        if not self.redis:
-            return []
-        
-        now = datetime.now().timestamp()
-        
-        # Получаем все напоминания с временем <= сейчас
-        reminders = await self.redis.zrangebyscore(
-            'reminders_queue',
-            '-inf',
-            now
-        )
-        
-        return [json.loads(reminder) for reminder in reminders]
+        return await self.backend.get_due()
     
     async def remove_reminder(self, reminder_id: int):
         """Удаление напоминания из очереди"""
-        if not self.redis:
-            return
-        
-        # Находим напоминание по reminder_id
-        reminders = await self.redis.zrange('reminders_queue', 0, -1, withscores=True)
-        
-        for reminder_json, score in reminders:
-            reminder_data = json.loads(reminder_json)
-            if reminder_data.get('reminder_id') == reminder_id:
-                await self.redis.zrem('reminders_queue', reminder_json)
-                print(f"🗑️ Напоминание #{reminder_id} удалено из очереди")
-                break
+        if await self.backend.remove(reminder_id):
+            print(f"🗑️ Напоминание #{reminder_id} удалено из очереди")
     
     async def get_reminders_count(self) -> int:
         """Получение количества напоминаний в очереди"""
-        if not self.redis:
-            return 0
-        
-        return await self.redis.zcard('reminders_queue')
+        return await self.backend.count()
     
     async def clear_sent_reminders(self, reminder_ids: List[int]):
         """Очистка отправленных напоминаний из очереди"""
-        if not self.redis:
+        if not reminder_ids:
             return
         
-        reminders = await self.redis.zrange('reminders_queue', 0, -1, withscores=True)
+        await self.backend.remove(*reminder_ids)
+    
+    async def rehydrate(self, batch_size: int = REMINDER_REHYDRATE_BATCH_SIZE) -> int:
+        """
+        Восстановление очереди из неотправленных напоминаний в SQLite
+        
+        Напоминания читаются курсором пачками (ближайшие первыми) и
+        добавляются только если их нет в очереди и они не забраны
+        воркером, поэтому повторный запуск ничего не меняет.
         
-        for reminder_json, score in reminders:
-            reminder_data = json.loads(reminder_json)
-            if reminder_data.get('reminder_id') in reminder_ids:
-                await self.redis.zrem('reminders_queue', reminder_json)
+        Returns:
+            Количество добавленных в очередь напоминаний
+        """
+        started = time.monotonic()
+        restored = 0
+        
+        async for reminders in ReminderRepository.iter_pending(batch_size):
+            restored += await self.backend.add_many([
+                (
+                    reminder_payload(reminder.id, reminder.user_id, reminder.task_id, reminder.reminder_time),
+                    reminder.reminder_time.timestamp(),
+                )
+                for reminder in reminders
+            ])
+        
+        self.rehydrations += 1
+        self.restored += restored
+        self.last_rehydration_seconds = time.monotonic() - started
+        return restored
+    
+    def start_rehydration(self):
+        """
+        Запуск сверки очереди с базой: сразу и затем раз в rehydrate_interval
+        секунд (и после переподключения к Redis). Очередь в памяти процесса
+        заполняется один раз при запуске.
+        """
+        self._reconciler = asyncio.create_task(self._run_rehydration())
+    
+    async def _run_rehydration(self):
+        """Цикл сверки очереди с базой"""
+        while True:
+            self.backend.rehydrate_requested.clear()
+            try:
+                restored = await self.rehydrate()
+                if restored:
+                    print(
+                        f"🔄 Восстановлено напоминаний из базы: {restored} "
+                        f"за {self.last_rehydration_seconds:.1f} сек"
+                    )
+                if not self.backend.periodic_rehydration:
+                    return
+            except Exception as e:
+                print(f"❌ Ошибка восстановления очереди напоминаний: {e}")
+            
+            try:
+                await asyncio.wait_for(self.backend.rehydrate_requested.wait(), self.rehydrate_interval)
+            except asyncio.TimeoutError:
+                pass
+    
+    def get_stats(self) -> dict:
+        """Метрики очереди напоминаний"""
+        return {
+            'backend': self.backend.name,
+            'rehydrations': self.rehydrations,
+            'restored': self.restored,
+            'last_rehydration_seconds': (
+                round(self.last_rehydration_seconds, 2) if self.last_rehydration_seconds is not None else None
+            ),
+            **self.backend.get_stats(),
+        }
 
 
 # Глобальный экземпляр сервиса
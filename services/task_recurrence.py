@@ -0,0 +1,105 @@
+from datetime import datetime
+from typing import Optional
+import pytz
+from config.settings import TIMEZONE
+from db.database import db
+from db.repositories import TaskRepository, ReminderRepository
+from models.recurrence import Recurrence, in_timezone
+from models.task import Task, Reminder
+from services.reminder_service import reminder_service
+
+
+def parse_rule(rule: str) -> str:
+    """
+    Проверка и нормализация правила повторения (UNTIL приводится к UTC)
+    
+    Raises:
+        ValueError: неподдерживаемое или некорректное правило
+    """
+    return str(Recurrence.parse(rule, TIMEZONE))
+
+
+def describe(rule: Optional[str]) -> str:
+    """Описание правила задачи для пользователя"""
+    return Recurrence.parse(rule, TIMEZONE).describe() if rule else "не повторяется"
+
+
+def next_occurrence(task: Task, after: datetime) -> Optional[tuple[datetime, str]]:
+    """
+    Следующее после after повторение задачи
+    
+    Returns:
+        (дата повторения, правило с оставшимся COUNT) или None, если повторения закончились
+    """
+    rule = Recurrence.parse(task.recurrence, TIMEZONE)
+    advanced = rule.advance(in_timezone(task.due_date, TIMEZONE), after)
+    if advanced is None:
+        return None
+    
+    due_date, remaining = advanced
+    return due_date, str(remaining)
+
+
+def occurrences_between(task: Task, start: datetime, end: datetime) -> list:
+    """Повторения задачи в полуинтервале [start, end)"""
+    rule = Recurrence.parse(task.recurrence, TIMEZONE)
+    return rule.between(in_timezone(task.due_date, TIMEZONE), start, end)
+
+
+async def complete_occurrence(task: Task) -> bool:
+    """
+    Завершение текущего повторения задачи
+    
+    Задача переносится на следующее повторение после текущего момента
+    (пропущенные повторения не создаются), напоминание сдвигается вместе
+    с дедлайном. Строки задачи и напоминания остаются теми же.
+    
+    Returns:
+        False, если повторений больше нет и задачу нужно завершить
+    """
+    now = datetime.now(pytz.timezone(TIMEZONE))
+    advanced = next_occurrence(task, max(now, task.due_date))
+    if advanced is None:
+        return False
+    
+    due_date, task.recurrence = advanced
+    if task.reminder_time:
+        task.reminder_time = due_date - (task.due_date - task.reminder_time)
+    task.due_date = due_date
+    
+    reminder = None
+    async with db.transaction():
+        await TaskRepository.update(task)
+        
+        if task.reminder_enabled and task.reminder_time:
+            reminder = await ReminderRepository.get_by_task(task.id)
+            if reminder:
+                await ReminderRepository.reschedule(reminder.id, task.reminder_time)
+    
+    if reminder:
+        await reminder_service.add_reminder(reminder.id, task.user_id, task.id, task.reminder_time)
+    return True
+
+
+async def reschedule_reminder(task: Task, reminder: Reminder) -> Optional[datetime]:
+    """
+    Перенос отправленного напоминания на следующее повторение задачи
+    
+    Напоминание стоит на том же смещении от повторения, что и
+    reminder_time задачи от due_date. Заменяет mark_as_sent: после
+    переноса напоминание нужно подтвердить и заново поставить в очередь.
+    
+    Returns:
+        Новое время напоминания или None, если повторения закончились
+    """
+    if not (task.recurrence and task.due_date and task.reminder_time):
+        return None
+    
+    offset = task.due_date - task.reminder_time
+    advanced = next_occurrence(task, reminder.reminder_time + offset)
+    if advanced is None:
+        return None
+    
+    reminder_time = advanced[0] - offset
+    await ReminderRepository.reschedule(reminder.id, reminder_time)
+    return reminder_time
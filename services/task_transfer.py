@@ -0,0 +1,366 @@
+import asyncio
+import csv
+import json
+import re
+from datetime import datetime, date
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, Optional, TextIO
+import pytz
+from config.settings import TIMEZONE, TASK_TRANSFER_BATCH_SIZE, IMPORT_MAX_TASKS
+from db.repositories import TaskRepository
+from models.recurrence import Recurrence
+from models.task import Task
+
+# Поддерживаемые форматы файлов (по расширению)
+FORMATS = ('csv', 'json', 'ics')
+
+# Колонки CSV и ключи JSON (одинаковые для импорта и экспорта)
+FIELDS = ('title', 'description', 'priority', 'status', 'due_date', 'recurrence')
+
+PRIORITIES = ('low', 'medium', 'high')
+STATUSES = ('pending', 'in_progress', 'completed', 'cancelled')
+
+# Соответствие статусов и приоритетов задач полям iCalendar
+ICS_STATUSES = {'completed': 'COMPLETED', 'cancelled': 'CANCELLED', 'in_progress': 'IN-PROCESS'}
+ICS_PRIORITIES = {'high': 1, 'medium': 5, 'low': 9}
+
+# Размер блока чтения JSON (символов)
+JSON_CHUNK_SIZE = 64 * 1024
+
+# Разделители между объектами JSON-массива и JSON Lines
+JSON_SEPARATORS = re.compile(r'[\s,\[\]]*')
+
+
+def detect_format(file_name: str) -> Optional[str]:
+    """Формат файла по расширению"""
+    suffix = Path(file_name or '').suffix.lower().lstrip('.')
+    if suffix in ('ical', 'ifb', 'icalendar'):
+        suffix = 'ics'
+    if suffix == 'jsonl':
+        suffix = 'json'
+    return suffix if suffix in FORMATS else None
+
+
+# ==================== ЧТЕНИЕ ====================
+
+def read_csv(file: TextIO) -> Iterator[dict]:
+    """Строки CSV (разделитель определяется по началу файла)"""
+    sample = file.read(4096)
+    file.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    
+    for record in csv.DictReader(file, dialect=dialect):
+        yield {(key or '').strip().lower(): value for key, value in record.items()}
+
+
+def read_json(file: TextIO) -> Iterator[dict]:
+    """
+    Объекты JSON-массива или JSON Lines
+    
+    Файл читается блоками, в памяти держится только текущий блок;
+    буфер сдвигается только при дочитывании нового блока
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+    
+    while True:
+        # Пропуск разделителей между объектами
+        position = JSON_SEPARATORS.match(buffer, position).end()
+        if position == len(buffer):
+            if eof:
+                return
+            buffer, position = file.read(JSON_CHUNK_SIZE), 0
+            eof = not buffer
+            continue
+        
+        try:
+            record, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = file.read(JSON_CHUNK_SIZE)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        
+        if isinstance(record, dict):
+            yield record
+
+
+def _ics_lines(file: TextIO) -> Iterator[str]:
+    """Строки iCalendar с объединением перенесенных строк"""
+    current = None
+    for line in file:
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def _ics_unescape(value: str) -> str:
+    """Снятие экранирования текста iCalendar"""
+    return (
+        value.replace('\\n', '\n').replace('\\N', '\n')
+        .replace('\\,', ',').replace('\\;', ';').replace('\\\\', '\\')
+    )
+
+
+def _ics_priority(value: str) -> str:
+    """Приоритет iCalendar (1-9) -> low/medium/high"""
+    try:
+        priority = int(value)
+    except ValueError:
+        return 'medium'
+    if 1 <= priority <= 4:
+        return 'high'
+    if priority >= 6:
+        return 'low'
+    return 'medium'
+
+
+def read_ics(file: TextIO) -> Iterator[dict]:
+    """Компоненты VTODO и VEVENT файла iCalendar"""
+    record = None
+    for line in _ics_lines(file):
+        if line in ('BEGIN:VTODO', 'BEGIN:VEVENT'):
+            record = {}
+            continue
+        if line in ('END:VTODO', 'END:VEVENT'):
+            if record is not None:
+                yield record
+            record = None
+            continue
+        if record is None or ':' not in line:
+            continue
+        
+        name, value = line.split(':', 1)
+        name = name.split(';', 1)[0].upper()
+        
+        if name == 'SUMMARY':
+            record['title'] = _ics_unescape(value)
+        elif name == 'DESCRIPTION':
+            record['description'] = _ics_unescape(value)
+        elif name == 'PRIORITY':
+            record['priority'] = _ics_priority(value)
+        elif name == 'STATUS':
+            statuses = {ics: status for status, ics in ICS_STATUSES.items()}
+            record['status'] = statuses.get(value.upper(), 'pending')
+        elif name == 'DUE' or (name == 'DTSTART' and 'due_date' not in record):
+            record['due_date'] = value
+        elif name == 'RRULE':
+            record['recurrence'] = value
+
+
+READERS = {'csv': read_csv, 'json': read_json, 'ics': read_ics}
+
+
+def parse_datetime(value: str) -> Optional[datetime]:
+    """Дата из ISO, ДД.ММ.ГГГГ [ЧЧ:ММ] или формата iCalendar"""
+    value = (value or '').strip()
+    if not value:
+        return None
+    
+    tz = pytz.timezone(TIMEZONE)
+    
+    # iCalendar: 20261017T100000Z, 20261017T100000, 20261017
+    if value[:8].isdigit() and len(value) in (8, 15, 16):
+        if len(value) == 8:
+            return tz.localize(datetime.strptime(value, '%Y%m%d'))
+        moment = datetime.strptime(value[:15], '%Y%m%dT%H%M%S')
+        if value.endswith('Z'):
+            return pytz.utc.localize(moment).astimezone(tz)
+        return tz.localize(moment)
+    
+    for fmt in ('%d.%m.%Y %H:%M', '%d.%m.%Y'):
+        try:
+            return tz.localize(datetime.strptime(value, fmt))
+        except ValueError:
+            pass
+    
+    # Даты хранятся строками и сравниваются как строки, поэтому
+    # любое смещение приводится к поясу бота
+    moment = datetime.fromisoformat(value)
+    return moment.astimezone(tz) if moment.tzinfo else tz.localize(moment)
+
+
+def record_to_task(record: dict, user_id: int) -> Task:
+    """
+    Задача из записи файла импорта
+    
+    Raises:
+        ValueError: нет названия, дата в неизвестном формате или неподдерживаемое правило повторения
+    """
+    title = str(record.get('title') or '').strip()
+    if not title:
+        raise ValueError("Не указано название задачи")
+    
+    priority = str(record.get('priority') or 'medium').strip().lower()
+    status = str(record.get('status') or 'pending').strip().lower()
+    due_date = parse_datetime(str(record.get('due_date') or ''))
+    
+    # Повторение имеет смысл только при наличии дедлайна (первого повторения)
+    recurrence = str(record.get('recurrence') or '').strip()
+    recurrence = str(Recurrence.parse(recurrence, TIMEZONE)) if recurrence and due_date else None
+    
+    return Task(
+        user_id=user_id,
+        title=title[:255],
+        description=str(record.get('description') or ''),
+        priority=priority if priority in PRIORITIES else 'medium',
+        status=status if status in STATUSES else 'pending',
+        due_date=due_date,
+        recurrence=recurrence,
+    )
+
+
+async def import_tasks(path: str, file_format: str, user_id: int) -> tuple[int, int, int]:
+    """
+    Импорт задач из файла
+    
+    Сначала файл целиком разбирается без записи в базу, поэтому ошибка
+    формата или кодировки в середине файла не оставляет частично
+    импортированных задач. Затем файл читается повторно и первые
+    IMPORT_MAX_TASKS задач вставляются пачками по TASK_TRANSFER_BATCH_SIZE,
+    каждая своей транзакцией: блокировка записи не удерживается на весь
+    файл. Чтение и разбор выполняются в потоке. Записи без названия или
+    с некорректной датой пропускаются.
+    
+    Raises:
+        ValueError: файл не читается (формат или кодировка)
+    
+    Returns:
+        (создано задач, пропущено записей, не импортировано сверх IMPORT_MAX_TASKS)
+    """
+    skipped = 0
+    
+    def tasks() -> Iterator[Task]:
+        nonlocal skipped
+        with open(path, encoding='utf-8-sig', newline='') as file:
+            for record in READERS[file_format](file):
+                try:
+                    yield record_to_task(record, user_id)
+                except (ValueError, TypeError):
+                    skipped += 1
+    
+    # Проверочный проход: ошибки чтения файла выбрасываются до записи в базу
+    total = await asyncio.to_thread(sum, (1 for _ in tasks()))
+    invalid = skipped
+    
+    created = 0
+    records = islice(tasks(), IMPORT_MAX_TASKS)
+    while batch := await asyncio.to_thread(list, islice(records, TASK_TRANSFER_BATCH_SIZE)):
+        created += await TaskRepository.bulk_create(batch, TASK_TRANSFER_BATCH_SIZE)
+    return created, invalid, total - created
+
+
+# ==================== ЗАПИСЬ ====================
+
+def _export_value(task: Task, name: str) -> str:
+    """Значение поля задачи для CSV/JSON"""
+    value = getattr(task, name)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value or ''
+
+
+def _ics_escape(value: str) -> str:
+    """Экранирование текста iCalendar"""
+    return (
+        value.replace('\\', '\\\\').replace(';', '\\;')
+        .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _ics_fold(line: str) -> str:
+    """Перенос строки iCalendar длиннее 75 байт"""
+    parts, current, size = [], '', 0
+    for char in line:
+        char_size = len(char.encode('utf-8'))
+        if size + char_size > 75:
+            parts.append(current)
+            current, size = ' ', 1
+        current += char
+        size += char_size
+    parts.append(current)
+    return '\r\n'.join(parts) + '\r\n'
+
+
+def _ics_datetime(value: datetime) -> str:
+    """Дата в UTC в формате iCalendar"""
+    if value.tzinfo is None:
+        value = pytz.timezone(TIMEZONE).localize(value)
+    return value.astimezone(pytz.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _ics_todo(task: Task, stamp: str) -> str:
+    """Компонент VTODO задачи"""
+    lines = [
+        'BEGIN:VTODO',
+        f'UID:task-{task.id}@taskmanagerbot',
+        f'DTSTAMP:{stamp}',
+        f'SUMMARY:{_ics_escape(task.title)}',
+    ]
+    if task.description:
+        lines.append(f'DESCRIPTION:{_ics_escape(task.description)}')
+    if task.due_date:
+        lines.append(f'DUE:{_ics_datetime(task.due_date)}')
+        if task.recurrence:
+            # RRULE в VTODO требует DTSTART
+            lines.append(f'DTSTART:{_ics_datetime(task.due_date)}')
+            lines.append(f'RRULE:{task.recurrence}')
+    lines.append(f"PRIORITY:{ICS_PRIORITIES.get(task.priority, 5)}")
+    lines.append(f"STATUS:{ICS_STATUSES.get(task.status, 'NEEDS-ACTION')}")
+    lines.append('END:VTODO')
+    return ''.join(_ics_fold(line) for line in lines)
+
+
+async def export_tasks(user_id: int, file_format: str, path: str) -> int:
+    """
+    Экспорт задач пользователя в файл
+    
+    Задачи читаются курсором пачками и сразу записываются в файл
+    
+    Returns:
+        Количество выгруженных задач
+    """
+    exported = 0
+    
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        if file_format == 'csv':
+            writer = csv.writer(file)
+            writer.writerow(FIELDS)
+        elif file_format == 'json':
+            file.write('[')
+        else:
+            file.write('BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//TaskManagerBot//RU\r\n')
+        
+        stamp = datetime.now(pytz.utc).strftime('%Y%m%dT%H%M%SZ')
+        
+        async for tasks in TaskRepository.iter_all(user_id, TASK_TRANSFER_BATCH_SIZE):
+            for task in tasks:
+                if file_format == 'csv':
+                    writer.writerow([_export_value(task, name) for name in FIELDS])
+                elif file_format == 'json':
+                    file.write(',\n' if exported else '\n')
+                    json.dump({name: _export_value(task, name) for name in FIELDS}, file, ensure_ascii=False)
+                else:
+                    file.write(_ics_todo(task, stamp))
+                exported += 1
+        
+        if file_format == 'json':
+            file.write('\n]\n')
+        elif file_format == 'ics':
+            file.write('END:VCALENDAR\r\n')
+    
+    return exported
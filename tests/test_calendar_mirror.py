@@ -0,0 +1,161 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+os.environ.setdefault('BOT_TOKEN', 'test')
+
+from db.database import db
+from db.repositories import JobStateRepository
+from services.calendar_mirror import CalendarMirror, SYNC_HORIZON_STATE
+
+
+def event(event_id: str, days: float, status: str = 'confirmed') -> dict:
+    """Событие Calendar API через days дней от текущего момента"""
+    start = (datetime.now(timezone.utc) + timedelta(days=days)).isoformat()
+    return {'id': event_id, 'status': status, 'summary': event_id, 'start': {'dateTime': start}, 'end': {'dateTime': start}}
+
+
+class FakeCalendar:
+    """
+    Локальная подделка events.list
+    
+    Полная выборка возвращает события периода [time_min, time_max),
+    инкрементальная - изменения после выдачи токена
+    """
+    
+    enabled = True
+    
+    def __init__(self):
+        self.events: dict[str, dict] = {}
+        self.changes: list[dict] = []
+        self.calls: list[dict] = []
+    
+    def put(self, item: dict):
+        self.events[item['id']] = item
+        self.changes.append(item)
+    
+    async def list_event_changes(self, sync_token=None, time_min=None, time_max=None):
+        self.calls.append({'sync_token': sync_token, 'time_min': time_min, 'time_max': time_max})
+        if sync_token:
+            items = self.changes[int(sync_token):]
+        else:
+            items = [
+                item for item in self.events.values()
+                if time_min <= datetime.fromisoformat(item['start']['dateTime']) < time_max
+            ]
+        return items, str(len(self.changes))
+
+
+class CalendarMirrorTest(unittest.IsolatedAsyncioTestCase):
+    """Синхронизация локальной копии календаря с горизонтом"""
+    
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        db.db_path = os.path.join(self.tmp.name, 'tasks.db')
+        await db.connect()
+        self.calendar = FakeCalendar()
+        self.mirror = CalendarMirror(calendar=self.calendar, horizon_days=30)
+    
+    async def asyncTearDown(self):
+        await db.disconnect()
+        self.tmp.cleanup()
+    
+    async def _ids(self) -> list:
+        return [item['id'] for item in await self.mirror.get_events(days=365, limit=100)]
+    
+    async def test_full_sync_is_bounded_by_horizon(self):
+        self.calendar.put(event('soon', 2))
+        self.calendar.put(event('far', 100))
+        
+        await self.mirror.sync()
+        
+        call = self.calendar.calls[0]
+        self.assertIsNone(call['sync_token'])
+        self.assertAlmostEqual((call['time_max'] - call['time_min']).days, 31, delta=1)
+        self.assertEqual(await self._ids(), ['soon'])
+    
+    async def test_incremental_changes_apply_to_copy(self):
+        self.calendar.put(event('kept', 1))
+        self.calendar.put(event('deleted', 2))
+        await self.mirror.sync()
+        
+        self.calendar.put(event('added', 3))
+        self.calendar.put(event('deleted', 2, status='cancelled'))
+        await self.mirror.sync()
+        
+        self.assertIsNotNone(self.calendar.calls[-1]['sync_token'])
+        self.assertEqual(await self._ids(), ['kept', 'added'])
+    
+    async def test_event_moved_past_horizon_is_removed(self):
+        self.calendar.put(event('moved', 2))
+        await self.mirror.sync()
+        self.assertEqual(await self._ids(), ['moved'])
+        
+        self.calendar.put(event('moved', 60))
+        await self.mirror.sync()
+        
+        self.assertEqual(await self._ids(), [])
+    
+    async def test_full_sync_when_horizon_runs_out(self):
+        self.calendar.put(event('first', 1))
+        await self.mirror.sync()
+        
+        horizon = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=3)
+        await JobStateRepository.set(SYNC_HORIZON_STATE, horizon.isoformat())
+        await self.mirror.sync()
+        
+        self.assertIsNone(self.calendar.calls[-1]['sync_token'])
+        self.assertEqual(self.mirror.get_stats()['full_syncs'], 2)
+    
+    async def test_views_read_local_copy_within_staleness(self):
+        self.calendar.put(event('first', 1))
+        self.mirror.max_staleness = 60
+        
+        for _ in range(20):
+            self.assertEqual([item['id'] for item in await self.mirror.get_events()], ['first'])
+        self.assertEqual(len(self.calendar.calls), 1)
+        
+        # Устаревшая копия догоняет только изменения
+        self.calendar.put(event('second', 2))
+        self.mirror.synced_at = time.monotonic() - 61
+        self.assertEqual([item['id'] for item in await self.mirror.get_events()], ['first', 'second'])
+        self.assertEqual(len(self.calendar.calls), 2)
+        self.assertEqual(self.mirror.get_stats()['changes'], 2)
+    
+    async def test_view_survives_calendar_errors(self):
+        self.calendar.put(event('first', 1))
+        await self.mirror.sync()
+        
+        async def unavailable(**kwargs):
+            raise ConnectionError('calendar unavailable')
+        
+        self.calendar.list_event_changes = unavailable
+        self.mirror.synced_at = time.monotonic() - self.mirror.max_staleness - 1
+        
+        self.assertEqual(await self._ids(), ['first'])
+    
+    async def test_expired_token_triggers_full_sync(self):
+        self.calendar.put(event('first', 1))
+        await self.mirror.sync()
+        list_event_changes = self.calendar.list_event_changes
+        
+        async def gone(sync_token=None, **kwargs):
+            if sync_token:
+                error = Exception('Sync token is no longer valid')
+                error.resp = SimpleNamespace(status=410)
+                raise error
+            return await list_event_changes(**kwargs)
+        
+        self.calendar.list_event_changes = gone
+        self.calendar.put(event('second', 2))
+        await self.mirror.sync()
+        
+        self.assertEqual(self.mirror.get_stats()['full_syncs'], 2)
+        self.assertEqual(await self._ids(), ['first', 'second'])
+
+
+if __name__ == '__main__':
+    unittest.main()
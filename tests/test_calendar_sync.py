@@ -0,0 +1,159 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+
+os.environ.setdefault('BOT_TOKEN', 'test')
+
+from db.database import db
+from db.repositories import TaskRepository, CalendarOutboxRepository
+from models.task import Task
+from services.calendar_sync import CalendarSyncWorker
+
+
+class FakeHttpError(Exception):
+    """Ошибка Google API с HTTP статусом"""
+    
+    def __init__(self, status: int):
+        super().__init__(f'HTTP {status}')
+        self.resp = SimpleNamespace(status=status)
+
+
+class FakeCalendar:
+    """
+    Локальная подделка batch запросов Calendar API
+    
+    failures - ошибки по ключу операции (task_id создания или event_id
+    удаления), каждая возвращается один раз
+    """
+    
+    enabled = True
+    
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.batches: list[list] = []
+        self.events: dict[str, dict] = {}
+        self.failures: dict = {}
+    
+    async def execute_batch(self, operations: list) -> list:
+        await asyncio.sleep(self.delay)
+        self.batches.append(operations)
+        results = []
+        for operation, argument in operations:
+            key = argument['extendedProperties']['private']['task_id'] if operation == 'create' else argument
+            if key in self.failures:
+                results.append((None, self.failures.pop(key)))
+            elif operation == 'create':
+                event_id = f'event{len(self.events)}'
+                self.events[event_id] = argument
+                results.append(({'id': event_id}, None))
+            elif self.events.pop(argument, None) is None:
+                results.append((None, FakeHttpError(404)))
+            else:
+                results.append(('', None))
+        return results
+
+
+class CalendarSyncTest(unittest.IsolatedAsyncioTestCase):
+    """Outbox календаря: пачки, запись google_event_id и повторы"""
+    
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        db.db_path = os.path.join(self.tmp.name, 'tasks.db')
+        await db.connect()
+        self.calendar = FakeCalendar()
+        self.worker = CalendarSyncWorker(calendar=self.calendar, batch_size=50, interval=0.01)
+    
+    async def asyncTearDown(self):
+        await self.worker.stop()
+        await db.disconnect()
+        self.tmp.cleanup()
+    
+    async def _create(self, title: str = 'task') -> Task:
+        """Создание задачи с операцией календаря, как в хендлере"""
+        async with db.transaction():
+            task = await TaskRepository.create(Task(user_id=1, title=title))
+            await CalendarOutboxRepository.enqueue(task.id, 1, 'create', {
+                'summary': title, 'extendedProperties': {'private': {'task_id': task.id}}
+            })
+        self.worker.notify()
+        return task
+    
+    async def _event_id(self, task_id: int):
+        return (await db.fetchone('SELECT google_event_id FROM tasks WHERE id = ?', (task_id,)))[0]
+    
+    async def _make_due(self):
+        await db.execute("UPDATE calendar_outbox SET next_attempt_at = '2000-01-01T00:00:00'")
+    
+    async def test_jobs_are_sent_in_batches(self):
+        tasks = [await self._create(f'task {i}') for i in range(120)]
+        
+        while await self.worker.sync_once():
+            pass
+        
+        self.assertEqual([len(batch) for batch in self.calendar.batches], [50, 50, 20])
+        self.assertEqual(await CalendarOutboxRepository.count_pending(), 0)
+        event_ids = [await self._event_id(task.id) for task in tasks]
+        self.assertEqual(sorted(event_ids), sorted(self.calendar.events))
+    
+    async def test_duplicate_jobs_are_coalesced(self):
+        task = await self._create()
+        await CalendarOutboxRepository.enqueue(task.id, 1, 'create', {
+            'summary': 'task', 'extendedProperties': {'private': {'task_id': task.id}}
+        })
+        
+        await self.worker.sync_once()
+        
+        self.assertEqual(len(self.calendar.batches[0]), 1)
+        self.assertEqual(await CalendarOutboxRepository.count_pending(), 0)
+    
+    async def test_failures_are_retried_with_backoff(self):
+        retried, rejected = await self._create('retried'), await self._create('rejected')
+        self.calendar.failures = {retried.id: FakeHttpError(503), rejected.id: FakeHttpError(400)}
+        
+        await self.worker.sync_once()
+        
+        self.assertEqual(self.worker.get_stats()['retries'], 1)
+        self.assertEqual(self.worker.get_stats()['failed'], 1)
+        self.assertEqual(await self.worker.sync_once(), 0)
+        
+        await self._make_due()
+        await self.worker.sync_once()
+        
+        self.assertIsNotNone(await self._event_id(retried.id))
+        self.assertIsNone(await self._event_id(rejected.id))
+        status = await db.fetchone('SELECT status, attempts FROM calendar_outbox WHERE task_id = ?', (rejected.id,))
+        self.assertEqual(tuple(status), ('failed', 1))
+    
+    async def test_event_of_deleted_task_is_removed(self):
+        task = await self._create()
+        await TaskRepository.delete(task.id, 1)
+        
+        await self.worker.sync_once()
+        await self.worker.sync_once()
+        
+        self.assertEqual(self.calendar.events, {})
+        # Повторное удаление (404) считается выполненным
+        await CalendarOutboxRepository.enqueue(task.id, 1, 'delete', {'event_id': 'event0'})
+        await self.worker.sync_once()
+        self.assertEqual(await CalendarOutboxRepository.count_pending(), 0)
+    
+    async def test_task_creation_does_not_wait_for_calendar(self):
+        self.calendar.delay = 0.5
+        self.worker.start()
+        
+        started = time.monotonic()
+        task = await self._create()
+        self.assertLess(time.monotonic() - started, 0.1)
+        
+        for _ in range(100):
+            if await self._event_id(task.id):
+                break
+            await asyncio.sleep(0.02)
+        self.assertEqual(await self._event_id(task.id), 'event0')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+os.environ.setdefault('BOT_TOKEN', 'test')
+
+from db.database import db
+from handlers.commands import reminders_view_handler, stats_view_handler
+
+
+class FakeCallback:
+    """Нажатие inline-кнопки: хендлеру нужны только from_user, message и answer"""
+    
+    def __init__(self, user_id: int):
+        self.from_user = SimpleNamespace(id=user_id)
+        self.message = SimpleNamespace(edit_text=self._noop)
+    
+    async def _noop(self, *args, **kwargs):
+        pass
+    
+    async def answer(self, *args, **kwargs):
+        pass
+
+
+class DatabaseLifecycleTest(unittest.IsolatedAsyncioTestCase):
+    """Экраны напоминаний и статистики не открывают новых подключений"""
+    
+    CLICKS = 10_000
+    
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        db.db_path = os.path.join(self.tmp.name, 'tasks.db')
+        await db.connect()
+    
+    async def asyncTearDown(self):
+        await db.disconnect()
+        self.tmp.cleanup()
+    
+    async def test_connection_count_is_constant_after_clicks(self):
+        callback = FakeCallback(user_id=1)
+        await reminders_view_handler(callback)
+        await stats_view_handler(callback)
+        before = db.get_pool_stats()
+        
+        for click in range(self.CLICKS):
+            handler = reminders_view_handler if click % 2 else stats_view_handler
+            await handler(callback)
+        
+        after = db.get_pool_stats()
+        self.assertEqual(after['open_connections'], before['open_connections'])
+        self.assertEqual(after['threads'], before['threads'])
+    
+    async def test_connect_is_idempotent(self):
+        connection = db.connection
+        stats = db.get_pool_stats()
+        
+        await db.connect()
+        
+        self.assertIs(db.connection, connection)
+        self.assertEqual(db.get_pool_stats()['open_connections'], stats['open_connections'])
+
+
+if __name__ == '__main__':
+    unittest.main()
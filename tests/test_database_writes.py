@@ -0,0 +1,84 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+os.environ.setdefault('BOT_TOKEN', 'test')
+
+from db.database import Database
+
+
+class DatabaseWritesTest(unittest.IsolatedAsyncioTestCase):
+    """Групповой коммит записей"""
+    
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # Большое окно: если запись его ждет, это будет заметно
+        self.db = Database(os.path.join(self.tmp.name, 'tasks.db'), commit_window_ms=1000)
+        await self.db.connect()
+        
+        self.commits = 0
+        commit = self.db.connection.commit
+        
+        async def counting_commit():
+            self.commits += 1
+            await commit()
+        
+        self.db.connection.commit = counting_commit
+    
+    async def asyncTearDown(self):
+        await self.db.disconnect()
+        self.tmp.cleanup()
+    
+    async def _insert(self, user_id: int):
+        await self.db.execute("INSERT INTO users (telegram_id, username) VALUES (?, 'user')", (user_id,))
+    
+    async def _count(self) -> int:
+        return (await self.db.fetchone('SELECT COUNT(*) FROM users'))[0]
+    
+    async def test_lone_write_commits_without_waiting_for_window(self):
+        started = time.monotonic()
+        for user_id in range(20):
+            await self._insert(user_id)
+        
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(self.commits, 20)
+    
+    async def test_concurrent_writes_share_commits(self):
+        await asyncio.gather(*(self._insert(user_id) for user_id in range(100)))
+        
+        self.assertLess(self.commits, 10)
+        self.assertEqual(await self._count(), 100)
+    
+    async def test_disconnect_commits_pending_writes(self):
+        writes = [asyncio.create_task(self._insert(user_id)) for user_id in range(50)]
+        await asyncio.sleep(0)
+        
+        await self.db.disconnect()
+        await asyncio.wait_for(asyncio.gather(*writes, return_exceptions=True), 1)
+        
+        await self.db.connect()
+        self.assertEqual(await self._count(), sum(not write.exception() for write in writes))
+    
+    async def test_cancelled_commit_fails_waiting_writes(self):
+        commit = self.db.connection.commit
+        
+        async def slow_commit():
+            await asyncio.sleep(0.5)
+            await commit()
+        
+        self.db.connection.commit = slow_commit
+        committed = asyncio.get_running_loop().create_future()
+        self.db._pending_commits.append(committed)
+        
+        flush = asyncio.create_task(self.db._commit_pending())
+        await asyncio.sleep(0.05)
+        flush.cancel()
+        
+        with self.assertRaises(RuntimeError):
+            await asyncio.wait_for(committed, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
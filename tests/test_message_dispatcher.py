@@ -0,0 +1,113 @@
+import asyncio
+import os
+import time
+import unittest
+
+os.environ.setdefault('BOT_TOKEN', 'test')
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+from services.message_dispatcher import MessageDispatcher
+
+
+class FakeBot:
+    """Бот без сети: запоминает отправленные сообщения, может ответить RetryAfter"""
+    
+    def __init__(self, flood_after: int = None, retry_after: int = 1):
+        self.sent: list[tuple[float, int, str]] = []
+        self.flood_after = flood_after
+        self.retry_after = retry_after
+    
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        if self.flood_after is not None and len(self.sent) == self.flood_after:
+            self.flood_after = None
+            raise TelegramRetryAfter(
+                method=SendMessage(chat_id=chat_id, text=text), message='Flood control', retry_after=self.retry_after
+            )
+        self.sent.append((time.monotonic(), chat_id, text))
+
+
+class MessageDispatcherTest(unittest.IsolatedAsyncioTestCase):
+    """Пропускная способность и лимиты очереди отправки на поддельном боте"""
+    
+    async def _run(self, dispatcher: MessageDispatcher, bot: FakeBot, messages: list) -> float:
+        dispatcher.start(bot)
+        started = time.monotonic()
+        done = [await dispatcher.send(chat_id, text) for chat_id, text in messages]
+        await asyncio.gather(*done)
+        elapsed = time.monotonic() - started
+        await dispatcher.stop()
+        return elapsed
+    
+    async def test_throughput_follows_global_rate(self):
+        dispatcher = MessageDispatcher(rate=100, per_chat_interval=1, workers=8, queue_size=1000)
+        bot = FakeBot()
+        
+        # Запас токенов - 100 сообщений сразу, еще 100 за секунду
+        elapsed = await self._run(dispatcher, bot, [(chat_id, 'text') for chat_id in range(200)])
+        
+        self.assertEqual(len(bot.sent), 200)
+        self.assertGreater(elapsed, 0.9)
+        self.assertLess(elapsed, 2)
+        self.assertEqual(dispatcher.get_stats()['sent'], 200)
+    
+    async def test_retry_after_pauses_sending(self):
+        dispatcher = MessageDispatcher(rate=100, per_chat_interval=0, workers=4, queue_size=100)
+        bot = FakeBot(flood_after=5, retry_after=1)
+        
+        await self._run(dispatcher, bot, [(chat_id, 'text') for chat_id in range(20)])
+        
+        self.assertEqual(len(bot.sent), 20)
+        self.assertEqual(dispatcher.get_stats()['retries'], 1)
+        gaps = [later[0] - earlier[0] for earlier, later in zip(bot.sent, bot.sent[1:])]
+        self.assertGreaterEqual(max(gaps), 0.9)
+    
+    async def test_busy_chat_does_not_block_other_chats(self):
+        dispatcher = MessageDispatcher(rate=100, per_chat_interval=0.2, workers=2, queue_size=100)
+        bot = FakeBot()
+        messages = [(1, f'busy {i}') for i in range(5)] + [(chat_id, 'other') for chat_id in range(100, 120)]
+        
+        started = time.monotonic()
+        await self._run(dispatcher, bot, messages)
+        
+        others = [moment - started for moment, chat_id, _ in bot.sent if chat_id != 1]
+        busy = [text for _, chat_id, text in bot.sent if chat_id == 1]
+        self.assertLess(max(others), 0.2)
+        self.assertEqual(busy, [f'busy {i}' for i in range(5)])
+    
+    async def test_send_waits_for_room(self):
+        # Без воркеров сообщения не уходят и держат место
+        dispatcher = MessageDispatcher(rate=100, queue_size=4, chat_backlog=2)
+        
+        await dispatcher.send(1, 'first')
+        await dispatcher.send(1, 'second')
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(dispatcher.send(1, 'third'), 0.1)
+        
+        await dispatcher.send(2, 'first')
+        await dispatcher.send(3, 'first')
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(dispatcher.send(4, 'first'), 0.1)
+        
+        self.assertEqual(dispatcher.get_stats()['pending'], 4)
+    
+    async def test_expired_message_is_not_sent(self):
+        dispatcher = MessageDispatcher(rate=100, per_chat_interval=0, workers=1, queue_size=10)
+        bot = FakeBot()
+        failed = []
+        
+        async def on_failed():
+            failed.append(True)
+        
+        done = await dispatcher.send(1, 'late', on_failed=on_failed, ttl=-1)
+        dispatcher.start(bot)
+        await done
+        await dispatcher.stop()
+        
+        self.assertEqual(bot.sent, [])
+        self.assertEqual(failed, [True])
+        self.assertEqual(dispatcher.get_stats()['expired'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
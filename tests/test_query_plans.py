@@ -0,0 +1,161 @@
+import os
+import tempfile
+import unittest
+from contextlib import ExitStack
+from datetime import datetime
+from unittest.mock import patch
+
+os.environ.setdefault('BOT_TOKEN', 'test')
+
+from db.database import db
+from db.repositories import (
+    TaskRepository, UserRepository, ReminderRepository, JobStateRepository,
+    CalendarOutboxRepository, CalendarEventRepository
+)
+from models.task import Task
+
+
+class QueryPlanTest(unittest.IsolatedAsyncioTestCase):
+    """
+    Запросы репозиториев читают индексы, а не всю таблицу
+    
+    ANALYZE не выполняется, поэтому план не зависит от числа строк
+    и небольшой базы достаточно
+    """
+    
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        db.db_path = os.path.join(self.tmp.name, 'tasks.db')
+        await db.connect()
+        
+        # Много просроченных обычных задач и несколько повторяющихся
+        async with db.transaction():
+            await db.executemany('''
+                INSERT INTO tasks (user_id, title, status, due_date) VALUES (?, 'task', 'pending', ?)
+            ''', [(i % 100, f'2025-01-01T{i % 24:02d}:00:00') for i in range(5000)])
+            await db.executemany('''
+                INSERT INTO tasks (user_id, title, status, due_date, recurrence)
+                VALUES (?, 'chore', 'pending', '2025-01-01T09:00:00', 'FREQ=DAILY')
+            ''', [(i,) for i in range(20)])
+            await db.executemany('''
+                INSERT INTO tasks (user_id, title, status) VALUES (?, 'no due date', 'completed')
+            ''', [(i % 100,) for i in range(500)])
+            await db.executemany('''
+                INSERT INTO users (telegram_id, username) VALUES (?, 'user')
+            ''', [(i,) for i in range(100)])
+            await db.executemany('''
+                INSERT INTO reminders (task_id, user_id, reminder_time, is_sent) VALUES (?, ?, ?, ?)
+            ''', [(i + 1, i % 100, f'2025-01-01T{i % 24:02d}:00:00', i % 2) for i in range(2000)])
+            await db.executemany('''
+                INSERT INTO calendar_outbox (task_id, user_id, operation, payload, next_attempt_at, status)
+                VALUES (?, 1, 'create', '{}', '2025-01-01T00:00:00', ?)
+            ''', [(i + 1, 'pending' if i % 10 else 'failed') for i in range(500)])
+            await db.executemany('''
+                INSERT INTO calendar_events (id, start_time, start_utc) VALUES (?, '{}', ?)
+            ''', [(f'event{i}', f'2025-01-{i % 28 + 1:02d}T10:00:00') for i in range(500)])
+    
+    async def asyncTearDown(self):
+        await db.disconnect()
+        self.tmp.cleanup()
+    
+    async def _plans(self, call) -> list:
+        """Планы всех запросов чтения, выполненных call()"""
+        queries = []
+        
+        def record(original):
+            def wrapper(query, params=(), *args, **kwargs):
+                queries.append((query, params))
+                return original(query, params, *args, **kwargs)
+            return wrapper
+        
+        with ExitStack() as stack:
+            for name in ('execute', 'fetchone', 'fetchall', 'iterate'):
+                stack.enter_context(patch.object(db, name, record(getattr(db, name))))
+            result = call()
+            if hasattr(result, '__aiter__'):
+                async for _ in result:
+                    pass
+            else:
+                await result
+        
+        plans = []
+        for query, params in queries:
+            # Вставки без выборки не имеют плана
+            if 'WHERE' not in query:
+                continue
+            rows = await db.fetchall('EXPLAIN QUERY PLAN ' + query, params)
+            plans.append(' | '.join(row[3] for row in rows))
+        return plans
+    
+    def assertUsesIndex(self, plans: list, index: str = None):
+        """Каждый план ищет по индексу или ключу (и по index, если он указан)"""
+        self.assertTrue(plans)
+        for plan in plans:
+            self.assertNotRegex(plan, r'SCAN \w+\b(?! USING| VIRTUAL)', plan)
+            self.assertRegex(plan, r'INDEX|PRIMARY KEY', plan)
+            if index:
+                self.assertIn(index, plan)
+    
+    async def test_iter_recurring_reads_only_rules(self):
+        plans = await self._plans(lambda: TaskRepository.iter_recurring('2026-01-01T00:00:00'))
+        self.assertUsesIndex(plans, 'idx_tasks_recurring_due')
+    
+    async def test_task_queries_use_indexes(self):
+        first, last = (await db.fetchone('SELECT MIN(id), MAX(id) FROM tasks WHERE due_date IS NOT NULL'))
+        no_due = (await db.fetchone('SELECT MIN(id) FROM tasks WHERE due_date IS NULL'))[0]
+        task = await TaskRepository.get_by_id(first, 0)
+        
+        calls = {
+            'iter_all': lambda: TaskRepository.iter_all(1),
+            'get_by_id': lambda: TaskRepository.get_by_id(first, 0),
+            'get_all': lambda: TaskRepository.get_all(1),
+            'get_all status': lambda: TaskRepository.get_all(1, 'pending', projection='summary'),
+            'get_overdue': lambda: TaskRepository.get_overdue(1),
+            'get_upcoming': lambda: TaskRepository.get_upcoming(1, projection='summary'),
+            'get_stats counters': lambda: TaskRepository.get_stats(1, use_counters=True),
+            'get_stats query': lambda: TaskRepository.get_stats(1, use_counters=False),
+            'get_newly_overdue': lambda: TaskRepository.get_newly_overdue('2025-01-01T00:00:00', '2025-01-01T12:00:00'),
+            'search': lambda: TaskRepository.search(1, 'task'),
+            'update': lambda: TaskRepository.update(task),
+            'set_google_event_id': lambda: TaskRepository.set_google_event_id(first, 0, 'event'),
+            'delete': lambda: TaskRepository.delete(last, 0),
+        }
+        for filter_type in ('all', 'pending', 'completed', 'overdue'):
+            calls[f'count {filter_type}'] = lambda f=filter_type: TaskRepository.count(1, f)
+            calls[f'list_page {filter_type}'] = lambda f=filter_type: TaskRepository.list_page(1, f, projection='summary')
+            for cursor in (first, no_due):
+                for backward in (False, True):
+                    calls[f'list_page {filter_type} {cursor} {backward}'] = (
+                        lambda f=filter_type, c=cursor, b=backward: TaskRepository.list_page(0, f, c, backward=b)
+                    )
+        
+        with patch('db.repositories.TASK_STATS_COUNTERS', False):
+            for name, call in calls.items():
+                with self.subTest(name):
+                    self.assertUsesIndex(await self._plans(call))
+    
+    async def test_other_repository_queries_use_indexes(self):
+        # UserRepository.get_all выбирает всех пользователей и не проверяется
+        calls = {
+            'job_state get': lambda: JobStateRepository.get('overdue_scan'),
+            'user get_by_telegram_id': lambda: UserRepository.get_by_telegram_id(1),
+            'reminder get_by_id': lambda: ReminderRepository.get_by_id(1),
+            'reminder get_by_task': lambda: ReminderRepository.get_by_task(1),
+            'reminder get_pending': lambda: ReminderRepository.get_pending(),
+            'reminder iter_pending': lambda: ReminderRepository.iter_pending(),
+            'reminder mark_as_sent': lambda: ReminderRepository.mark_as_sent(1),
+            'reminder reschedule': lambda: ReminderRepository.reschedule(1, datetime(2026, 1, 1)),
+            'outbox claim_due': lambda: CalendarOutboxRepository.claim_due(50, 60),
+            'outbox cancel_pending': lambda: CalendarOutboxRepository.cancel_pending(1, 'create'),
+            'outbox count_pending': lambda: CalendarOutboxRepository.count_pending(),
+            'outbox complete': lambda: CalendarOutboxRepository.complete([1, 2]),
+            'events get_range': lambda: CalendarEventRepository.get_range('2025-01-01', '2025-01-08'),
+            'events delete_many': lambda: CalendarEventRepository.delete_many(['event1']),
+        }
+        for name, call in calls.items():
+            with self.subTest(name):
+                self.assertUsesIndex(await self._plans(call))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import asyncio
+import os
+import random
+import selectors
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+os.environ.setdefault('BOT_TOKEN', 'test')
+
+from services.reminder_backends import RedisReminderBackend, TimingWheelBackend
+
+try:
+    from fakeredis import aioredis as fakeredis
+except ImportError:
+    fakeredis = None
+
+
+class FakeClock:
+    """Виртуальные часы (секунды эпохи)"""
+    
+    def __init__(self, now: float):
+        self.now = now
+    
+    def time(self) -> float:
+        return self.now
+
+
+class VirtualSelector(selectors.DefaultSelector):
+    """Селектор, который вместо ожидания таймера сдвигает часы"""
+    
+    def __init__(self, clock: FakeClock):
+        super().__init__()
+        self.clock = clock
+    
+    def select(self, timeout=None):
+        events = super().select(0)
+        if not events and timeout:
+            self.clock.now += timeout
+        return events
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """Цикл событий на виртуальных часах: час ожиданий проходит мгновенно"""
+    
+    def __init__(self, clock: FakeClock):
+        super().__init__(VirtualSelector(clock))
+        self.clock = clock
+        # На секундах эпохи now + 1e-9 == now, и таймер со сроком now не срабатывал бы
+        self._clock_resolution = 1e-6
+    
+    def time(self) -> float:
+        return self.clock.now
+
+
+def percentile(values: list, q: float) -> float:
+    """Перцентиль q (0..1) по ближайшему рангу"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ReminderLatencyTest(unittest.TestCase):
+    """
+    Опоздание доставки напоминаний на виртуальных часах
+    
+    Напоминания на час вперед: половина добавляется заранее, половина -
+    пока диспетчер спит до более позднего напоминания. Измеряется,
+    насколько позже своего времени напоминание отдано wait_for_due.
+    """
+    
+    REMINDERS = 500
+    HORIZON = 3600
+    START = 1_800_000_000.0
+    
+    def _run(self, scenario):
+        clock = FakeClock(self.START)
+        with patch('services.reminder_backends.time', SimpleNamespace(time=clock.time)):
+            with asyncio.Runner(loop_factory=lambda: VirtualTimeLoop(clock)) as runner:
+                return runner.run(scenario(clock))
+    
+    async def _deliver(self, clock: FakeClock, backend) -> list:
+        """Опоздания всех напоминаний сценария"""
+        rng = random.Random(4)
+        due = {reminder_id: self.START + rng.uniform(1, self.HORIZON) for reminder_id in range(self.REMINDERS)}
+        early, late = list(due)[::2], list(due)[1::2]
+        
+        async def add(reminder_id: int):
+            payload = {'reminder_id': reminder_id, 'user_id': 1, 'task_id': reminder_id}
+            await backend.add(payload, due[reminder_id])
+        
+        async def add_later(reminder_id: int):
+            # Добавление незадолго до срока, когда диспетчер уже спит
+            await asyncio.sleep(max(0.0, due[reminder_id] - clock.now - rng.uniform(0.5, 600)))
+            await add(reminder_id)
+        
+        for reminder_id in early:
+            await add(reminder_id)
+        producers = [asyncio.create_task(add_later(reminder_id)) for reminder_id in late]
+        
+        lateness = {}
+        while len(lateness) < self.REMINDERS:
+            for reminder in await backend.wait_for_due(100):
+                reminder_id = reminder['reminder_id']
+                self.assertNotIn(reminder_id, lateness)
+                lateness[reminder_id] = clock.now - due[reminder_id]
+                await backend.ack(reminder_id)
+        
+        await asyncio.gather(*producers)
+        return list(lateness.values())
+    
+    def test_timing_wheel_lateness(self):
+        async def scenario(clock):
+            backend = TimingWheelBackend()
+            await backend.start()
+            return await self._deliver(clock, backend)
+        
+        lateness = self._run(scenario)
+        
+        p50, p99 = percentile(lateness, 0.5), percentile(lateness, 0.99)
+        self.assertGreaterEqual(min(lateness), 0)
+        # Точность колеса - секунда
+        self.assertLessEqual(p99, 1.0, f"p50={p50:.3f} p99={p99:.3f}")
+    
+    @unittest.skipIf(fakeredis is None, "fakeredis не установлен")
+    def test_redis_lateness_and_idle_round_trips(self):
+        lease_seconds = 60
+        commands = []
+        
+        async def scenario(clock):
+            redis = fakeredis.FakeRedis(decode_responses=True)
+            execute_command = redis.execute_command
+            
+            async def counting(*args, **kwargs):
+                commands.append(args[0])
+                return await execute_command(*args, **kwargs)
+            
+            redis.execute_command = counting
+            backend = RedisReminderBackend(redis, 'worker-1', lease_seconds)
+            await backend.start()
+            try:
+                lateness = await self._deliver(clock, backend)
+                
+                # Пустая очередь: обращения к Redis только для возврата аренд
+                commands.clear()
+                with self.assertRaises(asyncio.TimeoutError):
+                    await asyncio.wait_for(backend.wait_for_due(100), self.HORIZON)
+                return lateness
+            finally:
+                await backend.close()
+        
+        lateness = self._run(scenario)
+        
+        p50, p99 = percentile(lateness, 0.5), percentile(lateness, 0.99)
+        self.assertGreaterEqual(min(lateness), 0)
+        self.assertLess(p99, 1.0, f"p50={p50:.3f} p99={p99:.3f}")
+        # Возврат аренд и чтение головы очереди раз в lease_seconds
+        self.assertLessEqual(len(commands), 2 * (self.HORIZON // lease_seconds + 1), commands[:10])
+
+
+if __name__ == '__main__':
+    unittest.main()
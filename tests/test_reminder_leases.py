@@ -0,0 +1,94 @@
+import asyncio
+import os
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+os.environ.setdefault('BOT_TOKEN', 'test')
+
+from services.reminder_backends import RedisReminderBackend
+
+try:
+    from fakeredis import FakeServer, aioredis as fakeredis
+except ImportError:
+    fakeredis = None
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis не установлен")
+class ReminderLeasesTest(unittest.IsolatedAsyncioTestCase):
+    """Захват, аренда и возврат напоминаний двумя воркерами на общем Redis"""
+    
+    LEASE_SECONDS = 60
+    
+    async def asyncSetUp(self):
+        self.now = 1_800_000_000.0
+        clock = patch('services.reminder_backends.time', SimpleNamespace(time=lambda: self.now))
+        clock.start()
+        self.addCleanup(clock.stop)
+        
+        server = FakeServer()
+        self.workers = []
+        for worker_id in ('worker-1', 'worker-2'):
+            redis = fakeredis.FakeRedis(server=server, decode_responses=True)
+            backend = RedisReminderBackend(redis, worker_id, self.LEASE_SECONDS)
+            await backend.start()
+            self.workers.append(backend)
+        self.first, self.second = self.workers
+    
+    async def asyncTearDown(self):
+        for backend in self.workers:
+            await backend.close()
+    
+    def _reminder(self, reminder_id: int) -> dict:
+        return {'reminder_id': reminder_id, 'user_id': 1, 'task_id': reminder_id}
+    
+    async def _add_due(self, count: int):
+        for reminder_id in range(count):
+            await self.first.add(self._reminder(reminder_id), self.now - 1)
+    
+    async def _claim(self, backend: RedisReminderBackend, limit: int = 100) -> list:
+        return [reminder['reminder_id'] for reminder in await asyncio.wait_for(backend.wait_for_due(limit), 1)]
+    
+    async def _nothing_due(self, backend: RedisReminderBackend):
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(backend.wait_for_due(100), 0.1)
+    
+    async def test_each_reminder_is_claimed_by_one_worker(self):
+        await self._add_due(20)
+        
+        claims = await asyncio.gather(*(self._claim(backend, 5) for backend in self.workers * 2))
+        
+        claimed = [reminder_id for claim in claims for reminder_id in claim]
+        self.assertEqual(sorted(claimed), list(range(20)))
+        await self._nothing_due(self.first)
+    
+    async def test_expired_lease_is_redelivered(self):
+        await self._add_due(5)
+        self.assertEqual(sorted(await self._claim(self.second)), list(range(5)))
+        await self.second.ack(0)
+        await self.second.ack(1)
+        
+        # Аренда еще действует: другой воркер напоминания не получает
+        self.now += self.LEASE_SECONDS / 2
+        await self._nothing_due(self.first)
+        
+        # Воркер пропал, аренда истекла - неподтвержденные достаются живому
+        self.now += self.LEASE_SECONDS
+        self.assertEqual(sorted(await self._claim(self.first)), [2, 3, 4])
+        await self._nothing_due(self.first)
+        self.assertEqual(await self.first.count(), 0)
+    
+    async def test_rehydrate_skips_leased_reminders(self):
+        await self._add_due(5)
+        leased = await self._claim(self.second, 3)
+        
+        # Сверка с базой видит все пять неотправленных и одно новое
+        items = [(self._reminder(reminder_id), self.now - 1) for reminder_id in range(6)]
+        self.assertEqual(await self.first.add_many(items), 1)
+        
+        pending = await self._claim(self.first)
+        self.assertEqual(sorted(leased + pending), list(range(6)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import json
+import os
+import time
+import unittest
+
+os.environ.setdefault('BOT_TOKEN', 'test')
+
+from services.reminder_backends import QUEUE_KEY, PAYLOAD_KEY, RedisReminderBackend
+from services.reminder_service import ReminderService
+
+try:
+    from fakeredis import aioredis as fakeredis
+except ImportError:
+    fakeredis = None
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis не установлен")
+class ReminderQueueTest(unittest.IsolatedAsyncioTestCase):
+    """Удаление напоминаний из Redis по id не зависит от размера очереди"""
+    
+    async def asyncSetUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        self.service = ReminderService()
+        self.service.backend = RedisReminderBackend(self.redis, 'worker-1', 60)
+    
+    async def asyncTearDown(self):
+        await self.service.backend.close()
+    
+    def _reminder(self, reminder_id: int) -> dict:
+        return {'reminder_id': reminder_id, 'user_id': 1, 'task_id': reminder_id}
+    
+    async def _fill(self, count: int):
+        """Очередь из count напоминаний на будущее"""
+        for start in range(0, count, 1000):
+            await self.service.backend.add_many([
+                (self._reminder(reminder_id), time.time() + 3600 + reminder_id)
+                for reminder_id in range(start, min(start + 1000, count))
+            ])
+    
+    async def _removal_seconds(self, removals: int) -> float:
+        """Среднее время удаления одного напоминания"""
+        started = time.perf_counter()
+        for reminder_id in range(removals):
+            await self.service.remove_reminder(reminder_id)
+        return (time.perf_counter() - started) / removals
+    
+    async def test_removal_cost_is_flat(self):
+        await self.service.backend.start()
+        await self._fill(1_000)
+        small = await self._removal_seconds(200)
+        
+        await self.redis.flushall()
+        await self._fill(30_000)
+        large = await self._removal_seconds(200)
+        
+        # Перебор всей очереди дал бы разницу в 30 раз
+        self.assertLess(large, small * 3, f"1k: {small * 1e6:.0f} мкс, 30k: {large * 1e6:.0f} мкс")
+        self.assertEqual(await self.service.get_reminders_count(), 29_800)
+        self.assertEqual(await self.redis.hlen(PAYLOAD_KEY), 29_800)
+    
+    async def test_bulk_clear_removes_payloads(self):
+        await self.service.backend.start()
+        await self._fill(100)
+        
+        await self.service.clear_sent_reminders(list(range(0, 100, 2)))
+        
+        self.assertEqual(await self.redis.zrange(QUEUE_KEY, 0, -1), [str(i) for i in range(1, 100, 2)])
+        self.assertEqual(await self.redis.hlen(PAYLOAD_KEY), 50)
+    
+    async def test_legacy_queue_is_migrated(self):
+        due = time.time() + 3600
+        await self.redis.zadd(QUEUE_KEY, {json.dumps(self._reminder(reminder_id)): due for reminder_id in range(3)})
+        
+        await self.service.backend.start()
+        await self.service.remove_reminder(1)
+        
+        self.assertEqual(await self.redis.zrange(QUEUE_KEY, 0, -1), ['0', '2'])
+        self.assertEqual(json.loads(await self.redis.hget(PAYLOAD_KEY, '2')), self._reminder(2))
+
+
+if __name__ == '__main__':
+    unittest.main()
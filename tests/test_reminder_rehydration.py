@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault('BOT_TOKEN', 'test')
+
+from db.database import db
+from services.reminder_backends import RedisReminderBackend, TimingWheelBackend
+from services.reminder_service import ReminderService
+
+try:
+    from fakeredis import aioredis as fakeredis
+except ImportError:
+    fakeredis = None
+
+
+class ReminderRehydrationTest(unittest.IsolatedAsyncioTestCase):
+    """Восстановление очереди напоминаний из SQLite"""
+    
+    REMINDERS = 20_000
+    
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        db.db_path = os.path.join(self.tmp.name, 'tasks.db')
+        await db.connect()
+        
+        # Половина напоминаний уже отправлена; напоминания удаленных задач не восстанавливаются
+        async with db.transaction():
+            await db.executemany('''
+                INSERT INTO tasks (id, user_id, title) VALUES (?, 1, 'task')
+            ''', [(task_id,) for task_id in range(1, self.REMINDERS // 10 + 1)])
+            await db.executemany('''
+                INSERT INTO reminders (task_id, user_id, reminder_time, is_sent) VALUES (?, 1, ?, ?)
+            ''', [
+                (i % (self.REMINDERS // 10) + 1, f'2030-01-01T{i % 24:02d}:{i % 60:02d}:00', i % 2)
+                for i in range(self.REMINDERS)
+            ])
+            await db.executemany('''
+                INSERT INTO reminders (task_id, user_id, reminder_time) VALUES (?, 1, '2030-01-01T00:00:00')
+            ''', [(task_id,) for task_id in range(self.REMINDERS, self.REMINDERS + 100)])
+        self.pending = self.REMINDERS // 2
+        self.service = ReminderService()
+    
+    async def asyncTearDown(self):
+        await self.service.disconnect()
+        await db.disconnect()
+        self.tmp.cleanup()
+    
+    @unittest.skipIf(fakeredis is None, "fakeredis не установлен")
+    async def test_redis_queue_is_restored_after_flush(self):
+        redis = fakeredis.FakeRedis(decode_responses=True)
+        self.service.backend = RedisReminderBackend(redis, 'worker-1', 60)
+        await self.service.backend.start()
+        
+        self.assertEqual(await self.service.rehydrate(), self.pending)
+        
+        # Повторная сверка ничего не меняет
+        self.assertEqual(await self.service.rehydrate(), 0)
+        self.assertEqual(await self.service.get_reminders_count(), self.pending)
+        
+        # Redis перезапустился без данных
+        await redis.flushall()
+        self.assertEqual(await self.service.rehydrate(), self.pending)
+        self.assertEqual(await self.service.get_reminders_count(), self.pending)
+        self.assertEqual(self.service.get_stats()['rehydrations'], 3)
+    
+    async def test_memory_fallback_without_redis(self):
+        self.service.port = 1
+        
+        with patch('services.reminder_service.REMINDER_BACKEND', 'redis'):
+            await self.service.connect()
+        
+        self.assertIsInstance(self.service.backend, TimingWheelBackend)
+        self.assertEqual(await self.service.rehydrate(), self.pending)
+        self.assertEqual(await self.service.get_reminders_count(), self.pending)
+        self.assertEqual(await self.service.rehydrate(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
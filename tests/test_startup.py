@@ -0,0 +1,97 @@
+import asyncio
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault('BOT_TOKEN', 'test')
+
+from services.google_calendar import GoogleCalendarService
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Модули, которые грузит только построение клиента календаря
+CLIENT_MODULES = ('googleapiclient.discovery', 'google.oauth2.service_account', 'httplib2', 'google_auth_httplib2')
+
+
+def import_times(module: str) -> dict:
+    """Время импорта модулей (мкс, с вложенными) в чистом интерпретаторе по -X importtime"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, env={**os.environ, 'BOT_TOKEN': 'test'}, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \|\s+(\S+)', line)
+        if match:
+            times[match.group(2)] = int(match.group(1))
+    return times
+
+
+class StartupImportTest(unittest.TestCase):
+    """Импорт модулей бота не создает клиент Google Calendar"""
+    
+    def test_bot_import_skips_calendar_client(self):
+        times = import_times('bot.main')
+        
+        self.assertIn('services.google_calendar', times)
+        for module in CLIENT_MODULES:
+            self.assertNotIn(module, times)
+    
+    def test_calendar_service_import_is_fast(self):
+        times = import_times('services.google_calendar')
+        
+        # Без discovery и учетных данных импорт - доли секунды даже на медленной машине
+        self.assertLess(times['services.google_calendar'], 500_000, times['services.google_calendar'])
+
+
+class CalendarInitializeTest(unittest.IsolatedAsyncioTestCase):
+    """Клиент календаря создается один раз и вне event loop"""
+    
+    async def asyncSetUp(self):
+        self.service = GoogleCalendarService(threads=2)
+        self.builds = 0
+        
+        def slow_initialize():
+            self.builds += 1
+            time.sleep(0.3)
+            self.service.service = object()
+            self.thread = threading.current_thread().name
+        
+        for name, replacement in (('_initialize_service', slow_initialize), ('_build_service', object)):
+            patcher = patch.object(self.service, name, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    async def asyncTearDown(self):
+        self.service.close()
+    
+    async def test_initialize_does_not_block_loop(self):
+        initializing = asyncio.create_task(self.service.initialize())
+        
+        # Пока клиент строится, цикл событий обрабатывает обновления
+        started = time.monotonic()
+        await asyncio.sleep(0.01)
+        self.assertLess(time.monotonic() - started, 0.1)
+        self.assertFalse(initializing.done())
+        
+        await initializing
+        self.assertTrue(self.thread.startswith('google-calendar'))
+        self.assertTrue(self.service.enabled)
+    
+    async def test_client_is_built_once(self):
+        await asyncio.gather(
+            self.service.initialize(),
+            self.service._call('list', lambda service: service),
+            self.service._call('list', lambda service: service)
+        )
+        
+        self.assertEqual(self.builds, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import os
+import tempfile
+import time
+import tracemalloc
+import unittest
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Optional
+
+os.environ.setdefault('BOT_TOKEN', 'test')
+
+from db.database import db
+from db.repositories import TASK_COLUMNS
+from models.task import Task, TaskSummary, Reminder
+
+
+@dataclass
+class EagerTask:
+    """Прежняя модель задачи: обычный dataclass, даты разбираются сразу"""
+    id: Optional[int] = None
+    user_id: Optional[int] = None
+    title: str = ""
+    description: str = ""
+    priority: str = "medium"
+    status: str = "pending"
+    due_date: Optional[datetime] = None
+    google_event_id: Optional[str] = None
+    reminder_enabled: bool = False
+    reminder_time: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    recurrence: Optional[str] = None
+    
+    @classmethod
+    def from_row(cls, row) -> 'EagerTask':
+        """Создание задачи из строки базы данных"""
+        return cls(
+            id=row['id'],
+            user_id=row['user_id'],
+            title=row['title'],
+            description=row['description'],
+            priority=row['priority'],
+            status=row['status'],
+            due_date=datetime.fromisoformat(row['due_date']) if row['due_date'] else None,
+            google_event_id=row['google_event_id'],
+            reminder_enabled=bool(row['reminder_enabled']),
+            reminder_time=datetime.fromisoformat(row['reminder_time']) if row['reminder_time'] else None,
+            created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None,
+            updated_at=datetime.fromisoformat(row['updated_at']) if row['updated_at'] else None,
+            recurrence=row['recurrence'],
+        )
+
+
+def hydrate(build) -> tuple[float, int]:
+    """Время и память (байт) создания моделей"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    models = build()
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del models
+    return elapsed, size
+
+
+class TaskModelsTest(unittest.IsolatedAsyncioTestCase):
+    """Слотовые модели с ленивым разбором дат"""
+    
+    ROWS = 20_000
+    
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        db.db_path = os.path.join(self.tmp.name, 'tasks.db')
+        await db.connect()
+        
+        async with db.transaction():
+            await db.executemany('''
+                INSERT INTO tasks (user_id, title, description, status, due_date, reminder_enabled, reminder_time)
+                VALUES (1, ?, 'description', 'pending', ?, ?, ?)
+            ''', [
+                (f'task {i}', f'2026-01-01T{i % 24:02d}:00:00' if i % 3 else None, i % 2,
+                 f'2026-01-01T{i % 24:02d}:30:00' if i % 2 else None)
+                for i in range(self.ROWS)
+            ])
+            await db.executemany('''
+                INSERT INTO reminders (task_id, user_id, reminder_time, is_sent) VALUES (?, 1, ?, ?)
+            ''', [(i + 1, f'2026-01-01T{i % 24:02d}:30:00', i % 2) for i in range(100)])
+        self.rows = await db.fetchall(f'SELECT {TASK_COLUMNS} FROM tasks ORDER BY id')
+    
+    async def asyncTearDown(self):
+        await db.disconnect()
+        self.tmp.cleanup()
+    
+    def _values(self, model) -> tuple:
+        return tuple(getattr(model, item.name) for item in fields(model))
+    
+    async def test_from_rows_matches_from_row(self):
+        reminder_rows = await db.fetchall('SELECT * FROM reminders ORDER BY id')
+        
+        for model, rows in ((Task, self.rows[:300]), (TaskSummary, self.rows[:300]), (Reminder, reminder_rows)):
+            with self.subTest(model=model.__name__):
+                self.assertEqual(
+                    [self._values(item) for item in model.from_rows(rows)],
+                    [self._values(model.from_row(row)) for row in rows]
+                )
+        
+        self.assertEqual(
+            [self._values(task) for task in Task.from_rows(self.rows[:300])],
+            [self._values(task) for task in map(EagerTask.from_row, self.rows[:300])]
+        )
+    
+    async def test_timestamps_parse_on_first_access(self):
+        task = Task.from_rows(self.rows[1:2])[0]
+        
+        self.assertFalse(hasattr(task, '__dict__'))
+        self.assertIsInstance(Task.due_date.slot.__get__(task), str)
+        self.assertIsInstance(task.due_date, datetime)
+        self.assertIsInstance(Task.due_date.slot.__get__(task), datetime)
+    
+    async def test_hydration_is_cheaper_than_eager_models(self):
+        eager_seconds, eager_bytes = hydrate(lambda: [EagerTask.from_row(row) for row in self.rows])
+        lazy_seconds, lazy_bytes = hydrate(lambda: Task.from_rows(self.rows))
+        
+        report = (
+            f"на задачу: {eager_bytes / self.ROWS:.0f} -> {lazy_bytes / self.ROWS:.0f} байт, "
+            f"{eager_seconds / self.ROWS * 1e6:.2f} -> {lazy_seconds / self.ROWS * 1e6:.2f} мкс"
+        )
+        self.assertLess(lazy_bytes, eager_bytes * 0.8, report)
+        self.assertLess(lazy_seconds, eager_seconds, report)
+
+
+if __name__ == '__main__':
+    unittest.main()
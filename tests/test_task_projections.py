@@ -0,0 +1,86 @@
+import os
+import statistics
+import tempfile
+import time
+import unittest
+from functools import partial
+from unittest.mock import patch
+
+os.environ.setdefault('BOT_TOKEN', 'test')
+
+from db.database import db
+from db.repositories import TaskRepository, task_projection
+from models.task import Task, TaskSummary
+
+
+class TaskProjectionsTest(unittest.IsolatedAsyncioTestCase):
+    """Краткая проекция задач не читает описание и берется из индекса"""
+    
+    TASKS = 3000
+    DESCRIPTION = 'описание ' * 500
+    
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        db.db_path = os.path.join(self.tmp.name, 'tasks.db')
+        await db.connect()
+        
+        async with db.transaction():
+            await db.executemany('''
+                INSERT INTO tasks (user_id, title, description, status, due_date) VALUES (1, ?, ?, 'pending', ?)
+            ''', [(f'task {i}', self.DESCRIPTION, f'2025-01-01T{i % 24:02d}:00:00') for i in range(self.TASKS)])
+    
+    async def asyncTearDown(self):
+        await db.disconnect()
+        self.tmp.cleanup()
+    
+    async def _queries(self, call) -> list:
+        """Запросы, выполненные call()"""
+        queries = []
+        fetchall = db.fetchall
+        
+        async def record(query, params=()):
+            queries.append((query, params))
+            return await fetchall(query, params)
+        
+        with patch.object(db, 'fetchall', record):
+            await call()
+        return queries
+    
+    async def test_summary_reads_only_index(self):
+        calls = {
+            f'list_page:{filter_type}': partial(TaskRepository.list_page, 1, filter_type, projection='summary')
+            for filter_type in ('all', 'pending', 'completed', 'overdue')
+        }
+        calls['get_overdue'] = partial(TaskRepository.get_overdue, 1, projection='summary')
+        
+        for name, call in calls.items():
+            with self.subTest(method=name):
+                for query, params in await self._queries(call):
+                    self.assertNotIn('description', query)
+                    plan = ' '.join(row[3] for row in await db.fetchall(f'EXPLAIN QUERY PLAN {query}', params))
+                    self.assertIn('COVERING INDEX', plan)
+        
+        page = await TaskRepository.list_page(1, 'overdue', projection='summary')
+        self.assertTrue(page.tasks)
+        self.assertTrue(all(type(task) is TaskSummary for task in page.tasks))
+    
+    async def _fetch_seconds(self, projection: str) -> float:
+        """Медианное время выборки просроченных задач"""
+        timings = []
+        for _ in range(5):
+            started = time.perf_counter()
+            tasks = await TaskRepository.get_overdue(1, projection=projection)
+            timings.append(time.perf_counter() - started)
+        self.assertEqual(len(tasks), self.TASKS)
+        return statistics.median(timings)
+    
+    async def test_summary_fetch_is_faster_on_long_descriptions(self):
+        full = await self._fetch_seconds('full')
+        summary = await self._fetch_seconds('summary')
+        
+        self.assertIs(task_projection('full')[0], Task)
+        self.assertLess(summary, full / 2, f"full: {full * 1e3:.1f} мс, summary: {summary * 1e3:.1f} мс")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import random
+import statistics
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+
+os.environ.setdefault('BOT_TOKEN', 'test')
+
+from db.database import db
+from db.repositories import TaskRepository
+from models.task import Task, TaskStats
+
+STATUSES = ('pending', 'in_progress', 'completed', 'cancelled')
+
+
+class TaskStatsTest(unittest.IsolatedAsyncioTestCase):
+    """Статистика задач: счетчики из триггеров совпадают с агрегирующим запросом"""
+    
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        db.db_path = os.path.join(self.tmp.name, 'tasks.db')
+        await db.connect()
+    
+    async def asyncTearDown(self):
+        await db.disconnect()
+        self.tmp.cleanup()
+    
+    def _expected(self, tasks: dict, user_id: int) -> TaskStats:
+        now = datetime.now()
+        own = [task for task in tasks.values() if task.user_id == user_id]
+        return TaskStats(
+            total=len(own),
+            pending=sum(task.status == 'pending' for task in own),
+            completed=sum(task.status == 'completed' for task in own),
+            overdue=sum(
+                task.due_date is not None and task.due_date < now and task.status not in ('completed', 'cancelled')
+                for task in own
+            ),
+        )
+    
+    async def test_counters_follow_task_changes(self):
+        rng = random.Random(11)
+        tasks = {}
+        
+        for _ in range(300):
+            action = rng.random()
+            if action < 0.5 or not tasks:
+                due_date = rng.choice([None, datetime.now() + timedelta(days=rng.randint(-30, 30))])
+                task = await TaskRepository.create(Task(
+                    user_id=rng.randint(1, 3), title='task', status=rng.choice(STATUSES), due_date=due_date
+                ))
+                tasks[task.id] = task
+            elif action < 0.8:
+                task = tasks[rng.choice(list(tasks))]
+                task.status = rng.choice(STATUSES)
+                await TaskRepository.update(task)
+            elif action < 0.9:
+                # Перенос задачи другому пользователю (триггер по user_id)
+                task = tasks[rng.choice(list(tasks))]
+                task.user_id = rng.randint(1, 3)
+                await db.execute('UPDATE tasks SET user_id = ? WHERE id = ?', (task.user_id, task.id))
+            else:
+                task = tasks.pop(rng.choice(list(tasks)))
+                await TaskRepository.delete(task.id, task.user_id)
+        
+        for user_id in (1, 2, 3, 4):
+            expected = self._expected(tasks, user_id)
+            with self.subTest(user_id=user_id):
+                self.assertEqual(await TaskRepository.get_stats(user_id, use_counters=True), expected)
+                self.assertEqual(await TaskRepository.get_stats(user_id, use_counters=False), expected)
+    
+    async def _stats_seconds(self, user_id: int, use_counters: bool) -> float:
+        """Медианное время получения статистики"""
+        timings = []
+        for _ in range(30):
+            started = time.perf_counter()
+            await TaskRepository.get_stats(user_id, use_counters=use_counters)
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
+    
+    async def test_counters_do_not_grow_with_tasks(self):
+        due_date = (datetime.now() + timedelta(days=1)).isoformat()
+        async with db.transaction():
+            await db.executemany('''
+                INSERT INTO tasks (user_id, title, status, due_date) VALUES (?, 'task', ?, ?)
+            ''', [(1 if i < 100 else 2, STATUSES[i % 4], due_date) for i in range(20_100)])
+        
+        small = await self._stats_seconds(1, use_counters=True)
+        large = await self._stats_seconds(2, use_counters=True)
+        
+        # Агрегирующий запрос растет с числом задач (~1 мс на 100, ~9 мс на 20k)
+        self.assertLess(large, small * 3, f"100 задач: {small * 1e3:.2f} мс, 20k: {large * 1e3:.2f} мс")
+        self.assertEqual(
+            await TaskRepository.get_stats(2, use_counters=True),
+            await TaskRepository.get_stats(2, use_counters=False)
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
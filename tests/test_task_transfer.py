@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault('BOT_TOKEN', 'test')
+
+from db.database import db
+from services.task_transfer import parse_datetime, import_tasks
+
+
+class ParseDatetimeTest(unittest.TestCase):
+    """Даты импорта приводятся к поясу бота"""
+    
+    def test_offsets_are_normalized(self):
+        local = parse_datetime('2026-10-17T13:00:00+03:00')
+        for value in ('2026-10-17T10:00:00+00:00', '2026-10-17T10:00:00Z', '20261017T100000Z'):
+            moment = parse_datetime(value)
+            self.assertEqual(moment, local)
+            self.assertEqual(moment.isoformat(), local.isoformat())
+
+
+class ImportTasksTest(unittest.IsolatedAsyncioTestCase):
+    """Импорт не оставляет частичных данных и сообщает об обрезке"""
+    
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        db.db_path = os.path.join(self.tmp.name, 'tasks.db')
+        await db.connect()
+    
+    async def asyncTearDown(self):
+        await db.disconnect()
+        self.tmp.cleanup()
+    
+    def _file(self, text: str) -> str:
+        path = os.path.join(self.tmp.name, 'import.json')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(text)
+        return path
+    
+    async def _count(self) -> int:
+        return (await db.fetchone('SELECT COUNT(*) FROM tasks'))[0]
+    
+    @patch('services.task_transfer.TASK_TRANSFER_BATCH_SIZE', 2)
+    async def test_malformed_file_creates_nothing(self):
+        records = ',\n'.join(json.dumps({'title': f'task {i}'}) for i in range(10))
+        path = self._file(f'[{records},\n{{"title": ]')
+        
+        with self.assertRaises(ValueError):
+            await import_tasks(path, 'json', user_id=1)
+        
+        self.assertEqual(await self._count(), 0)
+    
+    @patch('services.task_transfer.IMPORT_MAX_TASKS', 3)
+    async def test_cutoff_is_reported(self):
+        records = [{'title': f'task {i}'} for i in range(5)] + [{'title': ''}]
+        path = self._file(json.dumps(records))
+        
+        created, skipped, truncated = await import_tasks(path, 'json', user_id=1)
+        
+        self.assertEqual((created, skipped, truncated), (3, 1, 2))
+        self.assertEqual(await self._count(), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
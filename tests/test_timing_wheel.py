@@ -0,0 +1,141 @@
+import asyncio
+import os
+import random
+import time
+import tracemalloc
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+os.environ.setdefault('BOT_TOKEN', 'test')
+
+from services.reminder_backends import RedisReminderBackend, TimingWheelBackend
+
+try:
+    from fakeredis import aioredis as fakeredis
+except ImportError:
+    fakeredis = None
+
+DAY = 24 * 3600
+
+
+def reminder(reminder_id: int) -> dict:
+    return {'reminder_id': reminder_id, 'user_id': 1, 'task_id': reminder_id}
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis не установлен")
+class TimingWheelParityTest(unittest.IsolatedAsyncioTestCase):
+    """Колесо таймеров выдает те же напоминания, что и очередь Redis"""
+    
+    async def asyncSetUp(self):
+        self.now = 1_800_000_000
+        clock = patch('services.reminder_backends.time', SimpleNamespace(time=lambda: self.now))
+        clock.start()
+        self.addCleanup(clock.stop)
+        
+        self.wheel = TimingWheelBackend()
+        self.redis = RedisReminderBackend(fakeredis.FakeRedis(decode_responses=True), 'worker-1', 10 * DAY)
+        self.backends = (self.wheel, self.redis)
+        for backend in self.backends:
+            await backend.start()
+    
+    async def asyncTearDown(self):
+        await self.redis.close()
+    
+    async def _claim(self, backend) -> list:
+        """Наступившие напоминания (wait_for_due вызывается, только если они есть)"""
+        if not await backend.get_due():
+            return []
+        return sorted(item['reminder_id'] for item in await asyncio.wait_for(backend.wait_for_due(10_000), 1))
+    
+    async def test_same_reminders_are_due(self):
+        rng = random.Random(24)
+        due = {}
+        delivered = 0
+        
+        for step in range(200):
+            action = rng.random()
+            if action < 0.5 or not due:
+                # Сроки до месяца вперед - напоминания проходят все уровни колеса
+                reminder_id, timestamp = step, self.now + rng.uniform(0, 30 * DAY)
+            elif action < 0.7:
+                reminder_id, timestamp = rng.choice(list(due)), self.now + rng.uniform(-60, 3 * DAY)
+            else:
+                reminder_id, timestamp = rng.choice(list(due)), None
+            
+            if timestamp is None:
+                removed = [await backend.remove(reminder_id) for backend in self.backends]
+                self.assertEqual(removed[0], removed[1], f"шаг {step}")
+                del due[reminder_id]
+            else:
+                for backend in self.backends:
+                    await backend.add(reminder(reminder_id), timestamp)
+                due[reminder_id] = timestamp
+            
+            # Часы встают и на начало секунды ближайшего напоминания, до его срока
+            upcoming = [int(timestamp) for timestamp in due.values() if int(timestamp) > self.now]
+            if upcoming and rng.random() < 0.3:
+                self.now = min(upcoming)
+            else:
+                self.now += rng.choice([1, 60, 3600, rng.randint(0, 3 * DAY)])
+            
+            claims = [await self._claim(backend) for backend in self.backends]
+            self.assertEqual(claims[0], claims[1], f"шаг {step}")
+            for reminder_id in claims[0]:
+                self.assertLessEqual(due.pop(reminder_id), self.now, f"шаг {step}")
+                if reminder_id % 3:
+                    for backend in self.backends:
+                        await backend.ack(reminder_id)
+                else:
+                    due[reminder_id] = self.now + 600
+                    for backend in self.backends:
+                        await backend.requeue(reminder(reminder_id), 600)
+            delivered += len(claims[0])
+            
+            self.assertEqual(await self.wheel.count(), await self.redis.count(), f"шаг {step}")
+            self.assertEqual(await self.wheel.count(), len(due), f"шаг {step}")
+        
+        self.assertGreater(delivered, 50)
+        self.assertGreater(self.wheel.get_stats()['cascaded'], 0)
+
+
+class TimingWheelCostTest(unittest.IsolatedAsyncioTestCase):
+    """Добавление и отмена в колесе не зависят от числа напоминаний"""
+    
+    async def _fill(self, wheel: TimingWheelBackend, count: int):
+        now = time.time()
+        for reminder_id in range(count):
+            await wheel.add(reminder(reminder_id), now + reminder_id % (30 * DAY))
+    
+    async def _add_remove_seconds(self, wheel: TimingWheelBackend) -> float:
+        """Время добавления и отмены 10k напоминаний"""
+        now = time.time()
+        started = time.perf_counter()
+        for reminder_id in range(-10_000, 0):
+            await wheel.add(reminder(reminder_id), now + 3600 + reminder_id)
+        await wheel.remove(*range(-10_000, 0))
+        return time.perf_counter() - started
+    
+    async def test_add_and_cancel_cost_is_flat(self):
+        small, large = TimingWheelBackend(), TimingWheelBackend()
+        await self._fill(small, 1_000)
+        
+        tracemalloc.start()
+        await self._fill(large, 100_000)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        small_seconds = await self._add_remove_seconds(small)
+        large_seconds = await self._add_remove_seconds(large)
+        
+        report = (
+            f"1k: {small_seconds * 1e2:.2f} мкс, 100k: {large_seconds * 1e2:.2f} мкс на добавление и отмену, "
+            f"{size / 100_000:.0f} байт на напоминание"
+        )
+        self.assertLess(large_seconds, small_seconds * 3, report)
+        self.assertLess(size / 100_000, 1024, report)
+        self.assertEqual(await large.count(), 100_000)
+
+
+if __name__ == '__main__':
+    unittest.main()